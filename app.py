@@ -1,14 +1,40 @@
 from flask import Flask, request, jsonify
-from google_ads_api import fetch_daily_comparison_data
-from send_report_email import send_daily_comparison_email, send_simple_test_email
+from send_report_email import send_simple_test_email, generate_anomalies_html
+from job_runner import submit_report_job, get_job, start_refresh_scheduler
+from render_cache import publish_render, get_render, cached_response
+from data_api import publish_data_snapshot, data_api_response
+from snapshot_store import publish_report_snapshot, read_snapshot
 import os
-import traceback
 from datetime import datetime, timedelta
 import pandas as pd
 
 app = Flask(__name__)
-last_daily_data = {}
-report_ready = False
+
+# Report account shown on the dashboard and /api/daily-data
+DASHBOARD_ACCOUNT = "luma"
+# Snapshot version this worker's render and data caches were built from
+served_version = None
+
+@app.before_request
+def ensure_refresh_scheduler():
+    """Keep snapshots refreshed in the background when REFRESH_INTERVAL_MINUTES is set (off by default)"""
+    start_refresh_scheduler()
+
+def current_daily_data():
+    """Latest published dashboard data (from whichever worker built it), or None.
+
+    Each request costs one version lookup; the dashboard and API bodies are rebuilt
+    in this worker only when a new snapshot has been published.
+    """
+    global served_version
+    snapshot = read_snapshot(DASHBOARD_ACCOUNT)
+    if snapshot is None:
+        return None
+    if snapshot["version"] != served_version:
+        publish_render("dashboard", snapshot["data"], format_daily_comparison_for_web)
+        publish_data_snapshot(snapshot["data"])
+        served_version = snapshot["version"]
+    return snapshot["data"]
 
 def format_daily_comparison_for_web(daily_data):
     """Convert daily comparison data to HTML for web display"""
@@ -182,6 +208,8 @@ def format_daily_comparison_for_web(daily_data):
         </div>
     """
     
+    html += generate_anomalies_html(daily_data.get('anomalies', []))
+    
     html += f"""
             <!-- Summary Section -->
             <div style="background: #e7f3ff; border-left: 4px solid #0066cc; padding: 25px; margin: 30px 0; border-radius: 0 12px 12px 0;">
@@ -240,9 +268,9 @@ def format_daily_comparison_for_web(daily_data):
 
 @app.route("/")
 def index():
-    global last_daily_data, report_ready
-    if report_ready and last_daily_data:
-        return format_daily_comparison_for_web(last_daily_data)
+    if current_daily_data():
+        # Rendered once per data snapshot; repeat views are served from the cache (or a 304)
+        return cached_response(get_render("dashboard"))
     else:
         return """
         <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; text-align: center; padding: 40px; background: linear-gradient(135deg, #f8f9fa, #e9ecef); border-radius: 12px;">
@@ -275,94 +303,46 @@ def trigger():
         </div>
         """, 403
 
-    global last_daily_data, report_ready
+    # The report is built (and emailed) by a background job; concurrent triggers share one job
+    job, created = submit_report_job(DASHBOARD_ACCOUNT, on_result=publish_report_snapshot)
+    if request.args.get("format") == "json":
+        return jsonify(dict(job, created=created)), 202
     
-    try:
-        print("🚀 Starting Google Ads daily comparison generation...")
+    heading = "🚀 Daily Comparison Generation Started" if created else "⏳ Daily Comparison Already Running"
+    return f"""
+    <div style="font-family: Arial, sans-serif; max-width: 700px; margin: 50px auto; text-align: center; padding: 40px; background: #d1ecf1; border-radius: 12px; border-left: 4px solid #17a2b8;">
+        <h2 style="color: #0c5460;">{heading}</h2>
+        <div style="font-size: 48px; margin: 20px 0;">📅</div>
+        <p style="color: #0c5460; font-size: 16px;">Job <code>{job['id']}</code> — status: <strong id="job-status">{job['status']}</strong></p>
+        <div id="job-stages" style="background: rgba(255,255,255,0.8); padding: 20px; border-radius: 8px; margin: 20px 0; color: #0c5460;"></div>
         
-        # Generate daily comparison data
-        daily_data = fetch_daily_comparison_data()
-        last_daily_data = daily_data
-        report_ready = True
-        
-        print("✅ Daily comparison data generated successfully")
-        print(f"📊 Found {len(daily_data.get('campaigns', {}))} campaigns across {len(daily_data.get('weeks', []))} weeks")
-
-        # Try to send email
-        email_status = "⚠️ Report generated but email not attempted"
-        try:
-            print("📧 Attempting to send daily comparison email...")
-            send_daily_comparison_email(daily_data)
-            email_status = "📧 Daily comparison email sent successfully"
-            print("✅ Email sent successfully")
-        except Exception as email_error:
-            print(f"❌ Email failed: {email_error}")
-            email_status = f"⚠️ Report generated but email failed: {str(email_error)[:50]}..."
-
-        return f"""
-        <div style="font-family: Arial, sans-serif; max-width: 700px; margin: 50px auto; text-align: center; padding: 40px; background: #d4edda; border-radius: 12px; border-left: 4px solid #28a745;">
-            <h2 style="color: #155724;">✅ Daily Comparison Generated Successfully!</h2>
-            <div style="font-size: 48px; margin: 20px 0;">📅</div>
-            <p style="color: #155724; font-size: 16px; margin-bottom: 20px;">{email_status}</p>
-            
-            <div style="background: rgba(255,255,255,0.8); padding: 20px; border-radius: 8px; margin: 20px 0;">
-                <h3 style="color: #155724; margin-top: 0;">📊 Daily Summary</h3>
-                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(140px, 1fr)); gap: 15px; text-align: center;">
-                    <div>
-                        <div style="font-size: 20px; font-weight: bold; color: #155724;">{len(daily_data.get('campaigns', {}))}</div>
-                        <div style="font-size: 12px; color: #155724;">Campaigns</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 20px; font-weight: bold; color: #155724;">{len(daily_data.get('weeks', []))}</div>
-                        <div style="font-size: 12px; color: #155724;">Weeks</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 16px; font-weight: bold; color: #155724;">{daily_data.get('weeks', ['N/A'])[-1] if daily_data.get('weeks') else 'N/A'}</div>
-                        <div style="font-size: 12px; color: #155724;">Start Date</div>
-                    </div>
-                    <div>
-                        <div style="font-size: 16px; font-weight: bold; color: #155724;">{daily_data.get('weeks', ['N/A'])[0] if daily_data.get('weeks') else 'N/A'}</div>
-                        <div style="font-size: 12px; color: #155724;">End Date</div>
-                    </div>
-                </div>
-            </div>
-            
-            <div style="margin-top: 25px;">
-                <a href="/" style="background: #28a745; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">📊 View Daily Comparison</a>
-                <a href="/trigger?key={key}" style="background: #17a2b8; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">🔄 Refresh Again</a>
-            </div>
-        </div>
-        """
-        
-    except Exception as e:
-        error_details = str(e)
-        traceback_str = traceback.format_exc()
-        print(f"❌ Daily comparison generation failed: {error_details}")
-        print(f"🔍 Full traceback: {traceback_str}")
-        
-        return f"""
-        <div style="font-family: Arial, sans-serif; max-width: 700px; margin: 50px auto; text-align: center; padding: 40px; background: #f8d7da; border-radius: 12px; border-left: 4px solid #dc3545;">
-            <h2 style="color: #721c24;">❌ Daily Comparison Generation Failed</h2>
-            <div style="font-size: 48px; margin: 20px 0;">⚠️</div>
-            <p style="color: #721c24; font-size: 16px; margin-bottom: 20px;"><strong>Error:</strong> {error_details}</p>
-            
-            <div style="background: rgba(255,255,255,0.7); padding: 20px; border-radius: 6px; margin: 20px 0; text-align: left;">
-                <h4 style="color: #721c24; margin-top: 0;">🔍 Troubleshooting Steps:</h4>
-                <ol style="color: #721c24; padding-left: 20px;">
-                    <li>Check that your Google Sheets has data for the last 4 weeks</li>
-                    <li>Verify your GOOGLE_CREDENTIALS_B64 environment variable is set</li>
-                    <li>Make sure your sheet has the required columns: Date, Campaign Name, Impressions, Clicks, CTR, Conversions, Search Impression Share, Cost Per Conversion, Cost Micros</li>
-                    <li>Ensure dates are in YYYY-MM-DD format</li>
-                    <li>Check that there's data for multiple weeks</li>
-                </ol>
-            </div>
-            
-            <div style="margin-top: 25px;">
-                <a href="/test-email" style="background: #dc3545; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">📧 Test Email</a>
-                <a href="/" style="background: #6c757d; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">🏠 Home</a>
-            </div>
+        <div style="margin-top: 25px;">
+            <a href="/" style="background: #28a745; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">📊 View Daily Comparison</a>
+            <a href="/jobs/{job['id']}" style="background: #17a2b8; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; font-weight: bold; margin: 0 10px;">🧾 Job Status (JSON)</a>
         </div>
-        """, 500
+    </div>
+    <script>
+        function pollJob() {{
+            fetch("/jobs/{job['id']}").then(r => r.json()).then(job => {{
+                document.getElementById("job-status").textContent = job.status;
+                const stages = Object.entries(job.stages).map(([name, stage]) =>
+                    name + ": " + stage.status + (stage.seconds !== null ? " (" + stage.seconds + "s)" : ""));
+                const summary = Object.entries(job.summary).map(([key, value]) => key + ": " + value);
+                document.getElementById("job-stages").innerHTML = stages.concat(summary, job.error ? ["❌ " + job.error] : []).join("<br>");
+                if (job.status === "queued" || job.status === "running") setTimeout(pollJob, 2000);
+            }});
+        }}
+        pollJob();
+    </script>
+    """, 202
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Status, per-stage progress and timings of a report job"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job)
 
 @app.route("/test-email")
 def test_email():
@@ -397,31 +377,30 @@ def test_email():
 
 @app.route("/api/daily-data")
 def api_daily_data():
-    """API endpoint to get raw daily comparison data as JSON"""
-    global last_daily_data, report_ready
-    if report_ready and last_daily_data:
-        return jsonify(last_daily_data)
-    else:
-        return jsonify({"error": "No daily data available"}), 404
+    """API endpoint for the daily comparison data: JSON (or Arrow) with projection and pagination"""
+    current_daily_data()
+    return data_api_response()
 
 @app.route("/health")
 def health():
     """Health check endpoint"""
-    global last_daily_data, report_ready
+    daily_data = current_daily_data()
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "report_ready": report_ready,
-        "data_available": bool(last_daily_data),
-        "campaigns_count": len(last_daily_data.get('campaigns', {})) if last_daily_data else 0,
-        "weeks_count": len(last_daily_data.get('weeks', [])) if last_daily_data else 0,
+        "report_ready": daily_data is not None,
+        "data_available": bool(daily_data),
+        "campaigns_count": len(daily_data.get('campaigns', {})) if daily_data else 0,
+        "weeks_count": len(daily_data.get('weeks', [])) if daily_data else 0,
+        "snapshot_version": served_version,
         "version": "daily_comparison"
     })
 
-print("🚀 Starting Google Ads Daily Comparison Dashboard...")
-print(f"📊 Dashboard will be available at: http://localhost:{os.environ.get('PORT', 5000)}")
-print(f"🔑 Trigger key: {os.getenv('TRIGGER_KEY', 'supersecret123')}")
-print("📅 New features: 4-week comparison, side-by-side campaign data, trend indicators")
+if __name__ == "__main__":
+    print("🚀 Starting Google Ads Daily Comparison Dashboard...")
+    print(f"📊 Dashboard will be available at: http://localhost:{os.environ.get('PORT', 5000)}")
+    print(f"🔑 Trigger key: {os.getenv('TRIGGER_KEY', 'supersecret123')}")
+    print("📅 New features: 4-week comparison, side-by-side campaign data, trend indicators")
 
-port = int(os.environ.get('PORT', 5000))
-app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
+    port = int(os.environ.get('PORT', 5000))
+    app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
@@ -0,0 +1,311 @@
+"""Offline benchmarks for the report pipeline on synthetic sheet data.
+
+Usage:
+    python benchmark.py numeric [--rows 100000]
+    python benchmark.py parse [--rows 100000]
+    python benchmark.py memory
+    python benchmark.py dates [--rows 100000]
+    python benchmark.py history [--rows 100000]
+    python benchmark.py pipeline [--rows 100000] [--source memory|local] [--path data/local]
+"""
+import argparse
+import datetime
+import random
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from google_ads_api import METRIC_COLUMNS, clean_numeric_column, clean_numeric_value
+
+SHEET_HEADERS = [
+    'Date', 'Campaign name', 'Ad group name', 'Impressions', 'Clicks', 'CTR', 'Conversions',
+    'Search impression share', 'Cost per conversion', 'Cost micros', 'Phone calls'
+]
+
+def synthetic_sheet_rows(rows, campaigns=40, ad_groups=6, days=365, seed=7):
+    """Build a performance tab (header + rows of strings) shaped like the Sheets export"""
+    rng = random.Random(seed)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    campaign_names = [f"Campaign {i:03d} - Search (EN) CY" for i in range(campaigns)]
+    data = [['Daily Ad Group Performance Report'], SHEET_HEADERS]
+
+    for i in range(rows):
+        impressions = rng.randint(0, 25000)
+        clicks = rng.randint(0, max(1, impressions // 20))
+        conversions = rng.choice([0, 0, 0, 1, 2, 3.5])
+        ctr = f"{clicks / impressions * 100:.2f}%" if impressions else '--'
+        share = rng.choice([f"{rng.uniform(10, 100):.2f}%", '--', '< 10%', f"{rng.uniform(10, 99):.1f}%{rng.uniform(10, 99):.1f}%"])
+        cost = rng.uniform(0, 900)
+        data.append([
+            str(start + datetime.timedelta(days=i * days // rows)),
+            campaign_names[rng.randrange(campaigns)],
+            f"Ad group {rng.randrange(ad_groups)}",
+            f"{impressions:,}",
+            str(clicks),
+            ctr,
+            f"{conversions:.2f}",
+            share,
+            f"€{cost / conversions:,.2f}" if conversions else '—',
+            f"{cost:,.2f}",
+            str(rng.choice([0, 0, 0, 1, 2]))
+        ])
+    return data
+
+def synthetic_conversion_rows(rows, layout="luma", campaigns=40, days=30, seed=11):
+    """Build a conversion action tab in the Luma or Keynote column layout"""
+    rng = random.Random(seed)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    actions = ['Contact form', 'Phone call', 'Brochure download']
+    if layout == "keynote":
+        data = [['Daily Ad Group Conversion Action Report Keynote'], ['Date', 'Conversion Action Name', 'Campaign Name', 'Conversions']]
+    else:
+        data = [['Daily Ad Group Conversion Action Report'], ['Date', 'Campaign Name', 'Conversions', 'Conversion Action Name']]
+
+    for i in range(rows):
+        day = str(start + datetime.timedelta(days=i * days // max(rows, 1)))
+        campaign = f"Campaign {rng.randrange(campaigns):03d} - Search (EN) CY"
+        action = rng.choice(actions)
+        conversions = f"{rng.choice([1, 1, 2, 0.5]):.2f}"
+        data.append([day, action, campaign, conversions] if layout == "keynote" else [day, campaign, conversions, action])
+    return data
+
+def synthetic_report_tabs(rows):
+    """Every report tab filled with synthetic rows, keyed by tab name"""
+    from google_ads_api import CONVERSION_SHEET_NAME, KEYNOTE_CONVERSION_SHEET_NAME, KEYNOTE_SHEET_NAME, SHEET_NAME
+
+    return {
+        SHEET_NAME: synthetic_sheet_rows(rows, days=90),
+        CONVERSION_SHEET_NAME: synthetic_conversion_rows(max(rows // 20, 10)),
+        KEYNOTE_SHEET_NAME: synthetic_sheet_rows(rows, days=90, seed=8),
+        KEYNOTE_CONVERSION_SHEET_NAME: synthetic_conversion_rows(max(rows // 20, 10), layout="keynote", seed=12)
+    }
+
+def synthetic_metric_frame(rows):
+    """Synthetic tab after header mapping, with metric columns still raw strings"""
+    from google_ads_api import clean_and_map_columns
+
+    all_data = synthetic_sheet_rows(rows)
+    df = pd.DataFrame(all_data[2:], columns=all_data[1])
+    return clean_and_map_columns(df)
+
+def _timed(func, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def bench_numeric(rows):
+    """Per-cell clean_numeric_value loops vs the vectorized column cleaner"""
+    df = synthetic_metric_frame(rows)
+    print(f"🧪 Numeric cleaning on {len(df):,} rows × {len(METRIC_COLUMNS)} metric columns")
+
+    def per_cell():
+        return {col: [clean_numeric_value(v) for v in df[col]] for col in METRIC_COLUMNS}
+
+    def vectorized():
+        return {col: clean_numeric_column(df[col]).to_numpy() for col in METRIC_COLUMNS}
+
+    loop_seconds, loop_result = _timed(per_cell)
+    vector_seconds, vector_result = _timed(vectorized)
+
+    for col in METRIC_COLUMNS:
+        expected = np.asarray(loop_result[col], dtype='float64')
+        if not np.array_equal(expected, vector_result[col], equal_nan=True):
+            raise AssertionError(f"Vectorized cleaning differs from clean_numeric_value in {col}")
+
+    print(f"   per-cell loop : {loop_seconds * 1000:8.1f} ms")
+    print(f"   vectorized    : {vector_seconds * 1000:8.1f} ms")
+    print(f"   speedup       : {loop_seconds / vector_seconds:8.1f}x (results identical)")
+
+def bench_pipeline(rows, source="memory", path=None):
+    """Whole multi-account pipeline against a memory fixture or replayed local exports"""
+    from google_ads_api import local_data_source, memory_data_source, run_report_pipeline
+
+    if source == "local":
+        data_source = local_data_source(path)
+    else:
+        data_source = memory_data_source(synthetic_report_tabs(rows))
+    print(f"🧪 Report pipeline on the {data_source['name']} data source")
+
+    seconds, results = _timed(lambda: run_report_pipeline(source=data_source), repeat=1)
+    for account_id, result in results.items():
+        if result["error"]:
+            raise AssertionError(f"Pipeline failed for {account_id}: {result['error']}")
+        stages = ", ".join(f"{stage} {value * 1000:.0f} ms" for stage, value in sorted(result["timings"].items()))
+        print(f"   {account_id:<8}: {len(result['data']['campaigns'])} campaigns ({stages})")
+    print(f"   total         : {seconds * 1000:8.1f} ms")
+
+def _peak_memory(func):
+    """Run ``func`` once under tracemalloc, returning (peak traced bytes, result)"""
+    tracemalloc.start()
+    try:
+        result = func()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+def _legacy_parse(all_data):
+    """Row-copy parser that parse_campaign_rows used before the streaming typed parser"""
+    from google_ads_api import clean_and_map_columns, coerce_metric_columns, find_header_row
+
+    header_row_idx = find_header_row(all_data)
+    headers = [col.strip() for col in all_data[header_row_idx]]
+    valid_rows = []
+    for row in all_data[header_row_idx + 1:]:
+        row_padded = row[:len(headers)] if len(row) >= len(headers) else row + [''] * (len(headers) - len(row))
+        if any(cell.strip() for cell in row_padded):
+            valid_rows.append(row_padded)
+    df = pd.DataFrame(valid_rows, columns=headers)
+    return coerce_metric_columns(clean_and_map_columns(df))
+
+def bench_parse(rows):
+    """Peak memory and time of the padded-copy parser vs the streaming typed parser"""
+    import contextlib
+    import io
+
+    from google_ads_api import metric_values, parse_campaign_rows
+
+    all_data = synthetic_sheet_rows(rows)
+    print(f"🧪 Parsing a {len(all_data):,}-row performance tab")
+
+    legacy_seconds, legacy = _timed(lambda: _legacy_parse(all_data))
+    legacy_peak, _ = _peak_memory(lambda: _legacy_parse(all_data))
+    with contextlib.redirect_stdout(io.StringIO()):
+        stream_seconds, streamed = _timed(lambda: parse_campaign_rows(all_data))
+        stream_peak, _ = _peak_memory(lambda: parse_campaign_rows(all_data))
+
+    for col in METRIC_COLUMNS:
+        if not np.array_equal(legacy[col].to_numpy(), metric_values(streamed[col])):
+            raise AssertionError(f"Streaming parser differs from the legacy parser in {col}")
+
+    print(f"   legacy parser   : {legacy_seconds * 1000:8.1f} ms, peak {legacy_peak / 2**20:7.1f} MiB, frame {legacy.memory_usage(deep=True).sum() / 2**20:7.1f} MiB")
+    print(f"   streaming parser: {stream_seconds * 1000:8.1f} ms, peak {stream_peak / 2**20:7.1f} MiB, frame {streamed.memory_usage(deep=True).sum() / 2**20:7.1f} MiB")
+
+def bench_memory(rows=None, campaigns=40, ad_groups=6, days=365):
+    """Per-column memory of a year of daily ad-group data: raw strings vs float64 vs compact"""
+    import contextlib
+    import io
+
+    from google_ads_api import metric_values, parse_campaign_rows
+
+    rows = campaigns * ad_groups * days
+    all_data = synthetic_sheet_rows(rows, campaigns=campaigns, ad_groups=ad_groups, days=days)
+    print(f"🧪 Memory of {rows:,} rows ({campaigns} campaigns × {ad_groups} ad groups × {days} days)")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        compact = parse_campaign_rows(all_data)
+    # Before: one object-dtype Python string per cell; float64: parsed numbers, object text
+    raw = pd.DataFrame(all_data[2:], columns=compact.columns, dtype=object)
+    wide = pd.DataFrame({
+        col: metric_values(compact[col]) if col in METRIC_COLUMNS else compact[col].astype(object)
+        for col in compact.columns if col != 'Date'
+    })
+    wide.insert(0, 'Date', compact['Date'])
+
+    frames = {"raw strings": raw, "float64": wide, "compact": compact}
+    usage = {name: frame.memory_usage(index=False, deep=True) for name, frame in frames.items()}
+    print(f"   {'column':<26}" + "".join(f"{name:>14}" for name in frames) + "   compact dtype")
+    for col in compact.columns:
+        cells = "".join(f"{usage[name][col] / 2**20:11.2f} MiB" for name in frames)
+        print(f"   {col:<26}{cells}   {compact[col].dtype}")
+    totals = "".join(f"{usage[name].sum() / 2**20:11.2f} MiB" for name in frames)
+    print(f"   {'total':<26}{totals}")
+    print(f"   compact is {usage['raw strings'].sum() / usage['compact'].sum():.1f}x smaller than raw strings, "
+          f"{usage['float64'].sum() / usage['compact'].sum():.1f}x smaller than float64")
+
+def bench_dates(rows):
+    """Full-column pd.to_datetime vs unique-value parse_dates on repetitive ad-group dates"""
+    from google_ads_api import parse_dates
+
+    dates = pd.Series([row[0] for row in synthetic_sheet_rows(rows)[2:]], dtype=object)
+    print(f"🧪 Date parsing on {len(dates):,} rows ({dates.nunique():,} distinct dates)")
+
+    schema = {}
+    full_seconds, full = _timed(lambda: pd.to_datetime(dates, errors='coerce'))
+    unique_seconds, unique = _timed(lambda: parse_dates(dates))
+    cached_seconds, cached = _timed(lambda: parse_dates(dates, schema))
+    if not (full.equals(unique) and full.equals(cached)):
+        raise AssertionError("parse_dates differs from pd.to_datetime")
+
+    print(f"   pd.to_datetime       : {full_seconds * 1000:8.1f} ms")
+    print(f"   parse_dates          : {unique_seconds * 1000:8.1f} ms ({full_seconds / unique_seconds:.1f}x)")
+    print(f"   parse_dates (cached) : {cached_seconds * 1000:8.1f} ms ({full_seconds / cached_seconds:.1f}x, format {schema.get('date_format')})")
+
+    parsed_seconds, _ = _timed(lambda: pd.to_datetime(full, errors='coerce'))
+    noop_seconds, _ = _timed(lambda: parse_dates(full))
+    print(f"   re-parse datetime64  : {parsed_seconds * 1000:8.3f} ms with pd.to_datetime, {noop_seconds * 1000:.3f} ms with parse_dates")
+
+def bench_history(rows):
+    """Boolean-mask date-range scans vs searchsorted queries on an indexed campaign history"""
+    import contextlib
+    import io
+
+    from google_ads_api import build_campaign_history, parse_campaign_rows, parse_dates, query_campaign_history
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = parse_campaign_rows(synthetic_sheet_rows(rows))
+    end = pd.Timestamp(datetime.date.today())
+    periods = [
+        (end - pd.Timedelta(days=7), end),
+        (end - pd.Timedelta(days=14), end - pd.Timedelta(days=7)),
+        (end.replace(day=1), end),
+        (end.replace(day=1) - pd.DateOffset(months=1), end - pd.DateOffset(months=1)),
+        (end - pd.Timedelta(days=90), end - pd.Timedelta(days=60))
+    ]
+    campaign = df['Campaign Name'].iloc[0]
+    print(f"🧪 {len(periods)} date-range queries on {len(df):,} rows")
+
+    def scan():
+        results = []
+        for start, stop in periods:
+            dates = parse_dates(df['Date'])
+            in_range = (dates >= start) & (dates <= stop)
+            results.append(df[in_range].assign(Date=dates[in_range]))
+        return results
+
+    build_seconds, history = _timed(lambda: build_campaign_history(df))
+    scan_seconds, scanned = _timed(scan)
+    query_seconds, queried = _timed(lambda: [query_campaign_history(history, start, stop) for start, stop in periods], repeat=50)
+    campaign_seconds, _ = _timed(lambda: [query_campaign_history(history, start, stop, campaign) for start, stop in periods], repeat=50)
+    for expected, got in zip(scanned, queried):
+        if not expected.sort_values('Date', kind='stable').equals(got):
+            raise AssertionError("Indexed history query differs from the boolean-mask scan")
+
+    per_query = len(periods)
+    print(f"   boolean-mask scan   : {scan_seconds / per_query * 1e6:10.1f} µs per query")
+    print(f"   build index (once)  : {build_seconds * 1000:10.1f} ms")
+    print(f"   indexed query       : {query_seconds / per_query * 1e6:10.1f} µs per query ({scan_seconds / query_seconds:.0f}x)")
+    print(f"   + campaign filter   : {campaign_seconds / per_query * 1e6:10.1f} µs per query")
+
+BENCHMARKS = {
+    "numeric": bench_numeric,
+    "dates": bench_dates,
+    "history": bench_history,
+    "parse": bench_parse,
+    "memory": bench_memory,
+    "pipeline": bench_pipeline
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--source", choices=["memory", "local"], default="memory", help="data source for the pipeline benchmark")
+    parser.add_argument("--path", help="local export directory or workbook for --source local")
+    args = parser.parse_args()
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        if name == "pipeline":
+            bench_pipeline(args.rows, source=args.source, path=args.path)
+        else:
+            BENCHMARKS[name](args.rows)
+
+if __name__ == "__main__":
+    main()
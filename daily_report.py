@@ -1,32 +1,70 @@
-﻿from google_ads_api import fetch_daily_comparison_data, fetch_keynote_comparison_data
-from send_report_email import send_daily_comparison_email, send_keynote_comparison_email
+﻿from google_ads_api import REPORT_ACCOUNTS, run_report_pipeline
+from send_report_email import send_account_comparison_email
+from snapshot_store import publish_report_snapshot, read_snapshot, snapshot_published_at
+import datetime
+import os
 import time
 
-def send_all_daily_reports():
-    "Send both Luma and Keynote daily comparison reports"
-    print("🚀 Starting daily reports generation...")
+# Snapshots published within this many minutes are emailed as-is instead of being rebuilt
+REPORT_SNAPSHOT_MAX_AGE_MINUTES = float(os.getenv("REPORT_SNAPSHOT_MAX_AGE_MINUTES", "90"))
+
+def send_account_report(account_id, data):
+    "Send the daily comparison email for one account"
+    account = REPORT_ACCOUNTS[account_id]
+    send_account_comparison_email(data, account["theme"], account["conversions_key"])
+
+def fresh_snapshot_data(account_id, max_age_minutes=None):
+    "Data of the account's published snapshot if it is recent enough to email, else None"
+    max_age_minutes = REPORT_SNAPSHOT_MAX_AGE_MINUTES if max_age_minutes is None else max_age_minutes
+    published = snapshot_published_at(account_id)
+    if published is None or datetime.datetime.now() - published > datetime.timedelta(minutes=max_age_minutes):
+        return None
+    snapshot = read_snapshot(account_id)
+    print(f"♻️ Reusing {account_id} snapshot {snapshot['version']} published {snapshot['published_at']}")
+    return snapshot["data"]
+
+def build_daily_reports(account_ids=None):
+    "Report data per account: fresh published snapshots, and the pipeline for the rest"
+    account_ids = list(account_ids or REPORT_ACCOUNTS)
+    results = {}
+    for account_id in account_ids:
+        data = fresh_snapshot_data(account_id)
+        if data is not None:
+            results[account_id] = {"data": data, "timings": {}, "error": None}
     
-    # Generate and send Luma report
-    try:
-        print("📊 Generating Luma daily comparison...")
-        luma_data = fetch_daily_comparison_data()
-        send_daily_comparison_email(luma_data)
-        print("✅ Luma report sent successfully!")
-    except Exception as e:
-        print(f"❌ Luma report failed: {e}")
+    # Fetch and aggregate the remaining accounts on a bounded worker pool
+    stale = [account_id for account_id in account_ids if account_id not in results]
+    if stale:
+        for account_id, result in run_report_pipeline(stale).items():
+            results[account_id] = result
+            if not result["error"]:
+                try:
+                    publish_report_snapshot(account_id, result["data"])
+                except Exception as e:
+                    print(f"⚠️ {account_id} snapshot not published: {e}")
+    return {account_id: results[account_id] for account_id in account_ids}
+
+def send_all_daily_reports(account_ids=None):
+    "Build (or reuse) every account's daily comparison, then send the reports"
+    print("🚀 Starting daily reports generation...")
     
-    # Wait a bit between emails to avoid rate limiting
-    print("⏱️ Waiting 10 seconds before sending Keynote report...")
-    time.sleep(10)
+    results = build_daily_reports(account_ids)
     
-    # Generate and send Keynote report
-    try:
-        print("📊 Generating Keynote daily comparison...")
-        keynote_data = fetch_keynote_comparison_data()
-        send_keynote_comparison_email(keynote_data)
-        print("✅ Keynote report sent successfully!")
-    except Exception as e:
-        print(f"❌ Keynote report failed: {e}")
+    for i, (account_id, result) in enumerate(results.items()):
+        if i > 0:
+            # Wait a bit between emails to avoid rate limiting
+            print("⏱️ Waiting 10 seconds before sending the next report...")
+            time.sleep(10)
+        
+        theme = REPORT_ACCOUNTS[account_id]["theme"]
+        try:
+            if result["error"]:
+                raise RuntimeError(result["error"])
+            print(f"📊 Sending {theme} daily comparison...")
+            send_account_report(account_id, result["data"])
+            print(f"✅ {theme} report sent successfully!")
+        except Exception as e:
+            print(f"❌ {theme} report failed: {e}")
     
     print("🎉 All daily reports processing completed!")
 
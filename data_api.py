@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from flask import jsonify, request
+from render_cache import encode_render, cached_response
+from report_json import content_version, dumps, loads
+import base64
+import bisect
+import hashlib
+import json
+import threading
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Largest page of campaigns one request may ask for
+DATA_API_MAX_LIMIT = 1000
+# Projected / paginated responses cached per snapshot (least recently used are dropped)
+DATA_API_CACHE_SIZE = 64
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+_data_lock = threading.Lock()
+_snapshot = None
+_responses = OrderedDict()
+
+def publish_data_snapshot(data):
+    """Serialize a new data snapshot once; every later request projects the parsed copy.
+
+    The snapshot version is a content hash (see ``content_version``), so it changes
+    exactly when the data does, and cached responses of the previous snapshot are dropped.
+    """
+    global _snapshot
+    body = dumps(data)
+    version = content_version(data)
+    plain = loads(body)
+    snapshot = {
+        "version": version,
+        "data": plain,
+        "campaign_names": sorted(plain.get("campaigns", {})),
+        "full": encode_render(version, body, "application/json")
+    }
+    with _data_lock:
+        _snapshot = snapshot
+        _responses.clear()
+    print(f"🗂️ Published data snapshot {version} ({len(body):,} bytes)")
+    return version
+
+def encode_cursor(campaign):
+    """Opaque cursor resuming after ``campaign``: URL-safe base64 of a JSON string"""
+    return base64.urlsafe_b64encode(json.dumps(campaign).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    """Campaign name held by a cursor from ``encode_cursor`` (raises ValueError if malformed)"""
+    try:
+        payload = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True)
+        campaign = json.loads(payload.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(campaign, str) or not campaign:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return campaign
+
+def _list_arg(args, name):
+    values = [value.strip() for value in args.get(name, "").split(",") if value.strip()]
+    return tuple(sorted(set(values))) or None
+
+def parse_data_query(args):
+    """Normalized projection / pagination query from request args (raises ValueError)"""
+    limit = args.get("limit")
+    if limit is not None:
+        if not limit.isdigit() or not 1 <= int(limit) <= DATA_API_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {DATA_API_MAX_LIMIT}")
+        limit = int(limit)
+    cursor = args.get("cursor")
+    data_format = args.get("format", "json")
+    if data_format not in ("json", "arrow"):
+        raise ValueError(f"Unknown format: {data_format}")
+    return {
+        "fields": _list_arg(args, "fields"),
+        "campaigns": _list_arg(args, "campaigns"),
+        "weeks": _list_arg(args, "weeks"),
+        "after": decode_cursor(cursor) if cursor is not None else None,
+        "limit": limit,
+        "format": data_format
+    }
+
+def project_snapshot(snapshot, query):
+    """Apply ``fields`` / ``campaigns`` / ``weeks`` filters and cursor pagination to a snapshot.
+
+    Campaigns are paged in name order; with a ``limit`` the result carries
+    ``next_cursor`` (None on the last page), which resumes after the page's last name.
+    """
+    data = snapshot["data"]
+    result = {key: value for key, value in data.items() if not query["fields"] or key in query["fields"]}
+    weeks = set(query["weeks"] or ())
+
+    if "campaigns" in result:
+        names = snapshot["campaign_names"]
+        if query["after"] is not None:
+            names = names[bisect.bisect_right(names, query["after"]):]
+        if query["campaigns"]:
+            wanted = set(query["campaigns"])
+            names = [name for name in names if name in wanted]
+        page = names[:query["limit"]] if query["limit"] else names
+        result["campaigns"] = {
+            name: {week: metrics for week, metrics in data["campaigns"][name].items() if week in weeks} if weeks else data["campaigns"][name]
+            for name in page
+        }
+        if query["limit"]:
+            result["next_cursor"] = encode_cursor(page[-1]) if len(names) > len(page) else None
+    if weeks and "weeks" in result:
+        result["weeks"] = [week for week in result["weeks"] if week in weeks]
+    return result
+
+def arrow_body(result):
+    """Campaign x week metrics of a projected result as an Arrow IPC stream (one row per pair)"""
+    rows = [
+        dict(metrics, campaign=campaign, week=week)
+        for campaign, campaign_weeks in result.get("campaigns", {}).items()
+        for week, metrics in campaign_weeks.items()
+    ]
+    table = pa.Table.from_pylist(rows) if rows else pa.table({"campaign": pa.array([], pa.string()), "week": pa.array([], pa.string())})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def data_api_response():
+    """Response for /api/daily-data: full snapshot, or a cached projection of it"""
+    with _data_lock:
+        snapshot = _snapshot
+    if snapshot is None:
+        return jsonify({"error": "No daily data available"}), 404
+    try:
+        query = parse_data_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if query["format"] == "arrow" and pa is None:
+        return jsonify({"error": "Arrow format needs pyarrow installed"}), 406
+
+    if not any(query[key] for key in ("fields", "campaigns", "weeks", "after", "limit")) and query["format"] == "json":
+        return cached_response(snapshot["full"])
+
+    key = json.dumps(query, sort_keys=True)
+    with _data_lock:
+        entry = _responses.get(key) if _snapshot is snapshot else None
+        if entry:
+            _responses.move_to_end(key)
+    if entry is None:
+        result = project_snapshot(snapshot, query)
+        if query["format"] == "arrow":
+            body, mimetype = arrow_body(result), ARROW_MIMETYPE
+        else:
+            body, mimetype = dumps(result), "application/json"
+        version = hashlib.sha256(f"{snapshot['version']}:{key}".encode("utf-8")).hexdigest()[:20]
+        entry = encode_render(version, body, mimetype, dynamic=True)
+        if "next_cursor" in result:
+            # Arrow bodies are plain tables, so the cursor also travels as a header
+            entry["headers"] = {"X-Next-Cursor": result["next_cursor"] or ""}
+        with _data_lock:
+            if _snapshot is snapshot:
+                _responses[key] = entry
+                while len(_responses) > DATA_API_CACHE_SIZE:
+                    _responses.popitem(last=False)
+
+    return cached_response(entry)
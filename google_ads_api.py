@@ -1,90 +1,1359 @@
 import os
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import datetime
 import gspread
+import ast
+import asyncio
 import base64
+import contextlib
+import hashlib
+import itertools
 import json
+import random
+import re
+import threading
+import time
+import weakref
 from oauth2client.service_account import ServiceAccountCredentials
 
+try:
+    import aiohttp
+except ImportError:  # Optional: without it, async reads run gspread calls on worker threads
+    aiohttp = None
+
 DATA_DIR = "data"
 SHEET_ID = "1rBjY6_AeDIG-1UEp3JvA44CKLAqn3JAGFttixkcRaKg"
 SHEET_NAME = "Daily Ad Group Performance Report"
 CONVERSION_SHEET_NAME = "Daily Ad Group Conversion Action Report"
+KEYNOTE_SHEET_NAME = "Daily Ad Group Performance Report Keynote"
+KEYNOTE_CONVERSION_SHEET_NAME = "Daily Ad Group Conversion Action Report Keynote"
+
+# Every tab the daily reports read, fetched together in one values:batchGet
+REPORT_TABS = [SHEET_NAME, CONVERSION_SHEET_NAME, KEYNOTE_SHEET_NAME, KEYNOTE_CONVERSION_SHEET_NAME]
+
+# Incremental sync of append-only tabs ("full" re-downloads every tab on every run)
+SHEETS_SYNC_MODE = os.getenv("SHEETS_SYNC_MODE", "full")
+APPEND_ONLY_TABS = [SHEET_NAME, KEYNOTE_SHEET_NAME]
+SYNC_DIR = os.path.join(DATA_DIR, "sync")
+SHEET_LAST_COLUMN = "ZZ"
+# Date-window pushdown for date-sorted tabs: rows inside the window are located through a
+# cached row index, or batched k-ary search probes on column A when there is no index yet
+WINDOW_PROBES_PER_ROUND = 16
+WINDOW_PROBE_SPAN = 500
+WINDOW_PREAMBLE_MAX_ROWS = 10
+_sync_lock = threading.Lock()
+_tab_sync_locks = {}
+
+# Metric columns converted to float arrays once, right after column mapping
+METRIC_COLUMNS = [
+    'Impressions', 'Clicks', 'Ctr', 'Conversions',
+    'Search Impression Share', 'Cost Per Conversion', 'Cost Micros', 'Phone Calls'
+]
+_EMPTY_NUMERIC_VALUES = ['', '--', '—']
+_NUMERIC_FORMATTING = r'[,%€$]'
+# Strings pd.to_datetime treats as missing when inferring a date format
+_NAT_STRINGS = {'', 'NaT', 'nat', 'NAT', 'nan', 'NaN', 'NAN'}
+_PLAIN_NUMBER = r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+# Compact storage of parsed metric columns (see compact_campaign_frame): counts as int32,
+# rates as float32 and costs as int64 micros, each only where the values round-trip exactly
+COUNT_COLUMNS = ['Impressions', 'Clicks', 'Phone Calls']
+RATE_COLUMNS = ['Ctr', 'Search Impression Share']
+MICROS_COLUMNS = ['Cost Micros', 'Cost Per Conversion']
+MICROS_PER_UNIT = 1_000_000
+COMPACT_RATE_DECIMALS = 4
+# Rows the streaming parser buffers before converting them into typed columns
+PARSE_CHUNK_ROWS = 50_000
+
+# Sheet header spellings -> canonical column names
+COLUMN_MAPPING = {
+    'Date': 'Date',
+    'Campaign name': 'Campaign Name',
+    'Campaign Name': 'Campaign Name',
+    'Impressions': 'Impressions',
+    'Clicks': 'Clicks',
+    'Ctr': 'Ctr',
+    'CTR': 'Ctr',
+    'Click-through rate': 'Ctr',
+    'Conversions': 'Conversions',
+    'Conv.': 'Conversions',
+    'Search impression share': 'Search Impression Share',
+    'Search Impression Share': 'Search Impression Share',
+    'Impr. share': 'Search Impression Share',
+    'Cost per conversion': 'Cost Per Conversion',
+    'Cost Per Conversion': 'Cost Per Conversion',
+    'Cost/conv.': 'Cost Per Conversion',
+    'Cost micros': 'Cost Micros',
+    'Cost Micros': 'Cost Micros',
+    'Phone calls': 'Phone Calls',
+    'Phone Calls': 'Phone Calls'
+}
+
+# Resolved tab layouts (header row, data start, column names), keyed by a fingerprint
+# of the rows above the data so detection only re-runs when a tab's header changes
+SCHEMA_REGISTRY_SIZE = 8
+SCHEMA_CACHE_STATS = {"hits": 0, "misses": 0}
+_schema_lock = threading.Lock()
+_schema_registry = {}
+
+# Weekly comparison metrics: (output key, source column, aggregation)
+# "sum" totals every row; "mean" averages only the positive values, like safe_numeric_mean
+WEEKLY_METRICS = [
+    ('impressions', 'Impressions', 'sum'),
+    ('clicks', 'Clicks', 'sum'),
+    ('ctr', 'Ctr', 'mean'),
+    ('conversions', 'Conversions', 'sum'),
+    ('search_impression_share', 'Search Impression Share', 'mean'),
+    ('cost_per_conversion', 'Cost Per Conversion', 'mean'),
+    ('cost_micros', 'Cost Micros', 'sum'),
+    ('phone_calls', 'Phone Calls', 'sum')
+]
+# Summed metrics reported with 2 decimals instead of truncated to int
+DECIMAL_SUM_METRICS = {'cost_micros'}
+
+# Derived KPIs: name -> expression over base metrics (WEEKLY_METRICS keys) or other KPIs.
+# Division is safe (x / 0 gives 0); where(cond, a, b), abs, min and max work element-wise
+KPI_EXPRESSIONS = {
+    'CTR_calc': 'clicks / impressions * 100',
+    'CPC': 'cost_micros / clicks',
+    'Conversion_Rate': 'conversions / clicks * 100',
+    'CPA': 'cost_micros / conversions',
+    'Impression_Share_Lost': 'where(search_impression_share > 0, 100 - search_impression_share, 0)'
+}
+_compiled_kpis = {}
+
+# KPIs compared across periods: (key, label, numerator column, denominator column, scale).
+# Ratio KPIs are recomputed from each period's summed columns, not averaged per row
+COMPARISON_KPIS = [
+    ('impressions', 'Impressions', 'Impressions', None, 1),
+    ('clicks', 'Clicks', 'Clicks', None, 1),
+    ('conversions', 'Conversions', 'Conversions', None, 1),
+    ('cost', 'Cost', 'Cost Micros', None, 1),
+    ('ctr', 'CTR', 'Clicks', 'Impressions', 100),
+    ('cpc', 'CPC', 'Cost Micros', 'Clicks', 1),
+    ('conversion_rate', 'Conversion Rate', 'Conversions', 'Clicks', 100)
+]
+# Campaigns below this many impressions in both periods are left out of the movers ranking
+MOVER_MIN_IMPRESSIONS = 100
+INSIGHT_TOP_MOVERS = 10
+
+# Anomaly detection: robust z-scores of each campaign's last few days against the
+# median/MAD of the baseline days before them
+ANOMALY_BASELINE_DAYS = 28
+ANOMALY_LOOKBACK_DAYS = 3
+ANOMALY_Z_THRESHOLD = 3.5
+ANOMALY_MIN_SPEND = 10.0
+# (kind, daily metric, direction, label): fires when the z-score passes the threshold that way
+ANOMALY_RULES = [
+    ('spend_spike', 'cost', 1, 'Spend spike'),
+    ('ctr_collapse', 'ctr', -1, 'CTR collapse'),
+    ('conversion_drop', 'conversions', -1, 'Conversion drop')
+]
+
+
+# Local columnar snapshots of parsed tabs, revalidated against Drive modifiedTime
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+SNAPSHOT_CACHE_ENABLED = os.getenv("SNAPSHOT_CACHE", "1") != "0"
+SNAPSHOT_TTL_SECONDS = int(os.getenv("SNAPSHOT_TTL_SECONDS", "300"))
+# modifiedTime is per spreadsheet, so one lookup serves every tab checked within this window
+SNAPSHOT_METADATA_MEMO_SECONDS = 10
+SNAPSHOT_CACHE_STATS = {"hits": 0, "stale_hits": 0, "misses": 0, "load_seconds": 0.0, "save_seconds": 0.0}
+_modified_time_memo = {}
+
+# Where report tabs are read from: "sheets" (live API), "local" (CSV/XLSX exports) or "memory"
+DATA_SOURCE = os.getenv("DATA_SOURCE", "sheets")
+LOCAL_DATA_PATH = os.getenv("LOCAL_DATA_PATH", os.path.join(DATA_DIR, "local"))
+_data_source = None
+
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+# Refresh the OAuth token this long before it actually expires
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
+
+# Process-wide Sheets client, shared by every fetch in this module
+_sheets_lock = threading.RLock()
+_sheets_client = None
+_spreadsheet_cache = {}
+_worksheet_cache = {}
+SHEETS_API_STATS = {
+    "authorizations": 0,     # service account -> gspread client handshakes
+    "token_refreshes": 0,    # explicit near-expiry token refreshes
+    "metadata_calls": 0,     # open_by_key / worksheet lookups that hit the API
+    "metadata_cache_hits": 0,
+    "values_calls": 0        # values:get / values:batchGet requests
+}
+
+# Async Sheets reads: REST endpoint, requests in flight per event loop, per-request timeout
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+SHEETS_ASYNC_CONCURRENCY = int(os.getenv("SHEETS_ASYNC_CONCURRENCY", "8"))
+SHEETS_REQUEST_TIMEOUT_SECONDS = 60
+TAB_LOCK_POLL_SECONDS = 0.05
+_async_loop_state = weakref.WeakKeyDictionary()
+
+# Sheets read quota: one token bucket shared by every call (requests per minute per user),
+# plus jittered exponential backoff for rate-limit and server errors
+SHEETS_READ_QUOTA_PER_MINUTE = int(os.getenv("SHEETS_READ_QUOTA_PER_MINUTE", "60"))
+SHEETS_RATE_BURST = int(os.getenv("SHEETS_RATE_BURST", "10"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_BACKOFF_BASE_SECONDS = 1.0
+SHEETS_BACKOFF_MAX_SECONDS = 32.0
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+_rate_lock = threading.Lock()
+_rate_bucket = {"tokens": float(SHEETS_RATE_BURST), "updated": None, "rate": SHEETS_READ_QUOTA_PER_MINUTE / 60}
+SHEETS_RATE_STATS = {
+    "requests": 0,               # calls that took a token from the bucket
+    "throttled": 0,              # calls that had to queue for a token
+    "queue_wait_seconds": 0.0,
+    "max_queue_wait_seconds": 0.0,
+    "retries": 0,
+    "backoff_seconds": 0.0,
+    "rate_limited": 0,           # 429 responses
+    "server_errors": 0,          # 5xx responses
+    "exhausted": 0               # calls that still failed after SHEETS_MAX_RETRIES
+}
+
+class SheetsApiError(Exception):
+    """Sheets API error response, or a rate-limit/server error that outlived every retry"""
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message[:200]}")
+        self.status = status
+
+def _reserve_sheets_request():
+    """Take a token from the shared bucket, returning how long the caller must wait for it"""
+    with _rate_lock:
+        now = time.monotonic()
+        bucket = _rate_bucket
+        if bucket["updated"] is not None:
+            bucket["tokens"] = min(float(SHEETS_RATE_BURST), bucket["tokens"] + (now - bucket["updated"]) * bucket["rate"])
+        bucket["updated"] = now
+        # Tokens may go negative: each queued caller waits for its own slot, in arrival order
+        bucket["tokens"] -= 1
+        wait = max(0.0, -bucket["tokens"] / bucket["rate"])
+        SHEETS_RATE_STATS["requests"] += 1
+        if wait:
+            SHEETS_RATE_STATS["throttled"] += 1
+            SHEETS_RATE_STATS["queue_wait_seconds"] += wait
+            SHEETS_RATE_STATS["max_queue_wait_seconds"] = max(SHEETS_RATE_STATS["max_queue_wait_seconds"], wait)
+        return wait
+
+def _sheets_error_status(error):
+    """HTTP status of a gspread or REST Sheets error, if it carries one"""
+    if isinstance(error, SheetsApiError):
+        return error.status
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) or getattr(error, "code", None)
+
+def _record_sheets_success():
+    """Let the bucket creep back to the configured quota after a rate-limit slowdown"""
+    with _rate_lock:
+        full_rate = SHEETS_READ_QUOTA_PER_MINUTE / 60
+        _rate_bucket["rate"] = min(full_rate, _rate_bucket["rate"] + full_rate / 20)
+
+def _retry_delay(error, attempt):
+    """Jittered backoff before retrying ``error``, or raise when it is not worth retrying"""
+    status = _sheets_error_status(error)
+    if status not in RETRYABLE_STATUSES:
+        raise error
+    with _rate_lock:
+        if status == 429:
+            # Google says we are over quota - halve our request rate until calls succeed again
+            SHEETS_RATE_STATS["rate_limited"] += 1
+            full_rate = SHEETS_READ_QUOTA_PER_MINUTE / 60
+            _rate_bucket["rate"] = max(full_rate / 8, _rate_bucket["rate"] / 2)
+        else:
+            SHEETS_RATE_STATS["server_errors"] += 1
+        if attempt >= SHEETS_MAX_RETRIES:
+            SHEETS_RATE_STATS["exhausted"] += 1
+            raise SheetsApiError(status, f"giving up after {attempt} retries: {error}") from error
+        delay = min(SHEETS_BACKOFF_MAX_SECONDS, SHEETS_BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+        SHEETS_RATE_STATS["retries"] += 1
+        SHEETS_RATE_STATS["backoff_seconds"] += delay
+    print(f"⏳ Sheets API returned {status}, retry {attempt + 1}/{SHEETS_MAX_RETRIES} in {delay:.1f}s")
+    return delay
+
+def call_sheets_api(func, *args, **kwargs):
+    """Run one Sheets API call under the shared rate limiter, retrying 429/5xx with backoff"""
+    for attempt in itertools.count():
+        wait = _reserve_sheets_request()
+        if wait:
+            time.sleep(wait)
+        try:
+            result = func(*args, **kwargs)
+        except (gspread.exceptions.APIError, SheetsApiError) as e:
+            time.sleep(_retry_delay(e, attempt))
+            continue
+        _record_sheets_success()
+        return result
+
+async def call_sheets_api_async(make_call):
+    """Async ``call_sheets_api``; ``make_call`` returns a fresh awaitable for each attempt"""
+    for attempt in itertools.count():
+        wait = _reserve_sheets_request()
+        if wait:
+            await asyncio.sleep(wait)
+        try:
+            result = await make_call()
+        except (gspread.exceptions.APIError, SheetsApiError) as e:
+            await asyncio.sleep(_retry_delay(e, attempt))
+            continue
+        _record_sheets_success()
+        return result
+
+def get_sheets_rate_stats():
+    """Return the limiter counters (queue waits, retries) plus the current request rate"""
+    with _rate_lock:
+        stats = dict(SHEETS_RATE_STATS)
+        stats["requests_per_minute"] = _rate_bucket["rate"] * 60
+    stats["avg_queue_wait_seconds"] = stats["queue_wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+    return stats
+
+def _load_service_account_credentials():
+    """Build service account credentials from GOOGLE_CREDENTIALS_B64"""
+    b64_key = os.getenv("GOOGLE_CREDENTIALS_B64")
+    if not b64_key:
+        raise ValueError("Missing GOOGLE_CREDENTIALS_B64 environment variable")
+
+    key_data = base64.b64decode(b64_key).decode("utf-8")
+    creds_dict = json.loads(key_data)
+    return ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SHEETS_SCOPE)
+
+def _client_credentials(client):
+    """Return the credentials object held by a gspread client"""
+    http_client = getattr(client, "http_client", client)
+    return getattr(http_client, "auth", None)
+
+def _refresh_token_if_needed(client):
+    """Refresh the client's access token only when it is close to expiring"""
+    creds = _client_credentials(client)
+    expiry = getattr(creds, "expiry", None) or getattr(creds, "token_expiry", None)
+    if creds is None or expiry is None:
+        # No token issued yet - the authorized session fetches one on first use
+        return False
+    if expiry - datetime.datetime.utcnow() > TOKEN_REFRESH_MARGIN:
+        return False
+
+    if hasattr(creds, "token_expiry"):
+        import httplib2
+        creds.refresh(httplib2.Http())
+    else:
+        from google.auth.transport.requests import Request
+        creds.refresh(Request())
+    SHEETS_API_STATS["token_refreshes"] += 1
+    print("🔑 Refreshed Google Sheets access token")
+    return True
+
+def get_sheets_client():
+    """Return the shared authorized gspread client, authorizing once per process"""
+    global _sheets_client
+    with _sheets_lock:
+        if _sheets_client is None:
+            creds = _load_service_account_credentials()
+            _sheets_client = gspread.authorize(creds)
+            SHEETS_API_STATS["authorizations"] += 1
+            print("🔑 Authorized Google Sheets client")
+        else:
+            _refresh_token_if_needed(_sheets_client)
+        return _sheets_client
+
+def get_spreadsheet(sheet_id=SHEET_ID):
+    """Return a cached spreadsheet handle, opening it on first use"""
+    with _sheets_lock:
+        spreadsheet = _spreadsheet_cache.get(sheet_id)
+        if spreadsheet is not None:
+            SHEETS_API_STATS["metadata_cache_hits"] += 1
+            return spreadsheet
+
+    # The call may wait on the rate limiter and back off, so it runs outside the lock;
+    # if two threads race to open the same sheet, the first handle stored wins
+    spreadsheet = call_sheets_api(get_sheets_client().open_by_key, sheet_id)
+    with _sheets_lock:
+        SHEETS_API_STATS["metadata_calls"] += 1
+        return _spreadsheet_cache.setdefault(sheet_id, spreadsheet)
+
+def get_worksheet(sheet_name, sheet_id=SHEET_ID):
+    """Return a cached worksheet handle for a tab of the given spreadsheet"""
+    key = (sheet_id, sheet_name)
+    with _sheets_lock:
+        worksheet = _worksheet_cache.get(key)
+        if worksheet is not None:
+            SHEETS_API_STATS["metadata_cache_hits"] += 1
+    if worksheet is not None:
+        # Keep the token fresh even when every handle is cached
+        get_sheets_client()
+        return worksheet
+
+    worksheet = call_sheets_api(get_spreadsheet(sheet_id).worksheet, sheet_name)
+    with _sheets_lock:
+        SHEETS_API_STATS["metadata_calls"] += 1
+        return _worksheet_cache.setdefault(key, worksheet)
+
+def reset_sheets_client():
+    """Drop the shared client and every cached spreadsheet/worksheet handle"""
+    global _sheets_client
+    with _sheets_lock:
+        _sheets_client = None
+        _spreadsheet_cache.clear()
+        _worksheet_cache.clear()
+
+def get_sheets_api_stats():
+    """Return a snapshot of the Sheets auth and metadata round-trip counters"""
+    with _sheets_lock:
+        return dict(SHEETS_API_STATS)
+
+def a1_range(sheet_name, cell_range=None):
+    """Build an A1 range for a tab, quoting the tab name as the Sheets API expects"""
+    quoted = "'" + sheet_name.replace("'", "''") + "'"
+    return f"{quoted}!{cell_range}" if cell_range else quoted
+
+def _pad_rows(rows):
+    """Pad ragged API rows to a rectangle, like Worksheet.get_all_values() does"""
+    width = max((len(row) for row in rows), default=0)
+    return [row + [''] * (width - len(row)) if len(row) < width else row for row in rows]
+
+def _async_state():
+    """Per-event-loop HTTP session and concurrency semaphore for async Sheets reads"""
+    loop = asyncio.get_running_loop()
+    state = _async_loop_state.get(loop)
+    if state is None:
+        state = {"session": None, "semaphore": asyncio.Semaphore(max(1, SHEETS_ASYNC_CONCURRENCY))}
+        _async_loop_state[loop] = state
+    return state
+
+async def close_sheets_session():
+    """Close the HTTP session of the running event loop (reopened on the next async read)"""
+    state = _async_loop_state.get(asyncio.get_running_loop())
+    if state and state["session"] is not None:
+        await state["session"].close()
+        state["session"] = None
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code, closing its loop's HTTP session"""
+    async def run():
+        try:
+            return await coro
+        finally:
+            await close_sheets_session()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run())
+    # Called from inside an event loop (e.g. a notebook) - run on a private loop in a worker thread
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, run()).result()
+
+def _sheets_access_token():
+    """Current OAuth access token of the shared client, refreshed when close to expiring"""
+    with _sheets_lock:
+        creds = _client_credentials(get_sheets_client())
+        if hasattr(creds, "get_access_token"):
+            # oauth2client credentials issue (and refresh) their token on demand
+            return creds.get_access_token().access_token
+        if not getattr(creds, "valid", False):
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+        return creds.token
+
+async def _request_values_batch(request_ranges, sheet_id):
+    """One values:batchGet call: REST over aiohttp when installed, else gspread on a worker thread"""
+    if aiohttp is None:
+        async with _async_state()["semaphore"]:
+            return await asyncio.to_thread(lambda: get_spreadsheet(sheet_id).values_batch_get(request_ranges))
+
+    state = _async_state()
+    if state["session"] is None:
+        state["session"] = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=SHEETS_REQUEST_TIMEOUT_SECONDS))
+    token = await asyncio.to_thread(_sheets_access_token)
+    url = f"{SHEETS_API_URL}/{sheet_id}/values:batchGet"
+    params = [("ranges", r) for r in request_ranges]
+    async with state["semaphore"]:
+        async with state["session"].get(url, params=params, headers={"Authorization": f"Bearer {token}"}) as response:
+            if response.status != 200:
+                raise SheetsApiError(response.status, await response.text())
+            return await response.json()
+
+async def batch_get_tab_values_async(ranges, sheet_id=SHEET_ID):
+    """Async ``batch_get_tab_values``; concurrent calls share at most SHEETS_ASYNC_CONCURRENCY requests"""
+    ranges = list(ranges)
+    if not ranges:
+        return {}
+
+    request_ranges = [r if '!' in r else a1_range(r) for r in ranges]
+    try:
+        response = await call_sheets_api_async(lambda: _request_values_batch(request_ranges, sheet_id))
+        with _sheets_lock:
+            SHEETS_API_STATS["values_calls"] += 1
+    except (gspread.exceptions.APIError, SheetsApiError) as e:
+        if _sheets_error_status(e) in RETRYABLE_STATUSES:
+            # Still over quota (or the API is down) after every retry - not a missing tab
+            raise
+        # One missing tab fails the whole batch - retry tab by tab so the rest still load
+        if len(ranges) == 1:
+            print(f"❌ Could not fetch range {ranges[0]}: {e}")
+            return {ranges[0]: None}
+        print(f"⚠️ Batch fetch failed ({e}), fetching {len(ranges)} ranges individually")
+        results = {}
+        for result in await asyncio.gather(*(batch_get_tab_values_async([r], sheet_id=sheet_id) for r in ranges)):
+            results.update(result)
+        return results
+
+    value_ranges = response.get('valueRanges', [])
+    results = {}
+    for requested, value_range in zip(ranges, value_ranges):
+        results[requested] = _pad_rows(value_range.get('values', []))
+    print(f"📦 Batch fetched {len(results)} ranges in one request: {[len(v) for v in results.values()]} rows")
+    return results
+
+def batch_get_tab_values(ranges, sheet_id=SHEET_ID):
+    """Fetch several tabs (or A1 ranges) in a single values:batchGet round trip.
+
+    ``ranges`` is a list of tab names or ``a1_range()`` strings. Returns a dict
+    mapping each requested range to its rows; a tab that does not exist maps to None.
+    """
+    return _run_sync(batch_get_tab_values_async(ranges, sheet_id=sheet_id))
+
+@contextlib.asynccontextmanager
+async def _hold_tab_locks(keys):
+    """Hold the sync locks of several tabs without blocking the event loop while waiting"""
+    held = []
+    try:
+        for sheet_id, tab in sorted(keys):
+            lock = _tab_sync_lock(sheet_id, tab)
+            while not lock.acquire(blocking=False):
+                await asyncio.sleep(TAB_LOCK_POLL_SECONDS)
+            held.append(lock)
+        yield
+    finally:
+        for lock in reversed(held):
+            lock.release()
+
+async def fetch_report_tabs_async(tab_names=None, sheet_id=SHEET_ID, sync_mode=None, windows=None):
+    """Async ``fetch_report_tabs``: every tab of the spreadsheet in one batchGet request.
+
+    One spreadsheet is always a single round trip; gather several calls (e.g. one per
+    account) on one loop to fetch every spreadsheet concurrently.
+    """
+    tab_names = list(tab_names or REPORT_TABS)
+    sync_mode = sync_mode or SHEETS_SYNC_MODE
+    windows = {tab: days for tab, days in (windows or {}).items() if tab in tab_names}
+    if sync_mode != "incremental" and not windows:
+        fetched = await batch_get_tab_values_async(tab_names, sheet_id=sheet_id)
+        return {tab: fetched.get(tab) for tab in tab_names}
+
+    synced = set(APPEND_ONLY_TABS) - set(windows) if sync_mode == "incremental" else set()
+    # Lock only the tabs being synced, so accounts on other tabs fetch in parallel
+    async with _hold_tab_locks({(sheet_id, tab) for tab in (set(tab_names) & synced) | set(windows)}):
+        def plan_tab(tab):
+            if tab in windows:
+                return _plan_window_fetch(tab, windows[tab], sheet_id)
+            return _plan_tab_sync(tab, sheet_id) if tab in synced else None
+
+        # Planning reads local state and may probe the sheet - keep it off the event loop
+        plans = await asyncio.to_thread(lambda: {tab: plan for tab in tab_names if (plan := plan_tab(tab))})
+        # Combine every tab's ranges (plans and full tabs) into one batchGet for this sheet
+        ranges = [r for tab in tab_names for r in (plans[tab]["ranges"] if tab in plans else [tab])]
+        fetched = await batch_get_tab_values_async(list(dict.fromkeys(ranges)), sheet_id=sheet_id)
+
+        def finish_tab(tab):
+            if tab in plans:
+                apply_plan = _apply_window_fetch if tab in windows else _apply_tab_sync
+                return apply_plan(plans[tab], fetched)
+            rows = fetched.get(tab)
+            if tab in windows and rows is not None:
+                # No usable index yet - index the full tab so the next fetch is windowed
+                _save_window_index(sheet_id, tab, rows, windows[tab])
+            elif tab in synced and rows is not None:
+                # First sync (or a detected rewrite) - store the full tab as the new baseline
+                _save_sync_state(_sync_state_path(sheet_id, tab), _build_sync_state(sheet_id, tab, rows))
+            return rows
+
+        return await asyncio.to_thread(lambda: {tab: finish_tab(tab) for tab in tab_names})
+
+def fetch_report_tabs(tab_names=None, sheet_id=SHEET_ID, sync_mode=None, windows=None):
+    """Fetch all report tabs (Luma + Keynote performance and conversions) concurrently
+
+    In incremental sync mode, append-only tabs only request the rows added since the
+    last run (see ``sync_tab_rows``). ``windows`` maps date-sorted tabs to a number of
+    days: only their header rows and the rows dated inside that window are requested
+    (see ``fetch_tab_window``). Thin wrapper over ``fetch_report_tabs_async``.
+    """
+    return _run_sync(fetch_report_tabs_async(tab_names, sheet_id=sheet_id, sync_mode=sync_mode, windows=windows))
+
+def fetch_tab_window(sheet_name, days, sheet_id=SHEET_ID):
+    """Return a date-sorted tab's header rows plus only the rows from the last ``days`` days"""
+    return fetch_report_tabs([sheet_name], sheet_id=sheet_id, sync_mode="full", windows={sheet_name: days}).get(sheet_name)
+
+def sync_tab_rows(sheet_name, sheet_id=SHEET_ID):
+    """Return every row of an append-only tab, downloading only rows added since the last sync"""
+    return fetch_report_tabs([sheet_name], sheet_id=sheet_id, sync_mode="incremental").get(sheet_name)
+
+def _tab_sync_lock(sheet_id, sheet_name):
+    """Lock guarding the local sync store of one tab"""
+    with _sync_lock:
+        return _tab_sync_locks.setdefault((sheet_id, sheet_name), threading.Lock())
+
+def _sync_state_path(sheet_id, sheet_name):
+    """Local file holding the synced rows and watermark for one tab"""
+    safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', sheet_name).strip('_')
+    return os.path.join(SYNC_DIR, f"{sheet_id}_{safe_name}.json")
+
+def _load_sync_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring unreadable sync state {path}: {e}")
+        return None
+
+def _save_sync_state(path, state):
+    """Write sync state atomically so a crash never leaves a half-written store"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def _trim_row(row):
+    """Strip trailing empty cells so rows fetched with different widths compare equal"""
+    row = list(row)
+    while row and not str(row[-1]).strip():
+        row.pop()
+    return row
+
+def _build_sync_state(sheet_id, sheet_name, rows):
+    """Build the stored watermark (header, last row and date) for a fully fetched tab"""
+    header_row_idx = find_header_row(rows)
+    header = _trim_row(rows[header_row_idx]) if rows else []
+    last_row = _trim_row(rows[-1]) if rows else []
+    date_idx = header.index('Date') if 'Date' in header else 0
+    return {
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "header_row": header_row_idx,
+        "header": header,
+        "row_count": len(rows),
+        "last_row": last_row,
+        "last_date": last_row[date_idx] if len(last_row) > date_idx else "",
+        "rows": rows,
+        "synced_at": datetime.datetime.now().isoformat()
+    }
+
+def _plan_tab_sync(sheet_name, sheet_id):
+    """Return the delta ranges to fetch for a synced tab, or None when a full fetch is needed"""
+    state = _load_sync_state(_sync_state_path(sheet_id, sheet_name))
+    if not state or not state.get("row_count") or not state.get("header"):
+        print(f"📥 No sync state for {sheet_name}, doing a full sync")
+        return None
+
+    header_row = state["header_row"] + 1
+    last_row = state["row_count"]
+    return {
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "state": state,
+        "ranges": [
+            a1_range(sheet_name, f"A{header_row}:{SHEET_LAST_COLUMN}{header_row}"),
+            a1_range(sheet_name, f"A{last_row}:{SHEET_LAST_COLUMN}{last_row}"),
+            a1_range(sheet_name, f"A{last_row + 1}:{SHEET_LAST_COLUMN}")
+        ]
+    }
+
+def _apply_tab_sync(plan, fetched):
+    """Merge fetched delta rows into the local store, resyncing fully if the tab was rewritten"""
+    sheet_name = plan["sheet_name"]
+    sheet_id = plan["sheet_id"]
+    state = plan["state"]
+    header_range, watermark_range, delta_range = plan["ranges"]
+
+    header_rows = fetched.get(header_range) or []
+    watermark_rows = fetched.get(watermark_range) or []
+    new_rows = fetched.get(delta_range) or []
+
+    header = _trim_row(header_rows[0]) if header_rows else []
+    watermark = _trim_row(watermark_rows[0]) if watermark_rows else []
+
+    if header != state["header"] or watermark != state["last_row"]:
+        # Header changed or the last ingested row moved - the tab was rewritten, not appended to
+        print(f"🔄 {sheet_name} was rewritten since {state.get('synced_at')}, doing a full resync")
+        rows = batch_get_tab_values([sheet_name], sheet_id=sheet_id).get(sheet_name)
+        if rows is not None:
+            _save_sync_state(_sync_state_path(sheet_id, sheet_name), _build_sync_state(sheet_id, sheet_name, rows))
+        return rows
+
+    rows = state["rows"]
+    if new_rows:
+        rows = rows + new_rows
+        date_idx = state["header"].index('Date') if 'Date' in state["header"] else 0
+        last_row = _trim_row(new_rows[-1])
+        state.update({
+            "row_count": state["row_count"] + len(new_rows),
+            "last_row": last_row,
+            "last_date": last_row[date_idx] if len(last_row) > date_idx else "",
+            "rows": rows
+        })
+    state["synced_at"] = datetime.datetime.now().isoformat()
+    _save_sync_state(_sync_state_path(sheet_id, sheet_name), state)
+
+    print(f"🔁 Incremental sync of {sheet_name}: {len(new_rows)} new rows (last date {state['last_date']})")
+    return _pad_rows(rows)
+
+def _window_index_path(sheet_id, sheet_name):
+    """Local file holding the row index used to push date windows down to one tab"""
+    return _sync_state_path(sheet_id, sheet_name)[:-len(".json")] + ".window.json"
+
+def _window_start(days):
+    return pd.Timestamp(datetime.date.today() - datetime.timedelta(days=days))
+
+def _first_column_dates(rows, index):
+    """Parse column A of the given rows as dates, caching the format in ``index``"""
+    cells = [row[0] if row else '' for row in rows]
+    if not index.get("date_format"):
+        # Title and header cells come first - take the format of the first date-like cell
+        for cell in cells:
+            date_format = infer_date_format([cell])
+            if date_format:
+                index["date_format"] = date_format
+                break
+    return parse_dates(pd.Series(cells, dtype=object), index)
+
+def _save_window_index(sheet_id, sheet_name, rows, days, index=None):
+    """Index a fully fetched tab: header rows, sortedness and the first row inside the window"""
+    index = index if index is not None else {}
+    dates = _first_column_dates(rows, index)
+    parsed = dates.notna().to_numpy()
+    if not parsed.any():
+        return None
+    preamble_rows = int(np.argmax(parsed))
+    in_window = (dates >= _window_start(days)).to_numpy()
+    start = int(np.argmax(in_window)) if in_window.any() else len(rows)
+    index.update({
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "preamble_rows": preamble_rows,
+        "preamble": [_trim_row(row) for row in rows[:preamble_rows]],
+        "sorted": bool(dates[preamble_rows:].dropna().is_monotonic_increasing),
+        "start_row": start + 1,
+        "row_count": len(rows),
+        "indexed_at": datetime.datetime.now().isoformat()
+    })
+    _save_sync_state(_window_index_path(sheet_id, sheet_name), index)
+    return index
+
+def _probe_rows(lo, hi):
+    """Up to WINDOW_PROBES_PER_ROUND evenly spaced row numbers strictly between lo and hi"""
+    return sorted(set(int(r) for r in np.linspace(lo, hi, WINDOW_PROBES_PER_ROUND + 2)[1:-1]) - {lo, hi})
+
+def _probe_window_start(sheet_name, sheet_id, window_start, index):
+    """Locate the first row dated inside the window with batched k-ary search probes on column A.
+
+    Each round fetches WINDOW_PROBES_PER_ROUND single cells in one batchGet and narrows the
+    candidate rows ~16x, until at most WINDOW_PROBE_SPAN rows remain. Returns
+    ``(preamble_rows, first_candidate_row)`` or None if the tab has no recognisable dates.
+    """
+    grid_rows = get_worksheet(sheet_name, sheet_id).row_count
+    head_range = a1_range(sheet_name, f"A1:A{WINDOW_PREAMBLE_MAX_ROWS}")
+    ranges = [head_range]
+    preamble_rows = None
+    lo, hi = WINDOW_PREAMBLE_MAX_ROWS + 1, grid_rows + 1
+    for round_number in range(1, 9):
+        probes = _probe_rows(lo - 1, hi) if hi - lo > WINDOW_PROBE_SPAN else []
+        probe_ranges = [a1_range(sheet_name, f"A{r}") for r in probes]
+        fetched = batch_get_tab_values(ranges + probe_ranges, sheet_id=sheet_id)
+
+        if preamble_rows is None:
+            head = fetched.get(head_range)
+            if not head:
+                return None
+            dates = _first_column_dates(head, index)
+            parsed = dates.notna().to_numpy()
+            if not parsed.any():
+                return None
+            preamble_rows = int(np.argmax(parsed))
+            lo = preamble_rows + 1
+            for i in range(preamble_rows, len(head)):
+                if pd.notna(dates.iloc[i]) and dates.iloc[i] < window_start:
+                    lo = i + 2
+                else:
+                    hi = min(hi, i + 1)
+                    break
+            ranges = []
+
+        for r, probe_range in zip(probes, probe_ranges):
+            date = _first_column_dates(fetched.get(probe_range) or [[]], index).iloc[0]
+            if pd.notna(date) and date < window_start:
+                lo = max(lo, r + 1)
+            else:
+                # Rows are date-sorted, so every later probe is inside the window (or past the end)
+                hi = min(hi, r)
+                break
+
+        if hi - lo <= WINDOW_PROBE_SPAN:
+            print(f"🔎 Window for {sheet_name} starts within rows {lo}-{hi} ({round_number} probe rounds)")
+            return preamble_rows, lo
+    return preamble_rows, lo
+
+def _plan_window_fetch(sheet_name, days, sheet_id):
+    """Return the ranges covering a tab's header rows and date window, or None to fetch it whole"""
+    index = _load_sync_state(_window_index_path(sheet_id, sheet_name)) or {}
+    if index.get("sorted") is False:
+        return None
+    window_start = _window_start(days)
+
+    if index.get("start_row"):
+        preamble_rows, first_row = index["preamble_rows"], index["start_row"]
+    else:
+        probed = _probe_window_start(sheet_name, sheet_id, window_start, index)
+        if probed is None:
+            return None
+        preamble_rows, first_row = probed
+
+    # Start one row early: that row must predate the window, proving nothing was missed
+    fetch_from = max(preamble_rows + 1, first_row - 1)
+    ranges = [a1_range(sheet_name, f"A{fetch_from}:{SHEET_LAST_COLUMN}")]
+    if preamble_rows:
+        ranges.insert(0, a1_range(sheet_name, f"A1:{SHEET_LAST_COLUMN}{preamble_rows}"))
+    return {
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "days": days,
+        "window_start": window_start,
+        "index": index,
+        "preamble_rows": preamble_rows,
+        "fetch_from": fetch_from,
+        "ranges": ranges
+    }
+
+def _apply_window_fetch(plan, fetched):
+    """Assemble header + window rows, falling back to a full fetch if the window can't be trusted"""
+    sheet_name = plan["sheet_name"]
+    sheet_id = plan["sheet_id"]
+    index = plan["index"]
+    preamble_rows = plan["preamble_rows"]
+    fetch_from = plan["fetch_from"]
+    window_start = plan["window_start"]
+
+    head = fetched.get(plan["ranges"][0]) if preamble_rows else []
+    tail = fetched.get(plan["ranges"][-1])
+    dates = _first_column_dates(tail or [], index)
+    reason = None
+    if head is None or tail is None:
+        reason = "range fetch failed"
+    elif index.get("preamble") is not None and [_trim_row(row) for row in head] != index["preamble"]:
+        reason = "header rows changed"
+    elif not dates.dropna().is_monotonic_increasing:
+        reason = "dates are not sorted"
+    elif fetch_from > preamble_rows + 1 and not (len(dates) and pd.notna(dates.iloc[0]) and dates.iloc[0] < window_start):
+        reason = "rows before the window moved"
+
+    if reason:
+        print(f"🔄 Window fetch of {sheet_name} not usable ({reason}), fetching the whole tab")
+        rows = batch_get_tab_values([sheet_name], sheet_id=sheet_id).get(sheet_name)
+        if rows is not None:
+            _save_window_index(sheet_id, sheet_name, rows, plan["days"])
+        return rows
+
+    in_window = (dates >= window_start).to_numpy()
+    index.update({
+        "sheet_id": sheet_id,
+        "sheet_name": sheet_name,
+        "preamble_rows": preamble_rows,
+        "preamble": [_trim_row(row) for row in head],
+        "sorted": True,
+        "start_row": fetch_from + (int(np.argmax(in_window)) if in_window.any() else len(tail)),
+        "row_count": fetch_from - 1 + len(tail),
+        "indexed_at": datetime.datetime.now().isoformat()
+    })
+    _save_sync_state(_window_index_path(sheet_id, sheet_name), index)
+    print(f"🪟 Window fetch of {sheet_name}: {len(tail)} rows from row {fetch_from} (of {index['row_count']})")
+    return _pad_rows(head + tail)
+
+def _snapshot_paths(sheet_id, sheet_name):
+    safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', sheet_name).strip('_')
+    base = os.path.join(SNAPSHOT_DIR, f"{sheet_id}_{safe_name}")
+    return base, base + ".meta.json"
+
+def _spreadsheet_modified_time(sheet_id):
+    """Return the spreadsheet's Drive modifiedTime, or None if it cannot be checked"""
+    checked_at, modified_time = _modified_time_memo.get(sheet_id, (0, None))
+    if time.time() - checked_at < SNAPSHOT_METADATA_MEMO_SECONDS:
+        return modified_time
+    try:
+        modified_time = call_sheets_api(get_spreadsheet(sheet_id).get_lastUpdateTime)
+        SHEETS_API_STATS["metadata_calls"] += 1
+    except Exception as e:
+        print(f"⚠️ Could not check spreadsheet modifiedTime: {e}")
+        return None
+    _modified_time_memo[sheet_id] = (time.time(), modified_time)
+    return modified_time
+
+def _write_frame(df, base_path):
+    """Write a frame as Feather when pyarrow is available, pickle otherwise"""
+    try:
+        import pyarrow  # noqa: F401
+        df.reset_index(drop=True).to_feather(base_path + ".feather")
+        return "feather"
+    except Exception:
+        # No pyarrow, or columns Feather can't hold (duplicate / non-string names)
+        df.to_pickle(base_path + ".pkl")
+        return "pickle"
+
+def _read_frame(base_path, fmt):
+    if fmt == "feather":
+        return pd.read_feather(base_path + ".feather")
+    return pd.read_pickle(base_path + ".pkl")
+
+def load_snapshot(sheet_name, sheet_id=SHEET_ID, ttl=None):
+    """Return the cached parsed frame for a tab if it is still fresh, else None.
+
+    Snapshots younger than ``ttl`` seconds are used as-is; older ones are revalidated
+    against the spreadsheet's Drive modifiedTime. If that check fails (e.g. Sheets is
+    down) the stale snapshot is served rather than failing the report.
+    """
+    ttl = SNAPSHOT_TTL_SECONDS if ttl is None else ttl
+    base_path, meta_path = _snapshot_paths(sheet_id, sheet_name)
+    started = time.time()
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        SNAPSHOT_CACHE_STATS["misses"] += 1
+        print(f"📭 Snapshot miss for {sheet_name}: no cached copy")
+        return None
+
+    stale = False
+    if time.time() - meta["saved_at"] > ttl:
+        modified_time = _spreadsheet_modified_time(sheet_id)
+        if modified_time is None:
+            stale = True
+        elif modified_time != meta.get("modified_time"):
+            SNAPSHOT_CACHE_STATS["misses"] += 1
+            print(f"📭 Snapshot miss for {sheet_name}: spreadsheet modified at {modified_time}")
+            return None
 
-def load_campaign_data(sheet_name=None):
     try:
-        b64_key = os.getenv("GOOGLE_CREDENTIALS_B64")
-        if not b64_key:
-            raise ValueError("Missing GOOGLE_CREDENTIALS_B64 environment variable")
+        df = _read_frame(base_path, meta["format"])
+    except Exception as e:
+        SNAPSHOT_CACHE_STATS["misses"] += 1
+        print(f"📭 Snapshot miss for {sheet_name}: unreadable cache ({e})")
+        return None
+
+    elapsed = time.time() - started
+    SNAPSHOT_CACHE_STATS["stale_hits" if stale else "hits"] += 1
+    SNAPSHOT_CACHE_STATS["load_seconds"] += elapsed
+    print(f"⚡ Snapshot {'stale hit' if stale else 'hit'} for {sheet_name}: {len(df)} rows in {elapsed * 1000:.1f} ms")
+    return df
+
+def save_snapshot(df, sheet_name, sheet_id=SHEET_ID):
+    """Store a parsed tab frame as a local columnar snapshot"""
+    base_path, meta_path = _snapshot_paths(sheet_id, sheet_name)
+    started = time.time()
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        meta = {
+            "sheet_id": sheet_id,
+            "sheet_name": sheet_name,
+            "format": _write_frame(df, base_path),
+            "rows": len(df),
+            "modified_time": _spreadsheet_modified_time(sheet_id),
+            "saved_at": time.time()
+        }
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        SNAPSHOT_CACHE_STATS["save_seconds"] += time.time() - started
+    except Exception as e:
+        print(f"⚠️ Could not save snapshot for {sheet_name}: {e}")
+
+def get_snapshot_cache_stats():
+    """Return snapshot cache hit/miss counts and cumulative load time"""
+    return dict(SNAPSHOT_CACHE_STATS)
+
+def sheets_data_source():
+    """Data source reading tabs from the live spreadsheet (batched, optionally incremental)"""
+    return {
+        "name": "sheets",
+        "fetch_tabs": fetch_report_tabs,
+        "fetch_tabs_async": fetch_report_tabs_async,
+        "cacheable": True
+    }
+
+def local_data_source(path=None):
+    """Data source reading tabs from local exports instead of the Sheets API.
+
+    ``path`` is either a directory holding one ``<tab name>.csv`` / ``.xlsx`` file per tab
+    (the tab name may also be written with underscores, as in the snapshot files), or a
+    single ``.xlsx`` workbook with one sheet per tab. Cells come back as strings, like
+    Sheets formatted values, so every parser works unchanged.
+    """
+    path = path or LOCAL_DATA_PATH
+
+    def fetch_tabs(tab_names, sheet_id=None, sync_mode=None, windows=None):
+        results = {}
+        for tab in tab_names:
+            try:
+                results[tab] = _read_local_tab(path, tab)
+            except Exception as e:
+                print(f"❌ Could not read local tab {tab} from {path}: {e}")
+                results[tab] = None
+        print(f"📂 Loaded {len(results)} tabs from {path}: {[None if v is None else len(v) for v in results.values()]} rows")
+        return results
+
+    return {
+        "name": "local",
+        "path": path,
+        "fetch_tabs": fetch_tabs,
+        "cacheable": False
+    }
+
+def memory_data_source(tabs):
+    """Data source serving fixed rows from memory, keyed by tab name (fixtures, replays)"""
+    tabs = {tab: [list(row) for row in rows] for tab, rows in tabs.items()}
+
+    def fetch_tabs(tab_names, sheet_id=None, sync_mode=None, windows=None):
+        return {tab: [list(row) for row in tabs[tab]] if tab in tabs else None for tab in tab_names}
 
-        key_data = base64.b64decode(b64_key).decode("utf-8")
-        creds_dict = json.loads(key_data)
+    return {
+        "name": "memory",
+        "tabs": tabs,
+        "fetch_tabs": fetch_tabs,
+        "cacheable": False
+    }
 
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
+DATA_SOURCES = {
+    "sheets": sheets_data_source,
+    "local": local_data_source,
+    "memory": memory_data_source
+}
 
-        target_sheet_name = sheet_name if sheet_name else SHEET_NAME
-        print(f"📊 Loading data from sheet: {target_sheet_name}")
-        sheet = client.open_by_key(SHEET_ID).worksheet(target_sheet_name)
-        all_data = sheet.get_all_values()
+def set_data_source(source, *args, **kwargs):
+    """Make ``source`` (a DATA_SOURCES name or a data source dict) the default for all loads"""
+    global _data_source
+    if isinstance(source, str):
+        if source not in DATA_SOURCES:
+            raise ValueError(f"Unknown data source: {source}")
+        source = DATA_SOURCES[source](*args, **kwargs)
+    _data_source = source
+    print(f"🔌 Data source set to {source['name']}")
+    return source
 
+def get_data_source():
+    """Return the default data source, building it from DATA_SOURCE on first use"""
+    global _data_source
+    if _data_source is None:
+        if DATA_SOURCE == "memory":
+            _data_source = memory_data_source({})
+        else:
+            _data_source = DATA_SOURCES.get(DATA_SOURCE, sheets_data_source)()
+    return _data_source
+
+def _read_local_tab(path, sheet_name):
+    """Return the rows of one tab from a local export, or None if there is no file for it"""
+    if os.path.isfile(path):
+        return _read_xlsx_rows(path, sheet_name) if path.lower().endswith((".xlsx", ".xlsm")) else None
+
+    safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', sheet_name).strip('_')
+    for name in (sheet_name, safe_name):
+        base = os.path.join(path, name)
+        if os.path.exists(base + ".csv"):
+            return _read_csv_rows(base + ".csv")
+        if os.path.exists(base + ".xlsx"):
+            return _read_xlsx_rows(base + ".xlsx")
+    return None
+
+def _read_csv_rows(path):
+    """Read a CSV export into padded string rows.
+
+    Like a Sheets fetch, the whole tab is returned as a list for the tab parsers; the file
+    is read through one buffered pass, so replaying an export costs no API round trips.
+    """
+    import csv
+
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    return _pad_rows(rows)
+
+def save_local_tabs(tab_values, path=None):
+    """Write fetched tab rows as ``<tab>.csv`` files that ``local_data_source`` can replay"""
+    import csv
+
+    path = path or LOCAL_DATA_PATH
+    os.makedirs(path, exist_ok=True)
+    for tab, rows in tab_values.items():
+        if rows is None:
+            continue
+        safe_name = re.sub(r'[^A-Za-z0-9_-]+', '_', tab).strip('_')
+        with open(os.path.join(path, safe_name + ".csv"), "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(rows)
+    print(f"💾 Saved {len(tab_values)} tabs to {path}")
+    return path
+
+def _xlsx_cell_text(value):
+    """Render an XLSX cell the way Sheets returns formatted values"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _read_xlsx_rows(path, sheet_name=None):
+    """Stream one sheet of a workbook (the first if ``sheet_name`` is None) into string rows"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Reading .xlsx exports requires openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name is not None and sheet_name not in workbook.sheetnames:
+            return None
+        worksheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        rows = [[_xlsx_cell_text(value) for value in row] for row in worksheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+    return _pad_rows([_trim_row(row) for row in rows])
+
+async def load_report_frames_async(tab_names, tab_values=None, sheet_id=SHEET_ID, use_cache=None, sync_mode=None, parsers=None, source=None, windows=None):
+    """Async ``load_report_frames``; snapshot I/O and parsing run on worker threads"""
+    source = source or get_data_source()
+    use_cache = SNAPSHOT_CACHE_ENABLED if use_cache is None else use_cache
+    use_cache = use_cache and source["cacheable"]
+    frames = {}
+    windowed = set()
+    if tab_values is None:
+        if use_cache:
+            snapshots = await asyncio.gather(*(asyncio.to_thread(load_snapshot, tab, sheet_id) for tab in tab_names))
+            frames = {tab: df for tab, df in zip(tab_names, snapshots) if df is not None}
+        missing = [tab for tab in tab_names if tab not in frames]
+        tab_values = {}
+        if missing and "fetch_tabs_async" in source:
+            tab_values = await source["fetch_tabs_async"](missing, sheet_id=sheet_id, sync_mode=sync_mode, windows=windows)
+        elif missing:
+            tab_values = await asyncio.to_thread(source["fetch_tabs"], missing, sheet_id=sheet_id, sync_mode=sync_mode, windows=windows)
+        windowed = set(windows or ())
+
+    def parse_tab(tab, rows):
+        parser = (parsers or TAB_PARSERS).get(tab) or TAB_PARSERS.get(tab, parse_campaign_rows)
+        df = parser(rows)
+        if use_cache and tab not in windowed:
+            save_snapshot(df, tab, sheet_id)
+        return df
+
+    for tab in tab_names:
+        if tab in frames:
+            continue
+        rows = tab_values.get(tab)
+        frames[tab] = None if rows is None else await asyncio.to_thread(parse_tab, tab, rows)
+    return frames
+
+def load_report_frames(tab_names, tab_values=None, sheet_id=SHEET_ID, use_cache=None, sync_mode=None, parsers=None, source=None, windows=None):
+    """Return parsed frames for the given tabs, keyed by tab name.
+
+    Fresh snapshots are used when no ``tab_values`` are supplied; the remaining tabs are
+    fetched from ``source`` (default ``get_data_source()``), parsed with their
+    ``parsers`` (default ``TAB_PARSERS``) entry and snapshotted. Snapshots only apply to
+    cacheable sources (live Sheets). ``windows`` ({tab: days}) lets the source fetch just
+    the recent rows of date-sorted tabs; those partial frames are never snapshotted.
+    A tab that does not exist maps to None.
+    """
+    return _run_sync(load_report_frames_async(
+        tab_names, tab_values, sheet_id=sheet_id, use_cache=use_cache, sync_mode=sync_mode,
+        parsers=parsers, source=source, windows=windows
+    ))
+
+def load_campaign_data(sheet_name=None, all_data=None, sync_mode=None, source=None):
+    """Load a performance tab into a cleaned DataFrame.
+
+    Pass ``all_data`` (rows already fetched, e.g. by ``fetch_report_tabs``) to skip the API call.
+    ``sync_mode="incremental"`` only downloads rows appended since the last run; ``source``
+    reads from another data source (see ``DATA_SOURCES``) instead of the default one.
+    """
+    try:
+        if all_data is None:
+            target_sheet_name = sheet_name if sheet_name else SHEET_NAME
+            print(f"📊 Loading data from sheet: {target_sheet_name}")
+            df = load_report_frames([target_sheet_name], sync_mode=sync_mode, source=source)[target_sheet_name]
+            if df is None:
+                raise gspread.WorksheetNotFound(target_sheet_name)
+            return df
+
+        return parse_campaign_rows(all_data)
+
+    except Exception as e:
+        print(f"❌ Error in load_campaign_data: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def schema_fingerprint(preamble_rows):
+    """Stable hash of the rows above a tab's data (title rows + header), ignoring padding"""
+    payload = json.dumps([_trim_row(row) for row in preamble_rows], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+def resolve_tab_schema(kind, rows, detect, accepts=None):
+    """Return the layout of a tab, running header detection only for an unseen header.
+
+    ``detect(rows)`` returns ``(header_row, data_start, headers)`` or None. The result is
+    cached per ``kind`` (parser) under the fingerprint of ``rows[:data_start]``; later loads
+    whose preamble fingerprints the same (and whose first data row passes ``accepts``, for
+    layouts found by sniffing data rows) skip detection entirely. Returns a dict with
+    ``header_row``, ``data_start``, ``headers`` and canonical ``columns``, or None.
+    """
+    with _schema_lock:
+        candidates = list(_schema_registry.get(kind, []))
+    for schema in candidates:
+        data_start = schema["data_start"]
+        if len(rows) <= data_start or (accepts and not accepts(rows[data_start])):
+            continue
+        if schema_fingerprint(rows[:data_start]) == schema["fingerprint"]:
+            SCHEMA_CACHE_STATS["hits"] += 1
+            print(f"🧬 Schema cache hit for {kind}: data starts at row {data_start}")
+            return schema
+
+    SCHEMA_CACHE_STATS["misses"] += 1
+    detected = detect(rows)
+    if detected is None:
+        return None
+    header_row, data_start, headers = detected
+    schema = {
+        "kind": kind,
+        "fingerprint": schema_fingerprint(rows[:data_start]),
+        "header_row": header_row,
+        "data_start": data_start,
+        "headers": headers,
+        "columns": [COLUMN_MAPPING.get(header, header) for header in headers]
+    }
+    with _schema_lock:
+        schemas = [s for s in _schema_registry.get(kind, []) if s["fingerprint"] != schema["fingerprint"]]
+        _schema_registry[kind] = ([schema] + schemas)[:SCHEMA_REGISTRY_SIZE]
+    print(f"🧬 Registered {kind} schema {schema['fingerprint']}: data starts at row {data_start}")
+    return schema
+
+def get_schema_cache_stats():
+    """Return schema registry hit/miss counts and the number of cached layouts"""
+    with _schema_lock:
+        cached = sum(len(schemas) for schemas in _schema_registry.values())
+    return dict(SCHEMA_CACHE_STATS, cached=cached)
+
+def _detect_performance_schema(all_data):
+    header_row_idx = find_header_row(all_data)
+    headers = [col.strip() for col in all_data[header_row_idx]]
+    return header_row_idx, header_row_idx + 1, headers
+
+def parse_campaign_rows(all_data):
+    """Parse raw performance tab rows into a cleaned DataFrame"""
+    try:
         print(f"📊 Total rows loaded: {len(all_data)}")
 
         if len(all_data) < 3:
             print("⚠️ Not enough data rows found")
             return create_empty_dataframe()
 
-        # Find the header row (first non-empty row)
-        header_row_idx = 0
-        for i, row in enumerate(all_data):
-            if any(cell.strip() for cell in row):
-                if 'Date' in row or 'Campaign' in str(row):
-                    header_row_idx = i
-                    break
-
-        # Extract headers and data
-        headers = [col.strip() for col in all_data[header_row_idx]]
-        data_rows = all_data[header_row_idx + 1:]
+        schema = resolve_tab_schema("performance", all_data, _detect_performance_schema)
+        data_start = schema["data_start"]
+        headers = schema["headers"]
+        data_rows = itertools.islice(all_data, data_start, None)
         
-        print(f"🎯 Found data starting at row {header_row_idx + 1}: {data_rows[0][:4] if data_rows else 'No data'}")
+        print(f"🎯 Found data starting at row {data_start}: {all_data[data_start][:4] if len(all_data) > data_start else 'No data'}")
         print(f"🔍 Using headers: {headers[:10]}")
 
-        # Filter out empty rows
-        valid_rows = []
-        for row in data_rows:
-            if len(row) >= len(headers):
-                row_padded = row[:len(headers)]
-            else:
-                row_padded = row + [''] * (len(headers) - len(row))
-            
-            if any(cell.strip() for cell in row_padded):
-                valid_rows.append(row_padded)
+        # Skip blank rows and write straight into typed column buffers
+        df = stream_typed_frame(data_rows, schema["columns"], schema)
 
-        print(f"📝 Data rows available: {len(data_rows)}")
-        print(f"📝 Valid data rows after filtering: {len(valid_rows)}")
+        print(f"📝 Data rows available: {max(len(all_data) - data_start, 0)}")
+        print(f"📝 Valid data rows after filtering: {len(df)}")
 
-        if not valid_rows:
+        if df.empty:
             print("❌ No valid data rows found")
             return create_empty_dataframe()
 
-        # Create DataFrame
-        df = pd.DataFrame(valid_rows, columns=headers)
         print(f"✅ Created DataFrame with {len(df)} rows")
         print(f"📋 Columns: {list(df.columns)}")
 
-        # Clean the DataFrame
+        # Add any missing required columns (metrics are already float64), then compact
         df = clean_and_map_columns(df)
+        df = coerce_metric_columns(df)
         
-        return df
+        return compact_campaign_frame(df)
 
     except Exception as e:
-        print(f"❌ Error in load_campaign_data: {e}")
+        print(f"❌ Error in parse_campaign_rows: {e}")
         import traceback
         traceback.print_exc()
         raise
 
+def stream_typed_frame(rows, columns, schema=None):
+    """Build a typed frame from raw tab rows in one pass, without intermediate row copies.
+
+    Non-blank rows are collected in chunks of ``PARSE_CHUNK_ROWS`` and each chunk is written
+    column by column into typed buffers: float64 for metric columns, dictionary codes for
+    everything else. Dates are parsed once per distinct value and text columns become
+    categoricals, so the frame never holds one Python string per cell. ``columns`` holds
+    the canonical name of each header cell; ``schema`` caches the inferred date format.
+    """
+    names = list(columns)
+    width = len(names)
+    metric = [name in METRIC_COLUMNS for name in names]
+    float_chunks = [[] for _ in names]
+    code_chunks = [[] for _ in names]
+    lookups = [{} for _ in names]
+    chunk = []
+
+    def flush():
+        for j in range(width):
+            values = [row[j] for row in chunk]
+            if metric[j]:
+                float_chunks[j].append(clean_numeric_column(pd.Series(values, dtype=object)).to_numpy())
+            else:
+                # Factorize the chunk, then map its distinct values onto the column-wide codes
+                lookup = lookups[j]
+                codes, uniques = pd.factorize(np.array(values, dtype=object))
+                global_codes = np.array([lookup.setdefault(v, len(lookup)) for v in uniques], dtype=np.int32)
+                code_chunks[j].append(global_codes[codes])
+        chunk.clear()
+
+    for row in rows:
+        if len(row) < width:
+            row = row + [''] * (width - len(row))
+        if any(cell.strip() for cell in itertools.islice(row, width)):
+            chunk.append(row)
+            if len(chunk) >= PARSE_CHUNK_ROWS:
+                flush()
+    if chunk:
+        flush()
+
+    columns = {}
+    for j, name in enumerate(names):
+        if metric[j]:
+            values = np.concatenate(float_chunks[j]) if float_chunks[j] else np.zeros(0)
+        else:
+            codes = np.concatenate(code_chunks[j]) if code_chunks[j] else np.zeros(0, dtype=np.int32)
+            categories = list(lookups[j])
+            if name == 'Date':
+                values = parse_dates(pd.Series(categories, dtype=object), schema).to_numpy()[codes]
+            else:
+                values = pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+        columns[j] = values
+
+    df = pd.DataFrame(columns)
+    df.columns = names
+    return df
+
+def find_header_row(all_data):
+    """Find the header row (first non-empty row naming Date or Campaign)"""
+    for i, row in enumerate(all_data):
+        if any(cell.strip() for cell in row):
+            if 'Date' in row or 'Campaign' in str(row):
+                return i
+    return 0
+
 def create_empty_dataframe():
     """Create an empty DataFrame with expected columns"""
     columns = [
@@ -96,32 +1365,8 @@ def create_empty_dataframe():
 def clean_and_map_columns(df):
     """Clean and standardize column names"""
     try:
-        # Column mapping for different possible names
-        column_mapping = {
-            'Date': 'Date',
-            'Campaign name': 'Campaign Name',
-            'Campaign Name': 'Campaign Name',
-            'Impressions': 'Impressions',
-            'Clicks': 'Clicks',
-            'Ctr': 'Ctr',
-            'CTR': 'Ctr',
-            'Click-through rate': 'Ctr',
-            'Conversions': 'Conversions',
-            'Conv.': 'Conversions',
-            'Search impression share': 'Search Impression Share',
-            'Search Impression Share': 'Search Impression Share',
-            'Impr. share': 'Search Impression Share',
-            'Cost per conversion': 'Cost Per Conversion',
-            'Cost Per Conversion': 'Cost Per Conversion',
-            'Cost/conv.': 'Cost Per Conversion',
-            'Cost micros': 'Cost Micros',
-            'Cost Micros': 'Cost Micros',
-            'Phone calls': 'Phone Calls',
-            'Phone Calls': 'Phone Calls'
-        }
-        
         # Rename columns based on mapping
-        df.columns = [column_mapping.get(col, col) for col in df.columns]
+        df.columns = [COLUMN_MAPPING.get(col, col) for col in df.columns]
         
         # Ensure required columns exist with default values
         required_columns = ['Date', 'Campaign Name', 'Impressions', 'Clicks', 'Ctr', 'Conversions', 
@@ -167,6 +1412,110 @@ def clean_numeric_value(value):
     except (ValueError, TypeError):
         return 0
 
+def clean_numeric_column(series):
+    """Vectorized ``clean_numeric_value`` for a whole column, returning float64.
+
+    Cells that are plain numbers once formatting is stripped are cast in one pass.
+    Anything else (unusual float spellings, junk) falls back to ``clean_numeric_value``
+    once per distinct value, so results match the per-cell path exactly.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return pd.Series(metric_values(series), index=series.index, name=series.name).fillna(0.0)
+
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(series).to_numpy()
+    text = series.astype(str)
+    cleaned = text.str.replace(_NUMERIC_FORMATTING, '', regex=True).str.strip()
+    empty = cleaned.isin(_EMPTY_NUMERIC_VALUES).to_numpy()
+    plain = ~missing & cleaned.str.fullmatch(_PLAIN_NUMBER, na=False).to_numpy(dtype=bool)
+
+    result = np.zeros(len(series), dtype='float64')
+    parsed = plain.copy()
+    if plain.any():
+        result[plain] = cleaned[plain].astype('float64').to_numpy()
+
+    # Concatenated values ("12.5%13.1%") keep the number before the first % sign
+    multi_percent = ~missing & (text.str.count('%').to_numpy() > 1)
+    if multi_percent.any():
+        first_part = text[multi_percent].str.replace(r'%.*', '', regex=True).str.strip()
+        first_plain = first_part.str.fullmatch(_PLAIN_NUMBER, na=False).to_numpy(dtype=bool)
+        first_values = np.full(len(first_part), np.nan)
+        first_values[first_plain] = first_part[first_plain].astype('float64').to_numpy()
+        result[multi_percent] = first_values
+        parsed[multi_percent] = first_plain
+
+    fallback = ~missing & ~parsed & (~empty | multi_percent)
+    if fallback.any():
+        # Whatever pd.to_numeric rejected gets the scalar rules, once per distinct value
+        codes, uniques = pd.factorize(values[fallback])
+        result[fallback] = np.array([clean_numeric_value(v) for v in uniques], dtype='float64')[codes]
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+def coerce_metric_columns(df):
+    """Convert every metric column to float64 once, so aggregation never re-parses strings"""
+    for col in METRIC_COLUMNS:
+        if col in df.columns:
+            df[col] = clean_numeric_column(df[col])
+    return df
+
+def metric_values(series):
+    """Float64 values of a metric column, expanding compact int32/float32/micros storage.
+
+    An integer column named in ``MICROS_COLUMNS`` holds micros; float32 rates are rounded
+    back to ``COMPACT_RATE_DECIMALS``. The result equals the values before compaction.
+    """
+    values = series.to_numpy()
+    if series.name in MICROS_COLUMNS and np.issubdtype(values.dtype, np.integer):
+        return values / MICROS_PER_UNIT
+    if values.dtype == np.float32:
+        return np.round(values.astype('float64'), COMPACT_RATE_DECIMALS)
+    return values.astype('float64')
+
+def _compact_metric(values, column):
+    """Narrowest lossless storage for one float64 metric column"""
+    if not np.isfinite(values).all():
+        return values
+    if column in MICROS_COLUMNS:
+        micros = np.round(values * MICROS_PER_UNIT)
+        if np.abs(micros).max(initial=0) < 2 ** 53 and np.array_equal(micros / MICROS_PER_UNIT, values):
+            return micros.astype('int64')
+    elif column in COUNT_COLUMNS:
+        if np.array_equal(np.floor(values), values) and np.abs(values).max(initial=0) <= np.iinfo(np.int32).max:
+            return values.astype('int32')
+    elif column in RATE_COLUMNS:
+        rates = values.astype('float32')
+        if np.array_equal(np.round(rates.astype('float64'), COMPACT_RATE_DECIMALS), values):
+            return rates
+    return values
+
+def compact_campaign_frame(df):
+    """Store a parsed performance frame in its compact canonical dtypes.
+
+    Counts become int32, rates float32 and costs int64 micros whenever ``metric_values``
+    can recover the exact float64 values (otherwise the column stays float64). Dates are
+    datetime64 and every other text column is categorical. Read metrics through
+    ``metric_values`` (or ``clean_numeric_column``) rather than the raw column.
+    """
+    for col in df.columns.unique():
+        if not isinstance(df[col], pd.Series):
+            continue
+        if col in METRIC_COLUMNS:
+            df[col] = _compact_metric(metric_values(df[col]), col)
+        elif col == 'Date':
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif not isinstance(df[col].dtype, pd.CategoricalDtype) and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].astype('category')
+    return df
+
+def compact_conversion_frame(df):
+    """Store the name columns of a parsed conversion frame (campaign, action) as categoricals"""
+    for col in df.columns.unique():
+        if 'name' in str(col).lower() and isinstance(df[col], pd.Series):
+            df[col] = df[col].astype('category')
+    return df
+
 def get_last_4_weeks():
     """Get the date range for the last 4 weeks"""
     from datetime import datetime, timedelta
@@ -176,138 +1525,220 @@ def get_last_4_weeks():
     
     return start_date, end_date
 
+def _sequential_sum(values):
+    """Left-to-right float sum (same rounding as a Python loop, unlike pairwise ndarray.sum)"""
+    return float(np.cumsum(values)[-1]) if len(values) else 0.0
+
 def safe_numeric_mean(series):
-    """Safely calculate mean of potentially malformed data"""
+    """Safely calculate mean of the positive values of potentially malformed data"""
     try:
-        # Convert each value individually
-        numeric_values = []
-        for val in series:
-            cleaned = clean_numeric_value(val)
-            if cleaned > 0:
-                numeric_values.append(cleaned)
-        return sum(numeric_values) / len(numeric_values) if numeric_values else 0
+        values = clean_numeric_column(series).to_numpy()
+        positive = values[values > 0]
+        return _sequential_sum(positive) / len(positive) if positive.size else 0
     except:
         return 0
 
 def safe_numeric_sum(series):
     """Safely calculate sum of potentially malformed data"""
     try:
-        total = 0
-        for val in series:
-            cleaned = clean_numeric_value(val)
-            total += cleaned
-        return total
+        return _sequential_sum(clean_numeric_column(series).to_numpy())
     except:
         return 0
 
-def fetch_daily_comparison_data():
-    """Fetch and process daily comparison data for Luma campaigns"""
+def _first_date_string(values):
+    """First value pandas would infer a date format from (skips blanks and NaT spellings)"""
+    for value in values:
+        if isinstance(value, str) and value not in _NAT_STRINGS:
+            return value
+    return None
+
+def infer_date_format(values):
+    """strptime format of the first date string, as ``pd.to_datetime`` would infer it"""
+    first = _first_date_string(values)
+    if first is None:
+        return None
     try:
-        print("🚀 Starting daily comparison data fetch...")
-        
-        # Load campaign data
-        df = load_campaign_data()
-        
-        if df is None or df.empty:
-            print("❌ No data loaded from sheet")
-            return {"campaigns": {}, "weeks": [], "conversion_actions": []}
-        
-        # Process dates and filter for last 4 weeks
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df = df.dropna(subset=['Date'])
-        
-        start_date, end_date = get_last_4_weeks()
-        recent_df = df[df['Date'] >= start_date].copy()
-        
-        if recent_df.empty:
-            print("❌ No recent data found in last 4 weeks")
-            return {"campaigns": {}, "weeks": [], "conversion_actions": []}
-        
-        # Group by week
-        recent_df['Week_Start'] = recent_df['Date'].dt.to_period('W').dt.start_time
-        weeks = sorted(recent_df['Week_Start'].dt.strftime('%Y-%m-%d').unique())
-        
-        # Process campaigns
-        campaigns = {}
-        for campaign in recent_df['Campaign Name'].unique():
-            if not campaign or pd.isna(campaign):
-                continue
-                
-            campaign_data = recent_df[recent_df['Campaign Name'] == campaign]
-            campaigns[campaign] = {}
-            
-            for week in weeks:
-                week_data = campaign_data[campaign_data['Week_Start'].dt.strftime('%Y-%m-%d') == week]
-                if not week_data.empty:
-                    campaigns[campaign][week] = {
-                        'impressions': int(safe_numeric_sum(week_data['Impressions'])),
-                        'clicks': int(safe_numeric_sum(week_data['Clicks'])),
-                        'ctr': round(safe_numeric_mean(week_data['Ctr']), 2),
-                        'conversions': int(safe_numeric_sum(week_data['Conversions'])),
-                        'search_impression_share': round(safe_numeric_mean(week_data['Search Impression Share']), 2),
-                        'cost_per_conversion': round(safe_numeric_mean(week_data['Cost Per Conversion']), 2),
-                        'cost_micros': round(safe_numeric_sum(week_data['Cost Micros']), 2),
-                        'phone_calls': int(safe_numeric_sum(week_data['Phone Calls']))
-                    }
-        
-        print(f"✅ Daily comparison data ready: {len(campaigns)} campaigns, {len(weeks)} weeks")
-        
-        return {
-            "campaigns": campaigns, 
-            "weeks": weeks,
-            "conversion_actions": fetch_conversion_action_data()  # Add Luma conversions
-        }
-        
-    except Exception as e:
-        print(f"❌ Error in fetch_daily_comparison_data: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"campaigns": {}, "weeks": [], "conversion_actions": []}
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:
+        return None
+    return guess_datetime_format(first)
+
+def parse_dates(values, schema=None):
+    """Parse a column of date strings like ``pd.to_datetime(values, errors='coerce')``, fast.
+
+    Only the distinct strings are parsed and the results are mapped back, so a year of
+    ad-group rows costs one parse per day. The format is inferred once per tab ``schema``
+    (see ``resolve_tab_schema``) and re-inferred only if it stops matching. Columns that
+    are already datetime64 are returned unchanged.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    values = series.to_numpy(dtype=object)
+    starts = np.flatnonzero(values[1:] != values[:-1]) + 1 if len(values) else np.zeros(0, dtype=np.intp)
+    if len(starts) * 4 < len(values):
+        # Exports are sorted by date, so factorize one value per run of repeats
+        starts = np.concatenate(([0], starts))
+        run_codes, uniques = pd.factorize(values[starts])
+        codes = np.repeat(run_codes, np.diff(np.append(starts, len(values))))
+    else:
+        codes, uniques = pd.factorize(values)
+    date_format = schema.get("date_format") if schema is not None else None
+    if date_format is None:
+        date_format = infer_date_format(uniques)
 
-def fetch_conversion_action_data():
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce')
+    if schema is not None and date_format and parsed.isna().all() and _first_date_string(uniques):
+        # The cached format no longer matches anything - the tab's date format changed
+        date_format = infer_date_format(uniques)
+        parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce')
+    if schema is not None and date_format:
+        schema["date_format"] = date_format
+
+    # Missing values have code -1, which picks the trailing NaT
+    parsed = np.append(parsed.to_numpy(), np.array(['NaT'], dtype=parsed.dtype))
+    return pd.Series(parsed[codes], index=series.index, name=series.name)
+
+def week_start(dates):
+    """Monday 00:00 of each date's week (same as ``to_period('W').dt.start_time``)"""
+    return dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit='D')
+
+def week_labels(week_starts):
+    """Sorted unique YYYY-MM-DD labels, formatting each distinct week only once"""
+    return sorted(pd.Timestamp(w).strftime('%Y-%m-%d') for w in pd.unique(week_starts.dropna()))
+
+def campaign_week_components(df):
+    """Additive per (campaign, week) components for every weekly metric, in one grouped pass.
+
+    Returns ``(campaign_names, week_starts, components)`` where ``components`` maps
+    ``"rows"`` and, per metric, ``"<key>_sum"`` (and ``"<key>_count"`` for non-zero means)
+    to arrays of shape (campaigns, weeks). Campaigns keep first-appearance order and
+    rows without a campaign name are skipped.
+    """
+    campaign = df['Campaign Name']
+    valid = (campaign.notna() & (campaign.astype(str) != '') & df['Week_Start'].notna()).to_numpy()
+
+    campaign_codes, campaign_names = pd.factorize(campaign[valid])
+    week_codes, week_starts = pd.factorize(df['Week_Start'][valid])
+    n_campaigns, n_weeks = len(campaign_names), len(week_starts)
+    groups = campaign_codes * n_weeks + week_codes
+    size = n_campaigns * n_weeks
+    shape = (n_campaigns, n_weeks)
+
+    components = {"rows": np.bincount(groups, minlength=size).reshape(shape)}
+    for key, column, how in WEEKLY_METRICS:
+        values = clean_numeric_column(df[column][valid]).to_numpy() if column in df.columns else np.zeros(len(groups))
+        if how == 'mean':
+            # Only positive values count towards the mean, as in safe_numeric_mean
+            positive = values > 0
+            components[f"{key}_sum"] = np.bincount(groups[positive], weights=values[positive], minlength=size).reshape(shape)
+            components[f"{key}_count"] = np.bincount(groups[positive], minlength=size).reshape(shape)
+        else:
+            # bincount accumulates in row order, matching safe_numeric_sum's rounding
+            components[f"{key}_sum"] = np.bincount(groups, weights=values, minlength=size).reshape(shape)
+
+    return list(campaign_names), list(week_starts), components
+
+def weekly_metrics_from_components(components, i, j):
+    """Turn the additive components of one (campaign, week) cell into the report's metric dict"""
+    metrics = {}
+    for key, _, how in WEEKLY_METRICS:
+        total = float(components[f"{key}_sum"][i, j])
+        if how == 'mean':
+            count = int(components[f"{key}_count"][i, j])
+            metrics[key] = round(total / count, 2) if count else 0
+        elif key in DECIMAL_SUM_METRICS:
+            metrics[key] = round(total, 2)
+        else:
+            metrics[key] = int(total)
+    return metrics
+
+def aggregate_campaign_weeks(df, weeks, kpis=None):
+    """Build the nested ``campaigns[campaign][week]`` metrics dict in a single grouped pass.
+
+    ``df`` needs ``Campaign Name`` and ``Week_Start`` columns; only weeks listed in
+    ``weeks`` (YYYY-MM-DD labels) are emitted, and every campaign gets an entry.
+    """
+    return campaigns_from_components(*campaign_week_components(df), weeks, kpis=kpis)
+
+def campaigns_from_components(campaign_names, week_starts, components, weeks, kpis=None):
+    """Nested ``campaigns[campaign][week]`` metrics for the ``weeks`` labels out of weekly components.
+
+    ``kpis`` names derived KPIs (see KPI_EXPRESSIONS) to add to every week's metrics.
+    """
+    week_index = {pd.Timestamp(w).strftime('%Y-%m-%d'): j for j, w in enumerate(week_starts)}
+    rows = components["rows"]
+    derived = evaluate_kpis(component_metric_arrays(components), kpis) if kpis else {}
+
+    campaigns = {}
+    for i, campaign in enumerate(campaign_names):
+        campaigns[campaign] = {}
+        for week in weeks:
+            j = week_index.get(week)
+            if j is not None and rows[i, j]:
+                campaigns[campaign][week] = weekly_metrics_from_components(components, i, j)
+                for name, values in derived.items():
+                    campaigns[campaign][week][name] = round(float(values[i, j]), 2)
+    return campaigns
+
+def fetch_daily_comparison_data(tab_values=None):
+    """Fetch and process daily comparison data for Luma campaigns
+
+    ``tab_values`` may hold rows already fetched by ``fetch_report_tabs``; otherwise the
+    performance and conversion tabs are fetched together in one batch request.
+    """
+    return fetch_account_comparison_data("luma", tab_values)
+
+def fetch_conversion_action_data(all_data=None):
     """Fetch conversion action data from the Luma sheet (original working version)"""
     try:
         print("🚀 Starting conversion action data fetch...")
         
-        b64_key = os.getenv("GOOGLE_CREDENTIALS_B64")
-        if not b64_key:
-            raise ValueError("Missing GOOGLE_CREDENTIALS_B64 environment variable")
+        tab_values = None if all_data is None else {CONVERSION_SHEET_NAME: all_data}
+        df = load_report_frames([CONVERSION_SHEET_NAME], tab_values, windows={CONVERSION_SHEET_NAME: 7})[CONVERSION_SHEET_NAME]
+        return recent_conversion_records(df)
+        
+    except Exception as e:
+        print(f"❌ Error in fetch_conversion_action_data: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
 
-        key_data = base64.b64decode(b64_key).decode("utf-8")
-        creds_dict = json.loads(key_data)
+def _is_conversion_data_row(row):
+    return len(row) > 1 and any(char.isdigit() for char in str(row[0])) and bool(str(row[1]).strip())
 
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
+def _detect_conversion_schema(all_data):
+    """Find the first Luma conversion data row; the row above it holds the headers"""
+    for i, row in enumerate(all_data):
+        if _is_conversion_data_row(row):
+            print(f"🎯 Found conversion data starting at row {i}: {row}")
+            # Use the row before data as headers
+            if i > 0:
+                headers = [str(col).strip() for col in all_data[i - 1]]
+            else:
+                headers = ['Date', 'Campaign Name', 'Conversions', 'Conversion Action Name']
+            return (i - 1 if i > 0 else None), i, headers
+    return None
 
-        sheet = client.open_by_key(SHEET_ID).worksheet(CONVERSION_SHEET_NAME)
-        all_data = sheet.get_all_values()
-        
+def parse_conversion_action_rows(all_data):
+    """Parse raw Luma conversion tab rows into a DataFrame with a ``date_parsed`` column"""
+    try:
         print(f"📊 Conversion data rows loaded: {len(all_data)}")
         
         if len(all_data) < 3:
             print("⚠️ Not enough conversion data rows found")
-            return []
+            return pd.DataFrame()
         
         # Look for the actual data - skip header rows
-        data_start_row = None
-        for i, row in enumerate(all_data):
-            if len(row) > 1 and any(char.isdigit() for char in str(row[0])) and str(row[1]).strip():
-                data_start_row = i
-                print(f"🎯 Found conversion data starting at row {i}: {row}")
-                break
+        schema = resolve_tab_schema("conversions", all_data, _detect_conversion_schema, _is_conversion_data_row)
         
-        if data_start_row is None:
+        if schema is None:
             print("⚠️ Could not find conversion data rows")
-            return []
-        
-        # Use the row before data as headers
-        if data_start_row > 0:
-            headers = all_data[data_start_row - 1]
-        else:
-            headers = ['Date', 'Campaign Name', 'Conversions', 'Conversion Action Name']
+            return pd.DataFrame()
         
-        data_rows = all_data[data_start_row:]
+        headers = schema["headers"]
+        data_rows = all_data[schema["data_start"]:]
         
         # Filter out empty rows
         valid_data_rows = []
@@ -319,114 +1750,120 @@ def fetch_conversion_action_data():
         
         if not valid_data_rows:
             print("⚠️ No valid conversion data rows found after filtering")
-            return []
+            return pd.DataFrame()
         
         df = pd.DataFrame(valid_data_rows, columns=headers)
         df.columns = [str(col).strip() for col in df.columns]
         
         print(f"✅ Created conversion DataFrame with {len(df)} rows")
         
-        # Get last 7 days of conversion data
+        # Parse conversion dates
         df_copy = df.copy()
         df_copy = df_copy[df_copy.iloc[:, 0].notna() & (df_copy.iloc[:, 0] != '')]
-        df_copy['date_parsed'] = pd.to_datetime(df_copy.iloc[:, 0], errors='coerce')
+        df_copy['date_parsed'] = parse_dates(df_copy.iloc[:, 0], schema)
         df_copy = df_copy.dropna(subset=['date_parsed'])
         
         if len(df_copy) == 0:
             print("❌ No valid conversion dates found")
-            return []
-        
-        # Get last 7 days
-        from datetime import datetime, timedelta
-        today = datetime.now().date()
-        seven_days_ago = today - timedelta(days=7)
-        
-        recent_data = df_copy[df_copy['date_parsed'].dt.date >= seven_days_ago]
         
-        print(f"✅ Processed {len(recent_data)} conversion rows from last 7 days")
-        
-        return recent_data.to_dict('records')
+        return compact_conversion_frame(df_copy)
         
     except Exception as e:
-        print(f"❌ Error in fetch_conversion_action_data: {e}")
+        print(f"❌ Error in parse_conversion_action_rows: {e}")
         import traceback
         traceback.print_exc()
+        return pd.DataFrame()
+
+def recent_conversion_records(df, days=7, label=""):
+    """Return the last ``days`` days of a parsed conversion frame as a list of records"""
+    if df is None or df.empty or 'date_parsed' not in df.columns:
         return []
+    
+    from datetime import datetime, timedelta
+    today = datetime.now().date()
+    window_start = today - timedelta(days=days)
+    
+    recent_data = df[df['date_parsed'].dt.date >= window_start]
+    
+    print(f"✅ Processed {len(recent_data)} {label + ' ' if label else ''}conversion rows from last {days} days")
+    
+    return recent_data.to_dict('records')
 
-def fetch_keynote_conversion_action_data():
+def fetch_keynote_conversion_action_data(sheet_data=None):
     """Fetch conversion action data from the Keynote sheet (adapted from working Luma version)"""
     try:
         print("🚀 Starting Keynote conversion action data fetch...")
         
-        b64_key = os.getenv("GOOGLE_CREDENTIALS_B64")
-        if not b64_key:
-            print("❌ Missing GOOGLE_CREDENTIALS_B64 environment variable")
-            return []
-
-        key_data = base64.b64decode(b64_key).decode("utf-8")
-        creds_dict = json.loads(key_data)
-
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-
         # Try the exact sheet name from your screenshot
-        keynote_conversion_sheet = "Daily Ad Group Conversion Action Report Keynote"
-        
-        try:
-            print(f"🔍 Trying sheet: {keynote_conversion_sheet}")
-            sheet = client.open_by_key(SHEET_ID).worksheet(keynote_conversion_sheet)
-            sheet_data = sheet.get_all_values()
-            print(f"✅ Found sheet: {keynote_conversion_sheet}")
-        except gspread.WorksheetNotFound:
+        keynote_conversion_sheet = KEYNOTE_CONVERSION_SHEET_NAME
+        tab_values = None if sheet_data is None else {keynote_conversion_sheet: sheet_data}
+        df = load_report_frames([keynote_conversion_sheet], tab_values, windows={keynote_conversion_sheet: 7})[keynote_conversion_sheet]
+        if df is None:
             print(f"❌ Sheet not found: {keynote_conversion_sheet}")
             return []
         
+        return keynote_recent_conversion_records(df)
+        
+    except Exception as e:
+        print(f"❌ Error in fetch_keynote_conversion_action_data: {e}")
+        import traceback
+        traceback.print_exc()
+        return []
+
+# Keynote conversion data-row heuristics, tried in order: (test, first row to scan)
+_KEYNOTE_DATA_ROW_TESTS = [
+    # Rows with dates (2025-)
+    (lambda row: len(row) > 0 and '2025-' in str(row[0]), 0),
+    # Rows with digits in the first column
+    (lambda row: len(row) > 2 and any(char.isdigit() for char in str(row[0])) and bool(str(row[2]).strip()), 0),
+    # Any filled row after the first one
+    (lambda row: len(row) >= 4 and bool(str(row[0]).strip() and str(row[2]).strip() and str(row[3]).strip()), 1)
+]
+
+def _is_keynote_conversion_data_row(row):
+    return any(test(row) for test, _ in _KEYNOTE_DATA_ROW_TESTS)
+
+def _detect_keynote_conversion_schema(sheet_data):
+    """Find the first Keynote conversion data row; the row above it holds the headers"""
+    for test, first_row in _KEYNOTE_DATA_ROW_TESTS:
+        for i in range(first_row, len(sheet_data)):
+            if not test(sheet_data[i]):
+                continue
+            print(f"🎯 Found Keynote conversion data starting at row {i}: {sheet_data[i]}")
+            # Use the row before data as headers, or create standard headers based on your screenshot
+            if i > 0:
+                headers = sheet_data[i - 1]
+                print(f"📋 Headers from sheet: {headers}")
+            else:
+                headers = ['Date', 'Conversion Action Name', 'Campaign Name', 'Conversions']
+                print(f"📋 Using default headers: {headers}")
+            # Ensure headers match data structure
+            if len(headers) < 4:
+                headers = ['Date', 'Conversion Action Name', 'Campaign Name', 'Conversions']
+            return (i - 1 if i > 0 else None), i, [str(col).strip() for col in headers]
+    return None
+
+def parse_keynote_conversion_action_rows(sheet_data):
+    """Parse raw Keynote conversion tab rows into a DataFrame with a ``date_parsed`` column"""
+    try:
         print(f"📊 Keynote conversion data rows loaded: {len(sheet_data)}")
         
         if len(sheet_data) < 2:
             print("⚠️ Not enough Keynote conversion data rows found")
-            return []
+            return pd.DataFrame()
         
         # Look for the actual data - try different approaches
-        data_start_row = None
+        schema = resolve_tab_schema(
+            "keynote_conversions", sheet_data, _detect_keynote_conversion_schema, _is_keynote_conversion_data_row
+        )
         
-        # First approach: Look for rows with dates (2025-)
-        for i, row in enumerate(sheet_data):
-            if len(row) > 0 and '2025-' in str(row[0]):
-                data_start_row = i
-                print(f"🎯 Found Keynote conversion data starting at row {i}: {row}")
-                break
-        
-        # Second approach: Look for rows with digits in first column
-        if data_start_row is None:
-            for i, row in enumerate(sheet_data):
-                if len(row) > 2 and any(char.isdigit() for char in str(row[0])) and str(row[2]).strip():
-                    data_start_row = i
-                    print(f"🎯 Found Keynote conversion data starting at row {i}: {row}")
-                    break
-        
-        # Third approach: Skip first row and look for data
-        if data_start_row is None:
-            for i, row in enumerate(sheet_data[1:], 1):  # Start from row 1
-                if len(row) >= 4 and str(row[0]).strip() and str(row[2]).strip() and str(row[3]).strip():
-                    data_start_row = i
-                    print(f"🎯 Found Keynote conversion data starting at row {i}: {row}")
-                    break
-        
-        if data_start_row is None:
+        if schema is None:
             print("⚠️ Could not find Keynote conversion data rows")
             print(f"📋 Sample rows: {sheet_data[:5]}")
-            return []
-        
-        # Use the row before data as headers, or create standard headers based on your screenshot
-        if data_start_row > 0:
-            headers = sheet_data[data_start_row - 1]
-            print(f"📋 Headers from sheet: {headers}")
-        else:
-            headers = ['Date', 'Conversion Action Name', 'Campaign Name', 'Conversions']
-            print(f"📋 Using default headers: {headers}")
+            return pd.DataFrame()
         
+        headers = schema["headers"]
+        data_start_row = schema["data_start"]
         data_rows = sheet_data[data_start_row:]
         
         # Filter out empty rows - based on your screenshot structure
@@ -444,11 +1881,7 @@ def fetch_keynote_conversion_action_data():
         if not valid_data_rows:
             print("⚠️ No valid Keynote conversion data rows found after filtering")
             print(f"📋 Sample data rows: {data_rows[:3]}")
-            return []
-        
-        # Ensure headers match data structure
-        if len(headers) < 4:
-            headers = ['Date', 'Conversion Action Name', 'Campaign Name', 'Conversions']
+            return pd.DataFrame()
         
         df = pd.DataFrame(valid_data_rows, columns=headers[:len(valid_data_rows[0])] if valid_data_rows else headers)
         df.columns = [str(col).strip() for col in df.columns]
@@ -457,164 +1890,470 @@ def fetch_keynote_conversion_action_data():
         print(f"📋 Keynote conversion columns: {list(df.columns)}")
         print(f"📊 Sample Keynote conversion data: {df.head(3).to_dict('records') if len(df) > 0 else 'No data'}")
         
-        # Get last 7 days of conversion data
+        # Parse conversion dates
         df_copy = df.copy()
         df_copy = df_copy[df_copy.iloc[:, 0].notna() & (df_copy.iloc[:, 0] != '')]
-        df_copy['date_parsed'] = pd.to_datetime(df_copy.iloc[:, 0], errors='coerce')
+        df_copy['date_parsed'] = parse_dates(df_copy.iloc[:, 0], schema)
         df_copy = df_copy.dropna(subset=['date_parsed'])
         
         if len(df_copy) == 0:
             print("❌ No valid Keynote conversion dates found")
             print(f"📅 Raw date samples: {df.iloc[:3, 0].tolist() if len(df) > 0 else 'No data'}")
-            return []
-        
-        # Get last 7 days
-        from datetime import datetime, timedelta
-        today = datetime.now().date()
-        seven_days_ago = today - timedelta(days=7)
-        
-        recent_data = df_copy[df_copy['date_parsed'].dt.date >= seven_days_ago]
         
-        print(f"✅ Processed {len(recent_data)} Keynote conversion rows from last 7 days")
-        print(f"📊 Recent Keynote conversions: {recent_data[['date_parsed', df_copy.columns[2], df_copy.columns[3]]].head().to_dict('records') if len(recent_data) > 0 else 'No recent data'}")
-        
-        return recent_data.to_dict('records')
+        return compact_conversion_frame(df_copy)
         
     except Exception as e:
-        print(f"❌ Error in fetch_keynote_conversion_action_data: {e}")
+        print(f"❌ Error in parse_keynote_conversion_action_rows: {e}")
         import traceback
         traceback.print_exc()
-        return []
+        return pd.DataFrame()
 
-def fetch_keynote_comparison_data():
+def keynote_recent_conversion_records(df, days=7):
+    """Return the last ``days`` days of Keynote conversions as a list of records"""
+    recent_data = recent_conversion_records(df, days=days, label="Keynote")
+    if recent_data:
+        columns = ['date_parsed', df.columns[2], df.columns[3]]
+        print(f"📊 Recent Keynote conversions: {[{c: row[c] for c in columns} for row in recent_data[:5]]}")
+    return recent_data
+
+def fetch_keynote_comparison_data(tab_values=None):
     """
     Fetch Keynote campaign data for daily comparison from the Keynote sheet tab
     """
+    return fetch_account_comparison_data("keynote", tab_values)
+
+def fetch_keynote_conversion_data():
+    """Fetch conversion data specifically for Keynote campaigns (deprecated - use fetch_keynote_conversion_action_data)"""
+    return fetch_keynote_conversion_action_data()
+
+# Parser used for each report tab when loading it into a frame
+TAB_PARSERS = {
+    SHEET_NAME: parse_campaign_rows,
+    CONVERSION_SHEET_NAME: parse_conversion_action_rows,
+    KEYNOTE_SHEET_NAME: parse_campaign_rows,
+    KEYNOTE_CONVERSION_SHEET_NAME: parse_keynote_conversion_action_rows
+}
+
+# Conversion tab layouts: (parser, recent-records builder)
+CONVERSION_LAYOUTS = {
+    "luma": (parse_conversion_action_rows, recent_conversion_records),
+    "keynote": (parse_keynote_conversion_action_rows, keynote_recent_conversion_records)
+}
+
+ACCOUNT_DEFAULTS = {
+    "sheet_id": SHEET_ID,
+    "conversion_layout": "luma",
+    "window_days": 28,
+    "max_weeks": None,
+    "conversion_days": 7,
+    "conversions_key": "conversion_actions",
+    "kpis": []
+}
+
+# Report accounts: one entry per client (spreadsheet, tabs, window and email theme)
+REPORT_ACCOUNTS = {
+    "luma": dict(ACCOUNT_DEFAULTS,
+        theme="Luma",
+        performance_tab=SHEET_NAME,
+        conversion_tab=CONVERSION_SHEET_NAME
+    ),
+    "keynote": dict(ACCOUNT_DEFAULTS,
+        theme="Keynote",
+        performance_tab=KEYNOTE_SHEET_NAME,
+        conversion_tab=KEYNOTE_CONVERSION_SHEET_NAME,
+        conversion_layout="keynote",
+        max_weeks=4,
+        conversions_key="conversions"
+    )
+}
+
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+
+def register_account(account_id, **config):
+    """Add (or replace) a report account; unspecified settings use ACCOUNT_DEFAULTS"""
+    missing = [key for key in ("performance_tab", "conversion_tab") if key not in config]
+    if missing:
+        raise ValueError(f"Account {account_id} is missing {', '.join(missing)}")
+    if config.get("conversion_layout", "luma") not in CONVERSION_LAYOUTS:
+        raise ValueError(f"Unknown conversion layout for {account_id}: {config['conversion_layout']}")
+    unknown_kpis = [kpi for kpi in config.get("kpis", []) if kpi not in KPI_EXPRESSIONS]
+    if unknown_kpis:
+        raise ValueError(f"Unknown KPIs for {account_id}: {', '.join(unknown_kpis)}")
+
+    account = dict(ACCOUNT_DEFAULTS, theme=account_id.title())
+    account.update(config)
+    REPORT_ACCOUNTS[account_id] = account
+    if account["performance_tab"] not in APPEND_ONLY_TABS:
+        APPEND_ONLY_TABS.append(account["performance_tab"])
+    return account
+
+def load_account_registry(path=None):
+    """Register extra accounts from a JSON file mapping account id -> settings"""
+    path = path or os.getenv("REPORT_ACCOUNTS_FILE")
+    if not path:
+        return REPORT_ACCOUNTS
+    with open(path, "r", encoding="utf-8") as f:
+        accounts = json.load(f)
+    for account_id, config in accounts.items():
+        register_account(account_id, **config)
+    print(f"📇 Registered {len(accounts)} accounts from {path}")
+    return REPORT_ACCOUNTS
+
+if os.getenv("REPORT_ACCOUNTS_FILE"):
+    load_account_registry()
+
+def get_account(account_id):
+    """Return the registry entry for an account id"""
     try:
-        print("🚀 Starting Keynote daily comparison data fetch...")
-        
-        # Use the Keynote-specific sheet name
-        keynote_sheet_name = "Daily Ad Group Performance Report Keynote"
-        
-        # Load data from the Keynote sheet
-        df = load_campaign_data(sheet_name=keynote_sheet_name)
-        
-        if df is None or df.empty:
-            print(f"❌ No data found in {keynote_sheet_name} sheet")
-            return {"campaigns": {}, "weeks": []}
-        
-        print(f"✅ Loaded {len(df)} rows from Keynote sheet")
-        print(f"📋 Available columns: {list(df.columns)}")
-        
-        # Process the data using similar logic to fetch_daily_comparison_data
-        from datetime import datetime, timedelta
-        
-        # Convert Date column to datetime
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df = df.dropna(subset=['Date'])
-        
-        if df.empty:
-            print("❌ No valid dates in Keynote data")
-            return {"campaigns": {}, "weeks": []}
-        
-        # Get last 4 weeks of data
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=28)
-        recent_df = df[df['Date'] >= start_date].copy()
-        
-        if recent_df.empty:
-            print("❌ No recent Keynote data found in last 4 weeks")
-            return {"campaigns": {}, "weeks": []}
-        
-        # Group by week
-        recent_df['Week_Start'] = recent_df['Date'].dt.to_period('W').dt.start_time
-        weeks = sorted(recent_df['Week_Start'].dt.strftime('%Y-%m-%d').unique())
-        
-        # Take only last 4 weeks
-        weeks = weeks[-4:] if len(weeks) > 4 else weeks
-        
-        print(f"📅 Processing {len(weeks)} weeks: {weeks}")
-        
-        # Process campaigns
-        campaigns = {}
-        for campaign in recent_df['Campaign Name'].unique():
-            if not campaign or pd.isna(campaign):
-                continue
-                
-            campaign_data = recent_df[recent_df['Campaign Name'] == campaign]
-            campaigns[campaign] = {}
-            
-            for week in weeks:
-                week_data = campaign_data[campaign_data['Week_Start'].dt.strftime('%Y-%m-%d') == week]
-                if not week_data.empty:
-                    campaigns[campaign][week] = {
-                        'impressions': int(safe_numeric_sum(week_data['Impressions'])),
-                        'clicks': int(safe_numeric_sum(week_data['Clicks'])),
-                        'ctr': round(safe_numeric_mean(week_data['Ctr']), 2),
-                        'conversions': int(safe_numeric_sum(week_data['Conversions'])),
-                        'search_impression_share': round(safe_numeric_mean(week_data['Search Impression Share']), 2),
-                        'cost_per_conversion': round(safe_numeric_mean(week_data['Cost Per Conversion']), 2),
-                        'cost_micros': round(safe_numeric_sum(week_data['Cost Micros']), 2),
-                        'phone_calls': int(safe_numeric_sum(week_data['Phone Calls']))
-                    }
-        
-        # Also fetch conversion data for the return structure
-        try:
-            conversion_df = fetch_keynote_conversion_data()
-            print(f"🔄 Keynote conversion data: {len(conversion_df)} rows")
-        except Exception as conv_error:
-            print(f"⚠️ Could not fetch Keynote conversions: {conv_error}")
-            conversion_df = pd.DataFrame()
-        
-        result = {
-            "campaigns": campaigns, 
-            "weeks": weeks,
-            "conversions": conversion_df  # Add conversion data to result
-        }
-        print(f"✅ Keynote comparison data ready: {len(campaigns)} campaigns, {len(weeks)} weeks")
-        return result
-        
+        return REPORT_ACCOUNTS[account_id]
+    except KeyError:
+        raise ValueError(f"Unknown report account: {account_id}")
+
+def _empty_account_result(account):
+    return {"campaigns": {}, "weeks": [], account["conversions_key"]: []}
+
+async def fetch_account_comparison_data_async(account_id, tab_values=None, timings=None, source=None):
+    """Async ``fetch_account_comparison_data``: tabs load on the event loop, processing on a worker thread"""
+    account = get_account(account_id)
+    label = account["theme"]
+    performance_tab = account["performance_tab"]
+    conversion_tab = account["conversion_tab"]
+    parse_conversions, _ = CONVERSION_LAYOUTS[account["conversion_layout"]]
+    timings = {} if timings is None else timings
+    started = time.perf_counter()
+
+    try:
+        print(f"🚀 Starting {label} daily comparison data fetch...")
+        
+        frames = await load_report_frames_async(
+            [performance_tab, conversion_tab], tab_values, sheet_id=account["sheet_id"],
+            parsers={performance_tab: parse_campaign_rows, conversion_tab: parse_conversions},
+            source=source,
+            windows={conversion_tab: account["conversion_days"]}
+        )
+        timings["load"] = time.perf_counter() - started
+        return await asyncio.to_thread(build_account_comparison, account, frames, timings)
+        
+    except SheetsApiError as e:
+        # Quota or server errors that outlived every retry: fail the account instead of reporting no data
+        print(f"❌ Sheets API unavailable for {label}: {e}")
+        raise
     except Exception as e:
-        print(f"❌ Error in fetch_keynote_comparison_data: {e}")
+        print(f"❌ Error in fetch_account_comparison_data ({label}): {e}")
         import traceback
         traceback.print_exc()
-        return {"campaigns": {}, "weeks": [], "conversions": pd.DataFrame()}
+        return _empty_account_result(account)
+    finally:
+        timings["total"] = time.perf_counter() - started
 
-def fetch_keynote_conversion_data():
-    """Fetch conversion data specifically for Keynote campaigns (deprecated - use fetch_keynote_conversion_action_data)"""
-    return fetch_keynote_conversion_action_data()
+def build_account_comparison(account, frames, timings=None):
+    """Weekly campaign comparison and recent conversions from an account's loaded frames"""
+    label = account["theme"]
+    performance_tab = account["performance_tab"]
+    conversion_tab = account["conversion_tab"]
+    _, recent_records = CONVERSION_LAYOUTS[account["conversion_layout"]]
+    timings = {} if timings is None else timings
+
+    df = frames[performance_tab]
+    if df is None or df.empty:
+        print(f"❌ No data found in {performance_tab} sheet")
+        return _empty_account_result(account)
+    
+    print(f"✅ Loaded {len(df)} rows from {label} sheet")
+    
+    # Process dates and filter for the reporting window
+    stage_started = time.perf_counter()
+    df['Date'] = parse_dates(df['Date'])
+    df = df.dropna(subset=['Date'])
+    
+    start_date = datetime.datetime.now() - datetime.timedelta(days=account["window_days"])
+    recent_df = df[df['Date'] >= start_date].copy()
+    
+    if recent_df.empty:
+        print(f"❌ No recent {label} data found in last {account['window_days']} days")
+        return _empty_account_result(account)
+    
+    # Group by week
+    recent_df['Week_Start'] = week_start(recent_df['Date'])
+    weeks = week_labels(recent_df['Week_Start'])
+    if account["max_weeks"]:
+        weeks = weeks[-account["max_weeks"]:]
+    
+    print(f"📅 Processing {len(weeks)} weeks: {weeks}")
+    
+    campaigns = aggregate_campaign_weeks(recent_df, weeks, kpis=account["kpis"])
+    timings["aggregate"] = time.perf_counter() - stage_started
+    
+    # Conversion actions for the last few days
+    stage_started = time.perf_counter()
+    conversion_frame = frames[conversion_tab]
+    if conversion_frame is None:
+        print(f"❌ Sheet not found: {conversion_tab}")
+        conversions = []
+    else:
+        conversions = recent_records(conversion_frame, days=account["conversion_days"])
+    timings["conversions"] = time.perf_counter() - stage_started
+    
+    # Spend spikes, CTR collapses and conversion drops over the daily series
+    stage_started = time.perf_counter()
+    anomalies = detect_anomalies(df)
+    timings["anomalies"] = time.perf_counter() - stage_started
+    
+    print(f"✅ {label} comparison data ready: {len(campaigns)} campaigns, {len(weeks)} weeks, {len(anomalies)} anomalies")
+    
+    return {
+        "campaigns": campaigns,
+        "weeks": weeks,
+        account["conversions_key"]: conversions,
+        "anomalies": anomalies
+    }
+
+def fetch_account_comparison_data(account_id, tab_values=None, timings=None, source=None):
+    """Fetch and process the weekly comparison data for one registered account.
+
+    Returns ``{"campaigns", "weeks", <conversions_key>}``. Pass a dict as ``timings``
+    to collect per-stage durations in seconds, and ``source`` to read the tabs from a
+    data source other than the default one.
+    """
+    return _run_sync(fetch_account_comparison_data_async(account_id, tab_values, timings=timings, source=source))
+
+async def run_report_pipeline_async(account_ids=None, max_workers=None, source=None):
+    """Async ``run_report_pipeline``: every account's tabs are fetched concurrently on one loop"""
+    account_ids = list(account_ids or REPORT_ACCOUNTS)
+    max_workers = max(1, min(max_workers or PIPELINE_MAX_WORKERS, len(account_ids) or 1))
+    print(f"🏭 Running report pipeline for {len(account_ids)} accounts, {max_workers} at a time")
+    started = time.perf_counter()
+    rate_before = get_sheets_rate_stats()
+    slots = asyncio.Semaphore(max_workers)
+
+    async def run_account(account_id):
+        timings = {}
+        try:
+            async with slots:
+                data = await fetch_account_comparison_data_async(account_id, timings=timings, source=source)
+            return {"data": data, "timings": timings, "error": None}
+        except Exception as e:
+            return {"data": None, "timings": timings, "error": str(e)}
+
+    results = dict(zip(account_ids, await asyncio.gather(*(run_account(account_id) for account_id in account_ids))))
+
+    elapsed = time.perf_counter() - started
+    for account_id, result in results.items():
+        status = "❌ " + result["error"] if result["error"] else "✅"
+        print(f"   {status} {account_id}: {result['timings'].get('total', 0):.2f}s")
+    rate = {key: value - rate_before[key] for key, value in get_sheets_rate_stats().items() if key in SHEETS_RATE_STATS}
+    print(f"🚦 Sheets quota: {rate['requests']} requests, {rate['throttled']} queued "
+          f"({rate['queue_wait_seconds']:.1f}s total wait), {rate['retries']} retries, {rate['exhausted']} gave up")
+    print(f"🏁 Pipeline finished in {elapsed:.2f}s")
+    return results
+
+def run_report_pipeline(account_ids=None, max_workers=None, source=None):
+    """Build comparison data for many accounts concurrently.
+
+    Returns ``{account_id: {"data": ..., "timings": {...}, "error": None or str}}``.
+    Accounts run independently, so one failing account never blocks the others;
+    at most ``max_workers`` are in flight at once, and Sheets requests are further
+    capped by SHEETS_ASYNC_CONCURRENCY. ``source`` reads every account from one data
+    source (e.g. a local export replay).
+    """
+    return _run_sync(run_report_pipeline_async(account_ids, max_workers=max_workers, source=source))
+
+def build_campaign_history(df):
+    """Index a performance frame for date-range queries (see ``query_campaign_history``).
+
+    Rows with a valid date are kept sorted by date, and again grouped by campaign (then
+    date), so every window is one ``searchsorted`` pair and a slice of one of the two.
+    """
+    dates = parse_dates(df['Date'])
+    valid = dates.notna().to_numpy()
+    frame = df[valid].assign(Date=dates[valid])
+    nanos = frame['Date'].to_numpy().astype('datetime64[ns]').view('i8')
+
+    by_date = np.argsort(nanos, kind='stable')
+    campaign_codes, campaign_names = pd.factorize(frame['Campaign Name'].astype(object), use_na_sentinel=False)
+    by_campaign = np.lexsort((nanos, campaign_codes))
+    sorted_codes = campaign_codes[by_campaign]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(campaign_names) + 1))
+    return {
+        "by_date": frame.take(by_date),
+        "dates": nanos[by_date],
+        "by_campaign": frame.take(by_campaign),
+        "campaign_dates": nanos[by_campaign],
+        "campaigns": {name: (int(bounds[i]), int(bounds[i + 1])) for i, name in enumerate(campaign_names)}
+    }
+
+def _history_bounds(nanos, start, end):
+    """Positions of the first and past-the-last sorted date inside [start, end]"""
+    lo = np.searchsorted(nanos, pd.Timestamp(start).value, side='left') if start is not None else 0
+    hi = np.searchsorted(nanos, pd.Timestamp(end).value, side='right') if end is not None else len(nanos)
+    return int(lo), int(max(lo, hi))
+
+def query_campaign_history(history, start=None, end=None, campaigns=None):
+    """Rows of a ``build_campaign_history`` index dated in [start, end], both inclusive.
+
+    ``campaigns`` restricts the rows to one campaign name or a list of them. Without a
+    filter, or for a single campaign, the result is a slice of the index (no copy);
+    several campaigns are concatenated in the order given.
+    """
+    if campaigns is None:
+        lo, hi = _history_bounds(history["dates"], start, end)
+        return history["by_date"].iloc[lo:hi]
+
+    parts = []
+    for campaign in [campaigns] if isinstance(campaigns, str) else campaigns:
+        block = history["campaigns"].get(campaign)
+        if block is None:
+            continue
+        lo, hi = _history_bounds(history["campaign_dates"][block[0]:block[1]], start, end)
+        parts.append(history["by_campaign"].iloc[block[0] + lo:block[0] + hi])
+    if not parts:
+        return history["by_date"].iloc[0:0]
+    return parts[0] if len(parts) == 1 else pd.concat(parts)
 
 # Additional utility functions
-def get_date_range_data(df_all, target_date, days_back=7):
-    """Get data for a specific date range"""
+def get_date_range_data(df_all, target_date, days_back=7, history=None):
+    """Get data for a specific date range
+
+    Pass a ``build_campaign_history`` index as ``history`` to answer repeated queries on
+    the same frame without re-parsing or scanning it (rows then come back sorted by
+    date). Without one, a single query is a plain date mask in the frame's row order.
+    """
     try:
         if df_all.empty:
             return pd.DataFrame()
         
-        from datetime import datetime, timedelta
+        from datetime import timedelta
         
         end_date = pd.to_datetime(target_date)
         start_date = end_date - timedelta(days=days_back)
         
-        df_all['Date'] = pd.to_datetime(df_all['Date'], errors='coerce')
-        filtered_df = df_all[(df_all['Date'] >= start_date) & (df_all['Date'] <= end_date)]
+        if history is not None:
+            return query_campaign_history(history, start_date, end_date)
         
-        return filtered_df
+        # One query doesn't pay for sorting an index - filter the rows directly
+        dates = parse_dates(df_all['Date'])
+        in_range = ((dates >= start_date) & (dates <= end_date)).to_numpy()
+        return df_all[in_range].assign(Date=dates[in_range])
         
     except Exception as e:
         print(f"❌ Error in get_date_range_data: {e}")
         return pd.DataFrame()
 
-def add_kpis(df):
-    """Add calculated KPIs to the dataframe"""
+def safe_divide(numerator, denominator):
+    """Element-wise division that gives 0 wherever the denominator is 0 (never inf or NaN)"""
+    numerator, denominator = np.broadcast_arrays(np.asarray(numerator, dtype='float64'), np.asarray(denominator, dtype='float64'))
+    result = np.zeros(numerator.shape)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result
+
+_KPI_BINARY_OPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: safe_divide}
+_KPI_UNARY_OPS = {ast.USub: np.negative, ast.UAdd: np.positive}
+_KPI_COMPARE_OPS = {ast.Gt: np.greater, ast.GtE: np.greater_equal, ast.Lt: np.less, ast.LtE: np.less_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal}
+_KPI_FUNCTIONS = {'where': np.where, 'abs': np.abs, 'min': np.minimum, 'max': np.maximum}
+
+def compile_kpi_expression(expression):
+    """Compile a KPI expression into a function of ``lookup(name) -> values``.
+
+    Only numbers, metric/KPI names, + - * /, one comparison and the _KPI_FUNCTIONS are
+    accepted; anything else raises ValueError, so expressions can come from config.
+    """
+    try:
+        tree = ast.parse(expression, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"Invalid KPI expression {expression!r}: {e}")
+
+    def build(node):
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = float(node.value)
+            return lambda lookup: value
+        if isinstance(node, ast.Name):
+            name = node.id
+            return lambda lookup: lookup(name)
+        if isinstance(node, ast.BinOp) and type(node.op) in _KPI_BINARY_OPS:
+            op, left, right = _KPI_BINARY_OPS[type(node.op)], build(node.left), build(node.right)
+            return lambda lookup: op(left(lookup), right(lookup))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _KPI_UNARY_OPS:
+            op, operand = _KPI_UNARY_OPS[type(node.op)], build(node.operand)
+            return lambda lookup: op(operand(lookup))
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _KPI_COMPARE_OPS:
+            op, left, right = _KPI_COMPARE_OPS[type(node.ops[0])], build(node.left), build(node.comparators[0])
+            return lambda lookup: op(left(lookup), right(lookup))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in _KPI_FUNCTIONS and not node.keywords):
+            func, args = _KPI_FUNCTIONS[node.func.id], [build(arg) for arg in node.args]
+            return lambda lookup: func(*(arg(lookup) for arg in args))
+        raise ValueError(f"Unsupported element in KPI expression {expression!r}: {ast.unparse(node)}")
+
+    return build(tree)
+
+def register_kpi(name, expression):
+    """Add (or replace) a derived KPI, e.g. ``register_kpi("ROAS", "conversion_value / cost_micros")``"""
+    _compiled_kpis[name] = (expression, compile_kpi_expression(expression))
+    KPI_EXPRESSIONS[name] = expression
+    return name
+
+def _compiled_kpi(name):
+    expression = KPI_EXPRESSIONS[name]
+    cached = _compiled_kpis.get(name)
+    if cached is None or cached[0] != expression:
+        cached = (expression, compile_kpi_expression(expression))
+        _compiled_kpis[name] = cached
+    return cached[1]
+
+def evaluate_kpis(data, names=None):
+    """Evaluate derived KPIs (default: every registered one) over daily rows or weekly components.
+
+    ``data`` is a performance frame, whose base metrics are read from their
+    WEEKLY_METRICS columns, or a mapping of base metric keys to numbers or arrays (a
+    weekly metrics dict, ``component_metric_arrays()``). Only the requested KPIs, their
+    dependencies and the base metrics they use are computed. Returns {name: values}.
+    """
+    columns = {key: column for key, column, _ in WEEKLY_METRICS}
+    values = {}
+    evaluating = []
+
+    def lookup(name):
+        if name in values:
+            return values[name]
+        if name in KPI_EXPRESSIONS:
+            if name in evaluating:
+                raise ValueError(f"KPI {name} depends on itself: {' -> '.join(evaluating + [name])}")
+            evaluating.append(name)
+            result = np.asarray(_compiled_kpi(name)(lookup), dtype='float64')
+            evaluating.pop()
+        elif isinstance(data, pd.DataFrame):
+            if columns.get(name) not in data.columns:
+                raise ValueError(f"Unknown metric in KPI expression: {name}")
+            result = clean_numeric_column(data[columns[name]]).to_numpy()
+        elif name in data:
+            result = np.asarray(data[name], dtype='float64')
+        else:
+            raise ValueError(f"Unknown metric in KPI expression: {name}")
+        values[name] = result
+        return result
+
+    results = {}
+    for name in (names or list(KPI_EXPRESSIONS)):
+        result = lookup(name)
+        results[name] = result if result.ndim else float(result)
+    return results
+
+def component_metric_arrays(components):
+    """Base metric arrays per (campaign, week) from weekly components: sums, or non-zero means"""
+    arrays = {}
+    for key, _, how in WEEKLY_METRICS:
+        total = components[f"{key}_sum"]
+        arrays[key] = safe_divide(total, components[f"{key}_count"]) if how == 'mean' else total.astype('float64')
+    return arrays
+
+def add_kpis(df, kpis=None):
+    """Add calculated KPIs to the dataframe (default: CTR_calc, CPC and Conversion_Rate)"""
     try:
         if df.empty:
             return df
         
-        # Add calculated columns
-        df['CTR_calc'] = (df['Clicks'] / df['Impressions'] * 100).fillna(0)
-        df['CPC'] = (df['Cost Micros'] / df['Clicks']).fillna(0)
-        df['Conversion_Rate'] = (df['Conversions'] / df['Clicks'] * 100).fillna(0)
+        for name, values in evaluate_kpis(df, kpis or ['CTR_calc', 'CPC', 'Conversion_Rate']).items():
+            df[name] = values
         
         return df
         
@@ -637,12 +2376,13 @@ def generate_summary_stats(df):
         if df.empty:
             return {}
         
+        metric = {col: clean_numeric_column(df[col]) for col in ['Impressions', 'Clicks', 'Ctr', 'Conversions', 'Cost Micros']}
         return {
-            'total_impressions': df['Impressions'].sum(),
-            'total_clicks': df['Clicks'].sum(),
-            'average_ctr': df['Ctr'].mean(),
-            'total_conversions': df['Conversions'].sum(),
-            'total_cost': df['Cost Micros'].sum()
+            'total_impressions': metric['Impressions'].sum(),
+            'total_clicks': metric['Clicks'].sum(),
+            'average_ctr': metric['Ctr'].mean(),
+            'total_conversions': metric['Conversions'].sum(),
+            'total_cost': metric['Cost Micros'].sum()
         }
         
     except Exception as e:
@@ -668,34 +2408,223 @@ def format_trend_indicator(change_pct):
     else:
         return "➡️ No Change"
 
+def percentage_changes(current, previous):
+    """Element-wise ``calculate_percentage_change`` over arrays"""
+    current = np.asarray(current, dtype='float64')
+    previous = np.asarray(previous, dtype='float64')
+    changes = np.where(current == 0, 0.0, 100.0)
+    np.divide((current - previous) * 100, previous, out=changes, where=previous != 0)
+    return changes
+
+def compare_period_frames(frames, comparisons=None, top=None):
+    """Every KPI × campaign × comparison change between period frames, in one vectorized pass.
+
+    ``frames`` maps period labels to performance frames, in order; ``comparisons`` lists
+    ``(current, previous)`` label pairs and defaults to the first period against each of
+    the others. The rows of all periods are summed per (period, campaign) with one
+    ``bincount`` per column, then every KPI in COMPARISON_KPIS is derived and compared.
+
+    Returns a dict with ``periods``, ``comparisons``, ``campaigns``, ``kpis``, the
+    ``values`` (periods × KPIs × campaigns) and account ``totals`` (periods × KPIs),
+    their ``changes`` / ``total_changes`` (comparisons first) and ``movers``: campaign
+    changes ranked by absolute percentage change (first ``top`` only, if given).
+    """
+    labels = list(frames)
+    comparisons = list(comparisons or [(labels[0], label) for label in labels[1:]])
+    kpi_keys = [key for key, *_ in COMPARISON_KPIS]
+    columns = list(dict.fromkeys(col for _, _, num, den, _ in COMPARISON_KPIS for col in (num, den) if col))
+
+    frames = [frames[label] for label in labels]
+    names = [frame['Campaign Name'].astype(object).to_numpy() for frame in frames]
+    campaigns = pd.unique(np.concatenate(names)) if names else np.array([], dtype=object)
+    codes = pd.Index(campaigns).get_indexer(np.concatenate(names)) if names else np.zeros(0, dtype=np.intp)
+    periods = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    groups = periods * len(campaigns) + codes
+    shape = (len(frames), len(campaigns))
+
+    sums = {}
+    for col in columns:
+        values = np.concatenate([clean_numeric_column(frame[col]).to_numpy() if col in frame.columns else np.zeros(len(frame)) for frame in frames])
+        sums[col] = np.bincount(groups, weights=values, minlength=shape[0] * shape[1]).reshape(shape)
+
+    def kpi_values(totals):
+        result = []
+        for _, _, num, den, scale in COMPARISON_KPIS:
+            if den is None:
+                result.append(totals[num] * scale)
+            else:
+                ratio = np.zeros_like(totals[num])
+                np.divide(totals[num] * scale, totals[den], out=ratio, where=totals[den] != 0)
+                result.append(ratio)
+        return np.stack(result, axis=1)
+
+    values = kpi_values(sums)
+    totals = kpi_values({col: total.sum(axis=1) for col, total in sums.items()})
+    index = {label: i for i, label in enumerate(labels)}
+    current = [index[cur] for cur, _ in comparisons]
+    previous = [index[prev] for _, prev in comparisons]
+    changes = percentage_changes(values[current], values[previous])
+    total_changes = percentage_changes(totals[current], totals[previous])
+
+    # Rank campaign changes with enough volume to matter: biggest |change %| first, then |delta|
+    impressions = sums['Impressions'] if 'Impressions' in sums else np.zeros(shape)
+    active = (impressions[current] >= MOVER_MIN_IMPRESSIONS) | (impressions[previous] >= MOVER_MIN_IMPRESSIONS)
+    q, k, c = np.nonzero((changes != 0) & active[:, None, :])
+    deltas = values[current][q, k, c] - values[previous][q, k, c]
+    order = np.lexsort((-np.abs(deltas), -np.abs(changes[q, k, c])))
+    if top is not None:
+        order = order[:top]
+
+    movers = []
+    for i in order:
+        change = float(changes[q[i], k[i], c[i]])
+        movers.append({
+            "campaign": campaigns[c[i]],
+            "kpi": kpi_keys[k[i]],
+            "label": COMPARISON_KPIS[k[i]][1],
+            "current_period": comparisons[q[i]][0],
+            "previous_period": comparisons[q[i]][1],
+            "current": float(values[current[q[i]], k[i], c[i]]),
+            "previous": float(values[previous[q[i]], k[i], c[i]]),
+            "change_pct": change,
+            "trend": format_trend_indicator(change)
+        })
+
+    return {
+        "periods": labels,
+        "comparisons": comparisons,
+        "campaigns": list(campaigns),
+        "kpis": kpi_keys,
+        "values": values,
+        "totals": totals,
+        "changes": changes,
+        "total_changes": total_changes,
+        "movers": movers
+    }
+
+def compare_periods(df, periods, comparisons=None, top=None, history=None):
+    """``compare_period_frames`` over date ranges of one frame: ``periods`` is ``[(label, start, end)]``"""
+    history = history if history is not None else build_campaign_history(df)
+    frames = {label: query_campaign_history(history, start, end) for label, start, end in periods}
+    return compare_period_frames(frames, comparisons, top=top)
+
+def generate_period_insights(comparison, top=INSIGHT_TOP_MOVERS):
+    """Insight lines from a ``compare_period_frames`` result: account KPIs, then the top movers"""
+    insights = []
+    for q, (current, previous) in enumerate(comparison["comparisons"]):
+        suffix = f" ({current} vs {previous})" if len(comparison["comparisons"]) > 1 else ""
+        for k, (_, label, *_) in enumerate(COMPARISON_KPIS):
+            change = float(comparison["total_changes"][q, k])
+            insights.append(f"{label} {format_trend_indicator(change)}: {change:.1f}%{suffix}")
+    for mover in comparison["movers"][:top]:
+        insights.append(
+            f"{mover['campaign']} - {mover['label']} {mover['trend']}: {mover['change_pct']:.1f}% "
+            f"({mover['previous']:,.2f} → {mover['current']:,.2f}, {mover['current_period']} vs {mover['previous_period']})"
+        )
+    return insights
+
+def detect_anomalies(df, as_of=None, lookback_days=None, baseline_days=None, threshold=None):
+    """Flag spend spikes, CTR collapses and conversion drops across every campaign at once.
+
+    Daily totals go into dense (metric, campaign, day) arrays; each of the last
+    ``lookback_days`` days up to ``as_of`` (default: the latest date in ``df``) is scored
+    against the median and MAD of the ``baseline_days`` before it, for every campaign and
+    rule in one batched NumPy computation. Days without rows count as zero activity.
+    Returns JSON-ready findings ranked by absolute z-score.
+    """
+    import warnings
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    lookback_days = lookback_days or ANOMALY_LOOKBACK_DAYS
+    baseline_days = baseline_days or ANOMALY_BASELINE_DAYS
+    threshold = threshold or ANOMALY_Z_THRESHOLD
+    if df is None or df.empty:
+        return []
+
+    dates = parse_dates(df['Date']).to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(dates)
+    if not valid.any():
+        return []
+    last_day = np.datetime64(pd.Timestamp(as_of).date()) if as_of is not None else dates[valid].max()
+    n_days = baseline_days + lookback_days
+    first_day = last_day - (n_days - 1)
+    in_window = valid & (dates >= first_day) & (dates <= last_day)
+    codes, campaigns = pd.factorize(df['Campaign Name'][in_window])
+    named = (codes >= 0) & ~np.isin(codes, np.flatnonzero(np.asarray(campaigns, dtype=object) == ''))
+    if not named.any():
+        return []
+
+    keep = np.flatnonzero(in_window)[named]
+    codes = codes[named]
+    groups = codes * n_days + (dates[keep] - first_day).astype(np.int64)
+    shape = (len(campaigns), n_days)
+    daily = {}
+    for key, column in [('cost', 'Cost Micros'), ('impressions', 'Impressions'), ('clicks', 'Clicks'), ('conversions', 'Conversions')]:
+        values = clean_numeric_column(df[column].iloc[keep]).to_numpy()
+        daily[key] = np.bincount(groups, weights=values, minlength=shape[0] * shape[1]).reshape(shape)
+    daily['ctr'] = np.full(shape, np.nan)
+    np.divide(daily['clicks'] * 100, daily['impressions'], out=daily['ctr'], where=daily['impressions'] > 0)
+
+    # (rules, campaigns, days): baseline windows end the day before each scored day
+    series = np.stack([daily[metric] for _, metric, _, _ in ANOMALY_RULES])
+    windows = sliding_window_view(series, baseline_days, axis=2)[:, :, :lookback_days]
+    observed = series[:, :, baseline_days:]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN CTR baselines
+        median = np.nanmedian(windows, axis=-1)
+        mad = np.nanmedian(np.abs(windows - median[..., None]), axis=-1)
+    # 1.4826 * MAD estimates the standard deviation; flat baselines fall back to 10% of the median
+    scale = np.where(mad > 0, 1.4826 * mad, 0.1 * np.abs(median))
+    z = np.full(observed.shape, np.nan)
+    np.divide(observed - median, scale, out=z, where=scale > 0)
+
+    # Volume guards per metric, so near-empty campaigns don't produce noise
+    conversions_baseline = np.median(sliding_window_view(daily['conversions'], baseline_days, axis=1)[:, :lookback_days], axis=-1)
+    guards = {
+        'cost': daily['cost'][:, baseline_days:] >= ANOMALY_MIN_SPEND,
+        'ctr': daily['impressions'][:, baseline_days:] >= MOVER_MIN_IMPRESSIONS,
+        'conversions': conversions_baseline >= 1
+    }
+    directions = np.array([direction for _, _, direction, _ in ANOMALY_RULES], dtype='float64')[:, None, None]
+    flagged = np.nan_to_num(z * directions, nan=0.0) >= threshold
+    flagged &= np.stack([guards.get(metric, np.ones((shape[0], lookback_days), dtype=bool)) for _, metric, _, _ in ANOMALY_RULES])
+
+    r, c, d = np.nonzero(flagged)
+    order = np.argsort(-np.abs(z[r, c, d]), kind='stable')
+    anomalies = []
+    for i in order:
+        kind, metric, _, label = ANOMALY_RULES[r[i]]
+        anomalies.append({
+            "campaign": campaigns[c[i]],
+            "date": str(first_day + baseline_days + int(d[i])),
+            "kind": kind,
+            "label": label,
+            "metric": metric,
+            "value": round(float(observed[r[i], c[i], d[i]]), 2),
+            "baseline": round(float(median[r[i], c[i], d[i]]), 2),
+            "z_score": round(float(z[r[i], c[i], d[i]]), 1)
+        })
+    return anomalies
+
+def anomaly_insights(anomalies, top=INSIGHT_TOP_MOVERS):
+    """Insight lines for the strongest ``detect_anomalies`` findings"""
+    return [
+        f"⚠️ {a['label']}: {a['campaign']} on {a['date']} - {a['metric']} {a['value']:,.2f} "
+        f"vs baseline {a['baseline']:,.2f} (z {a['z_score']:+.1f})"
+        for a in anomalies[:top]
+    ]
+
 def generate_insights_with_comparison(current_df, comparison_df):
     """Generate insights by comparing current and previous periods"""
     try:
-        insights = []
-        
         if current_df.empty:
             return ["No current data available for analysis"]
         
-        current_stats = generate_summary_stats(current_df)
+        if comparison_df.empty:
+            return []
         
-        if not comparison_df.empty:
-            comparison_stats = generate_summary_stats(comparison_df)
-            
-            # Calculate changes
-            impression_change = calculate_percentage_change(
-                current_stats['total_impressions'], 
-                comparison_stats['total_impressions']
-            )
-            
-            click_change = calculate_percentage_change(
-                current_stats['total_clicks'], 
-                comparison_stats['total_clicks']
-            )
-            
-            insights.append(f"Impressions {format_trend_indicator(impression_change)}: {impression_change:.1f}%")
-            insights.append(f"Clicks {format_trend_indicator(click_change)}: {click_change:.1f}%")
-        
-        return insights
+        comparison = compare_period_frames({"current": current_df, "previous": comparison_df}, top=INSIGHT_TOP_MOVERS)
+        return generate_period_insights(comparison)
         
     except Exception as e:
         print(f"❌ Error generating insights: {e}")
@@ -728,15 +2657,17 @@ def fetch_sheet_data():
             print("❌ No current data available")
             return current_df, []
         
-        # Get comparison data (previous period)
+        # Compare the last 7 days with the 7 days before them
         from datetime import datetime, timedelta
         
-        end_date = datetime.now() - timedelta(days=7)
-        start_date = end_date - timedelta(days=7)
-        comparison_df = get_date_range_data(current_df, end_date, days_back=7)
+        now = datetime.now()
+        history = build_campaign_history(current_df)
+        recent_df = get_date_range_data(current_df, now, days_back=7, history=history)
+        comparison_df = get_date_range_data(current_df, now - timedelta(days=7), days_back=7, history=history)
         
         # Generate insights
-        insights = generate_insights_with_comparison(current_df, comparison_df)
+        insights = generate_insights_with_comparison(recent_df, comparison_df)
+        insights += anomaly_insights(detect_anomalies(current_df))
         
         if not comparison_df.empty:
             print(f"📊 Comparison data available for {len(comparison_df)} campaigns")
@@ -747,4 +2678,4 @@ def fetch_sheet_data():
         print(f"❌ Error in fetch_sheet_data: {e}")
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,249 @@
+from concurrent.futures import ThreadPoolExecutor
+from google_ads_api import REPORT_ACCOUNTS, fetch_account_comparison_data, get_account
+from daily_report import send_account_report
+from snapshot_store import acquire_lease, publish_report_snapshot, snapshot_published_at
+import datetime
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+# Report jobs run on a small in-process pool so HTTP workers return immediately
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "2"))
+# Finished jobs kept for /jobs/<id> polling (oldest are dropped first)
+JOB_HISTORY_LIMIT = 100
+
+# Stages of a report job, in run order
+REPORT_JOB_STAGES = ["fetch", "email"]
+
+# Minutes between scheduled refreshes of each account's snapshot. Off (0) by default: when
+# set, every server process polls Sheets in the background (one leader at a time)
+REFRESH_INTERVAL_MINUTES = float(os.getenv("REFRESH_INTERVAL_MINUTES", "0"))
+# Accounts the scheduler keeps fresh, comma separated (default: every registered account)
+REFRESH_ACCOUNTS = [account.strip() for account in os.getenv("REFRESH_ACCOUNTS", "").split(",") if account.strip()]
+# Seconds between scheduler checks; the lease keeps one worker in charge and lapses if it dies
+REFRESH_TICK_SECONDS = 15
+REFRESH_LEASE_SECONDS = 60
+# Failed refreshes retry after 1, 2, 4, ... minutes, never waiting longer than the interval
+REFRESH_RETRY_BASE_SECONDS = 60
+
+_executor = ThreadPoolExecutor(max_workers=JOB_MAX_WORKERS, thread_name_prefix="report-job")
+_jobs_lock = threading.Lock()
+_jobs = {}
+_inflight = {}
+_scheduler = {"thread": None, "pid": None, "stop": None}
+REFRESH_STATUS = {}
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+def submit_report_job(account_id, send_email=True, on_result=None):
+    """Queue a report build (and email) for an account and return ``(job, created)``.
+
+    While a matching job for the same account is queued or running it is returned
+    instead of starting another one (``created`` is False), so repeated triggers collapse
+    into a single run. A job that sends the email also serves a request without one, but
+    not the other way round. ``on_result(account_id, data)`` is called with the data once
+    built; if it raises, the error is logged and the job carries on.
+    """
+    get_account(account_id)
+    with _jobs_lock:
+        for key in [(account_id, True)] if send_email else [(account_id, False), (account_id, True)]:
+            job_id = _inflight.get(key)
+            if job_id:
+                return _job_snapshot(_jobs[job_id]), False
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "account": account_id,
+            "status": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "stages": {name: {"status": "pending", "seconds": None} for name in REPORT_JOB_STAGES if send_email or name != "email"},
+            "timings": {},
+            "summary": {},
+            "error": None
+        }
+        _jobs[job["id"]] = job
+        _inflight[(account_id, send_email)] = job["id"]
+        _prune_jobs()
+        snapshot = _job_snapshot(job)
+
+    print(f"🧾 Queued report job {job['id']} for {account_id}")
+    _executor.submit(_run_report_job, job, send_email, on_result)
+    return snapshot, True
+
+def get_job(job_id):
+    """Status of a job (stages, timings, summary and error), or None if unknown"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return _job_snapshot(job) if job else None
+
+def list_jobs():
+    """Status of every tracked job, newest first"""
+    with _jobs_lock:
+        return [_job_snapshot(job) for job in reversed(list(_jobs.values()))]
+
+def _job_snapshot(job):
+    snapshot = dict(job)
+    snapshot["stages"] = {name: dict(stage) for name, stage in job["stages"].items()}
+    # The worker writes timings without the lock; dict() copies them in one step
+    snapshot["timings"] = {stage: round(seconds, 3) for stage, seconds in dict(job["timings"]).items()}
+    snapshot["summary"] = dict(job["summary"])
+    return snapshot
+
+def _prune_jobs():
+    finished = [job_id for job_id, job in _jobs.items() if job["finished_at"]]
+    for job_id in finished[:max(0, len(_jobs) - JOB_HISTORY_LIMIT)]:
+        del _jobs[job_id]
+
+def _set_stage(job, name, status, started=None):
+    with _jobs_lock:
+        stage = job["stages"][name]
+        stage["status"] = status
+        if started is not None:
+            stage["seconds"] = round(time.perf_counter() - started, 3)
+
+def _run_report_job(job, send_email, on_result):
+    """Worker body: build the account's comparison data, then email it"""
+    account_id = job["account"]
+    with _jobs_lock:
+        job["status"] = "running"
+        job["started_at"] = _now()
+    print(f"🚀 Report job {job['id']} started for {account_id}")
+
+    status = "failed"
+    try:
+        started = time.perf_counter()
+        _set_stage(job, "fetch", "running")
+        # The account pipeline fills the shared timings dict stage by stage while polling reads it
+        data = fetch_account_comparison_data(account_id, timings=job["timings"])
+        _set_stage(job, "fetch", "done", started)
+
+        weeks = data.get("weeks", [])
+        with _jobs_lock:
+            job["summary"].update({
+                "campaigns": len(data.get("campaigns", {})),
+                "weeks": len(weeks),
+                "anomalies": len(data.get("anomalies", [])),
+                "start_week": weeks[0] if weeks else None,
+                "end_week": weeks[-1] if weeks else None
+            })
+        if on_result:
+            try:
+                on_result(account_id, data)
+            except Exception as result_error:
+                # Publishing is a side effect; the report (and its email) still goes out
+                print(f"⚠️ Publishing result of job {job['id']} failed: {result_error}")
+                with _jobs_lock:
+                    job["summary"]["publish_error"] = str(result_error)
+
+        if send_email:
+            started = time.perf_counter()
+            _set_stage(job, "email", "running")
+            try:
+                send_account_report(account_id, data)
+                _set_stage(job, "email", "done", started)
+                email_status = "📧 Email sent successfully"
+            except Exception as email_error:
+                # The report itself is ready, so an email failure doesn't fail the job
+                print(f"❌ Email failed for job {job['id']}: {email_error}")
+                _set_stage(job, "email", "failed", started)
+                email_status = f"⚠️ Report generated but email failed: {str(email_error)[:50]}..."
+            with _jobs_lock:
+                job["summary"]["email_status"] = email_status
+
+        status = "succeeded"
+        print(f"✅ Report job {job['id']} finished for {account_id}")
+    except Exception as e:
+        print(f"❌ Report job {job['id']} failed: {e}")
+        traceback.print_exc()
+        with _jobs_lock:
+            job["error"] = str(e)
+            for stage in job["stages"].values():
+                if stage["status"] == "running":
+                    stage["status"] = "failed"
+    finally:
+        with _jobs_lock:
+            job["status"] = status
+            job["finished_at"] = _now()
+            if _inflight.get((account_id, send_email)) == job["id"]:
+                del _inflight[(account_id, send_email)]
+
+def start_refresh_scheduler(account_ids=None, interval_minutes=None):
+    """Start this process's refresh scheduler (no-op if running, or if the interval is 0).
+
+    Every worker may start one; they elect a leader through a lease in the snapshot
+    store, and only the leader queues refresh jobs. A refresh runs when an account's
+    published snapshot is older than the interval, and readers keep getting the
+    previous snapshot until the new one is published.
+    """
+    interval_minutes = REFRESH_INTERVAL_MINUTES if interval_minutes is None else interval_minutes
+    if interval_minutes <= 0:
+        return False
+    with _jobs_lock:
+        thread = _scheduler["thread"]
+        # A forked worker inherits the parent's bookkeeping but not its threads
+        if thread and thread.is_alive() and _scheduler["pid"] == os.getpid():
+            return False
+        account_ids = list(account_ids or REFRESH_ACCOUNTS or REPORT_ACCOUNTS)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=_refresh_loop, args=(account_ids, interval_minutes * 60, stop), name="report-refresh", daemon=True
+        )
+        _scheduler.update(thread=thread, pid=os.getpid(), stop=stop)
+    thread.start()
+    print(f"⏰ Refresh scheduler started: {', '.join(account_ids)} every {interval_minutes:g} min")
+    return True
+
+def stop_refresh_scheduler():
+    """Stop this process's refresh scheduler and wait for its thread"""
+    with _jobs_lock:
+        thread, stop = _scheduler["thread"], _scheduler["stop"]
+        _scheduler.update(thread=None, pid=None, stop=None)
+    if thread:
+        stop.set()
+        thread.join()
+
+def _refresh_loop(account_ids, interval, stop):
+    """Scheduler thread: while holding the lease, queue refreshes for accounts that are due"""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            if acquire_lease("refresh-scheduler", owner, REFRESH_LEASE_SECONDS):
+                for account_id in account_ids:
+                    _refresh_account(account_id, interval)
+        except Exception as e:
+            print(f"❌ Refresh scheduler check failed: {e}")
+        if stop.wait(REFRESH_TICK_SECONDS):
+            return
+
+def _refresh_account(account_id, interval):
+    """Queue a refresh job for an account if its snapshot is stale or a retry is due"""
+    status = REFRESH_STATUS.setdefault(account_id, {"job": None, "failures": 0, "retry_at": None, "last_error": None})
+    if status["job"]:
+        job = get_job(status["job"])
+        if job and job["status"] in ("queued", "running"):
+            return
+        status["job"] = None
+        if job and job["status"] == "failed":
+            status["failures"] += 1
+            delay = min(REFRESH_RETRY_BASE_SECONDS * 2 ** (status["failures"] - 1), interval)
+            status["retry_at"] = time.time() + delay
+            status["last_error"] = job["error"]
+            print(f"⏳ Refresh of {account_id} failed {status['failures']}x, retrying in {delay:.0f}s")
+            return
+        status.update(failures=0, retry_at=None, last_error=None)
+
+    if status["failures"]:
+        if time.time() < status["retry_at"]:
+            return
+    else:
+        published = snapshot_published_at(account_id)
+        if published and (datetime.datetime.now() - published).total_seconds() < interval:
+            return
+    job, _ = submit_report_job(account_id, send_email=False, on_result=publish_report_snapshot)
+    status["job"] = job["id"]
@@ -0,0 +1,113 @@
+from flask import Response, request
+import gzip
+import hashlib
+import json
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Compression levels for pre-encoded bodies (paid once per published snapshot)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+# Cheaper levels for per-request bodies (API projections), compressed on first use
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 5
+
+_render_lock = threading.Lock()
+_renders = {}
+
+def snapshot_version(data):
+    """Content hash of a data snapshot; equal data always gives the same version"""
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+def publish_render(name, data, render, mimetype="text/html; charset=utf-8"):
+    """Render a new data snapshot once and cache its body, pre-compressed, under ``name``.
+
+    The entry is keyed by the snapshot's content hash: publishing identical data keeps
+    the existing entry (and its ETag), while new data replaces it for every reader.
+    """
+    version = snapshot_version(data)
+    with _render_lock:
+        current = _renders.get(name)
+        if current and current["version"] == version:
+            return current
+
+    entry = encode_render(version, render(data), mimetype)
+    with _render_lock:
+        _renders[name] = entry
+    print(f"🗂️ Cached {name} render {version} ({len(entry['bodies']['identity']):,} bytes, {len(entry['bodies']['gzip']):,} gzipped)")
+    return entry
+
+def encode_render(version, body, mimetype, dynamic=False):
+    """Cache entry for a rendered body: the identity bytes plus every compressed encoding.
+
+    A ``dynamic`` entry (a per-request body unlikely to be served often) uses cheaper
+    compression levels and only compresses an encoding once a client asks for it.
+    """
+    body = body.encode("utf-8") if isinstance(body, str) else body
+    levels = {"gzip": DYNAMIC_GZIP_LEVEL if dynamic else GZIP_LEVEL}
+    if brotli is not None:
+        levels["br"] = DYNAMIC_BROTLI_QUALITY if dynamic else BROTLI_QUALITY
+    entry = {"version": version, "mimetype": mimetype, "bodies": {"identity": body}, "levels": levels}
+    if not dynamic:
+        for encoding in levels:
+            _encoded_body(entry, encoding)
+    return entry
+
+def _encoded_body(entry, encoding):
+    """Body of ``entry`` in ``encoding``, compressing it on first use"""
+    body = entry["bodies"].get(encoding)
+    if body is None:
+        identity, level = entry["bodies"]["identity"], entry["levels"][encoding]
+        if encoding == "br":
+            body = brotli.compress(identity, quality=level)
+        else:
+            body = gzip.compress(identity, compresslevel=level, mtime=0)
+        # Concurrent requests may both compress; either result is the same bytes
+        entry["bodies"][encoding] = body
+    return body
+
+def get_render(name):
+    """The current cached entry for ``name``, or None if nothing was published"""
+    with _render_lock:
+        return _renders.get(name)
+
+def invalidate_render(name=None):
+    """Drop one cached render, or all of them"""
+    with _render_lock:
+        if name is None:
+            _renders.clear()
+        else:
+            _renders.pop(name, None)
+
+def _etag(entry, encoding):
+    # Each encoding is a distinct representation, so each gets its own strong ETag
+    return entry["version"] if encoding == "identity" else f"{entry['version']}-{encoding}"
+
+def _preferred_encoding(entry):
+    accepted = request.accept_encodings
+    for encoding in ("br", "gzip"):
+        if encoding in entry["levels"] and accepted[encoding]:
+            return encoding
+    return "identity"
+
+def cached_response(entry):
+    """Serve a cached entry for the current request: 304 on a matching ETag, else the best encoding"""
+    encoding = _preferred_encoding(entry)
+    etags = {_etag(entry, enc) for enc in ("identity", *entry["levels"])}
+    if any(request.if_none_match.contains(tag) for tag in etags):
+        response = Response(status=304)
+    else:
+        response = Response(_encoded_body(entry, encoding), mimetype=entry["mimetype"])
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+    response.set_etag(_etag(entry, encoding))
+    response.headers.update(entry.get("headers", {}))
+    response.headers["Vary"] = "Accept-Encoding"
+    # Browsers keep the page but revalidate every view, which costs a 304 until new data lands
+    response.headers["Cache-Control"] = "no-cache"
+    return response
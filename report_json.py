@@ -0,0 +1,44 @@
+import datetime
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_default(value):
+    """JSON form of the pandas / numpy values found in report data"""
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient="records")
+    if isinstance(value, (pd.Timestamp, datetime.datetime, datetime.date)):
+        if pd.isna(value):
+            return None
+        # Sheet dates are whole days, so midnight timestamps keep their YYYY-MM-DD form
+        if isinstance(value, datetime.datetime) and value.time() == datetime.time() and value.tzinfo is None:
+            return value.strftime('%Y-%m-%d')
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(data, sort_keys=False):
+    """Serialize report data to compact JSON bytes (orjson when installed).
+
+    Keys keep their insertion order by default, so campaigns stay in sheet order.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, default=_json_default, option=option)
+    return json.dumps(data, default=_json_default, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+def loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+def content_version(data):
+    """Hash of report data that ignores key order; equal data always gives the same version"""
+    return hashlib.sha256(dumps(data, sort_keys=True)).hexdigest()[:20]
@@ -8,63 +8,14 @@ from email.mime.image import MIMEImage
 
 def send_daily_comparison_email(daily_data):
     """Send daily comparison email with Luma campaign data in table format"""
-    
-    # Check environment variables
-    email_user = os.getenv("EMAIL_USER")
-    email_password = os.getenv("EMAIL_PASSWORD") 
-    email_to = os.getenv("EMAIL_TO")
-    
-    if not all([email_user, email_password, email_to]):
-        print("❌ Missing email configuration:")
-        print(f"   EMAIL_USER: {'✓' if email_user else '✗'}")
-        print(f"   EMAIL_PASSWORD: {'✓' if email_password else '✗'}")  
-        print(f"   EMAIL_TO: {'✓' if email_to else '✗'}")
-        return
-    
-    try:
-        campaigns = daily_data.get('campaigns', {})
-        weeks = daily_data.get('weeks', [])
-        
-        if not campaigns or not weeks:
-            print("❌ No Luma campaign data to send")
-            return
-        
-        # DEBUG: Check Luma conversion data
-        conversion_actions = daily_data.get('conversion_actions', [])
-        print(f"🔍 DEBUG LUMA: Conversion actions count: {len(conversion_actions)}")
-        if conversion_actions:
-            print(f"🔍 DEBUG LUMA: First conversion keys: {list(conversion_actions[0].keys())}")
-            print(f"🔍 DEBUG LUMA: First conversion data: {conversion_actions[0]}")
-        
-        # Create HTML email
-        html_content = generate_daily_comparison_html(daily_data, "Luma")
-        
-        # Create plain text version
-        plain_text = generate_daily_comparison_text(daily_data, "Luma")
-        
-        # Create email message
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"gads luma campaign - {datetime.now().strftime('%b %d, %Y')}"
-        msg['From'] = email_user
-        msg['To'] = email_to
-        
-        # Add text and HTML parts
-        text_part = MIMEText(plain_text, 'plain')
-        html_part = MIMEText(html_content, 'html')
-        
-        msg.attach(text_part)
-        msg.attach(html_part)
-        
-        # Send email
-        _send_email(msg, email_user, email_password)
-        print("✅ Luma daily comparison email sent successfully!")
-        
-    except Exception as e:
-        print(f"❌ Luma email preparation failed: {e}")
-        raise
+    send_account_comparison_email(daily_data, "Luma")
 
 def send_keynote_comparison_email(keynote_data):
     """Send daily comparison email with Keynote campaign data in table format"""
+    send_account_comparison_email(keynote_data, "Keynote", conversions_key="conversions")
+
+def send_account_comparison_email(daily_data, campaign_type, conversions_key="conversion_actions"):
+    """Send the daily comparison email for any registered report account"""
     
     # Check environment variables
     email_user = os.getenv("EMAIL_USER")
@@ -72,56 +23,37 @@ def send_keynote_comparison_email(keynote_data):
     email_to = os.getenv("EMAIL_TO")
     
     if not all([email_user, email_password, email_to]):
-        print("❌ Missing email configuration for Keynote")
+        print(f"❌ Missing email configuration for {campaign_type}:")
+        print(f"   EMAIL_USER: {'✓' if email_user else '✗'}")
+        print(f"   EMAIL_PASSWORD: {'✓' if email_password else '✗'}")  
+        print(f"   EMAIL_TO: {'✓' if email_to else '✗'}")
         return
     
     try:
-        campaigns = keynote_data.get('campaigns', {})
-        weeks = keynote_data.get('weeks', [])
-        
-        if not campaigns or not weeks:
-            print("❌ No Keynote campaign data to send")
+        if not daily_data.get('campaigns') or not daily_data.get('weeks'):
+            print(f"❌ No {campaign_type} campaign data to send")
             return
         
-        # DEBUG: Check Keynote conversion data
-        conversion_actions = keynote_data.get('conversions', [])  # FIXED: Use 'conversions' key instead of 'conversion_actions'
-        print(f"🔍 DEBUG KEYNOTE: Conversion actions count: {len(conversion_actions)}")
-        if conversion_actions:
-            print(f"🔍 DEBUG KEYNOTE: First conversion keys: {list(conversion_actions[0].keys())}")
-            print(f"🔍 DEBUG KEYNOTE: First conversion data: {conversion_actions[0]}")
-            print(f"🔍 DEBUG KEYNOTE: All conversion data: {conversion_actions}")
-        else:
-            print(f"🔍 DEBUG KEYNOTE: No conversion actions found in data")
-            print(f"🔍 DEBUG KEYNOTE: Available keynote_data keys: {list(keynote_data.keys())}")
-        
-        # Create HTML email - explicitly pass conversion data with correct key
-        keynote_data_with_conversions = keynote_data.copy()
-        keynote_data_with_conversions['conversion_actions'] = conversion_actions  # FIXED: Ensure HTML function gets data under expected key
-        html_content = generate_daily_comparison_html(keynote_data_with_conversions, "Keynote")
-        
-        # Create plain text version
-        keynote_data_with_conversions['conversion_actions'] = conversion_actions  # Also fix for text version
-        plain_text = generate_daily_comparison_text(keynote_data_with_conversions, "Keynote")
+        # The HTML and text builders read conversions from 'conversion_actions'
+        email_data = daily_data.copy()
+        email_data['conversion_actions'] = daily_data.get(conversions_key, [])
+        html_content = generate_daily_comparison_html(email_data, campaign_type)
+        plain_text = generate_daily_comparison_text(email_data, campaign_type)
         
         # Create email message
         msg = MIMEMultipart('alternative')
-        msg['Subject'] = f"gads keynote campaign - {datetime.now().strftime('%b %d, %Y')}"
+        msg['Subject'] = f"gads {campaign_type.lower()} campaign - {datetime.now().strftime('%b %d, %Y')}"
         msg['From'] = email_user
         msg['To'] = email_to
         
-        # Add text and HTML parts
-        text_part = MIMEText(plain_text, 'plain')
-        html_part = MIMEText(html_content, 'html')
-        
-        msg.attach(text_part)
-        msg.attach(html_part)
+        msg.attach(MIMEText(plain_text, 'plain'))
+        msg.attach(MIMEText(html_content, 'html'))
         
-        # Send email
         _send_email(msg, email_user, email_password)
-        print("✅ Keynote daily comparison email sent successfully!")
+        print(f"✅ {campaign_type} daily comparison email sent successfully!")
         
     except Exception as e:
-        print(f"❌ Keynote email preparation failed: {e}")
+        print(f"❌ {campaign_type} email preparation failed: {e}")
         raise
 
 
@@ -407,6 +339,8 @@ def generate_daily_comparison_html(daily_data, campaign_type="Luma"):
                     </div>
                 </div>
                 
+                {generate_anomalies_html(daily_data.get('anomalies', []))}
+                
                 <!-- Legend -->
                 <div style="background: #f8f9fa; padding: 15px; border-radius: 6px; margin-top: 20px;">
                     <h4 style="color: #333; margin-top: 0; margin-bottom: 10px; font-size: 14px;">📋 Column Definitions</h4>
@@ -520,6 +454,8 @@ Please view the HTML version for the complete table format with all metrics.
     else:
         text += "No conversion action data available.\n"
 
+    text += generate_anomalies_text(daily_data.get('anomalies', []))
+
     text += f"""
 {campaign_type} Column Definitions:
 - Impr.: Impressions
@@ -534,6 +470,45 @@ Please view the HTML version for the complete table format with all metrics.
     
     return text
 
+def generate_anomalies_html(anomalies, limit=10):
+    """HTML block listing the strongest anomalies (spend spikes, CTR collapses, conversion drops)"""
+    if not anomalies:
+        return ""
+    
+    html = f"""
+                <div style="background: #fff3cd; border-left: 4px solid #ffc107; padding: 20px; margin: 25px 0; border-radius: 0 8px 8px 0;">
+                    <h3 style="color: #856404; margin-top: 0; margin-bottom: 12px;">⚠️ Anomalies Detected ({len(anomalies)})</h3>
+                    <table style="width: 100%; border-collapse: collapse; font-size: 13px;">
+                        <tr style="color: #856404; text-align: left;">
+                            <th style="padding: 6px;">Date</th><th style="padding: 6px;">Campaign</th><th style="padding: 6px;">Anomaly</th>
+                            <th style="padding: 6px; text-align: right;">Value</th><th style="padding: 6px; text-align: right;">Baseline</th><th style="padding: 6px; text-align: right;">z</th>
+                        </tr>"""
+    for anomaly in anomalies[:limit]:
+        html += f"""
+                        <tr style="border-top: 1px solid #ffeeba;">
+                            <td style="padding: 6px;">{anomaly['date']}</td>
+                            <td style="padding: 6px;">{anomaly['campaign']}</td>
+                            <td style="padding: 6px; font-weight: bold;">{anomaly['label']}</td>
+                            <td style="padding: 6px; text-align: right;">{anomaly['value']:,.2f}</td>
+                            <td style="padding: 6px; text-align: right;">{anomaly['baseline']:,.2f}</td>
+                            <td style="padding: 6px; text-align: right;">{anomaly['z_score']:+.1f}</td>
+                        </tr>"""
+    html += """
+                    </table>
+                </div>"""
+    return html
+
+def generate_anomalies_text(anomalies, limit=10):
+    """Plain-text version of generate_anomalies_html"""
+    if not anomalies:
+        return ""
+    
+    text = f"\nANOMALIES DETECTED ({len(anomalies)}):\n" + "-" * 80 + "\n"
+    for anomaly in anomalies[:limit]:
+        text += (f"{anomaly['date']:<12} {str(anomaly['campaign'])[:28]:<30} {anomaly['label']:<16} "
+                 f"{anomaly['value']:>10,.2f} vs {anomaly['baseline']:,.2f} (z {anomaly['z_score']:+.1f})\n")
+    return text
+
 def send_simple_test_email():
     """Send a simple test email to verify SMTP works"""
     email_user = os.getenv("EMAIL_USER")
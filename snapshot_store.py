@@ -0,0 +1,109 @@
+from google_ads_api import DATA_DIR
+from report_json import content_version, dumps, loads
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+# Published report snapshots shared by every server worker (one row per account)
+SNAPSHOT_DB_PATH = os.getenv("REPORT_SNAPSHOT_DB", os.path.join(DATA_DIR, "reports.sqlite3"))
+# Seconds a reader waits on a concurrent publish before giving up
+SNAPSHOT_BUSY_TIMEOUT = 10
+
+_snapshot_local = threading.local()
+_snapshot_lock = threading.Lock()
+_loaded_snapshots = {}
+
+def _snapshot_connection(path=None):
+    """This thread's connection to the snapshot store, creating the table on first use"""
+    path = path or SNAPSHOT_DB_PATH
+    connections = _snapshot_local.__dict__.setdefault("connections", {})
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=SNAPSHOT_BUSY_TIMEOUT)
+        # WAL lets every worker keep reading the previous snapshot while one publishes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""CREATE TABLE IF NOT EXISTS report_snapshots (
+            account TEXT PRIMARY KEY, version TEXT NOT NULL, body BLOB NOT NULL, published_at TEXT NOT NULL)""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)""")
+        connections[path] = conn
+    return conn
+
+def publish_snapshot(account_id, data, path=None):
+    """Atomically replace an account's published snapshot; returns its version (content hash)"""
+    body = dumps(data)
+    version = content_version(data)
+    published_at = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = _snapshot_connection(path)
+    with conn:
+        conn.execute(
+            """INSERT INTO report_snapshots (account, version, body, published_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (account) DO UPDATE SET version = excluded.version, body = excluded.body, published_at = excluded.published_at""",
+            (account_id, version, body, published_at)
+        )
+    print(f"📦 Published {account_id} snapshot {version} ({len(body):,} bytes)")
+    return version
+
+def publish_report_snapshot(account_id, data, path=None):
+    """Publish a built report, refusing an empty one so the previous snapshot keeps being served"""
+    if not data or not data.get("campaigns"):
+        raise RuntimeError(f"No campaign data built for {account_id}; keeping the previous snapshot")
+    return publish_snapshot(account_id, data, path)
+
+def read_snapshot(account_id, path=None):
+    """Latest published snapshot ``{"version", "data", "published_at"}`` of an account, or None.
+
+    Each call only checks the stored version; the body is loaded and parsed again only
+    after another publish (from any worker), so the same dict is returned until then.
+    """
+    conn = _snapshot_connection(path)
+    row = conn.execute("SELECT version, published_at FROM report_snapshots WHERE account = ?", (account_id,)).fetchone()
+    if row is None:
+        return None
+    key = (path or SNAPSHOT_DB_PATH, account_id)
+    with _snapshot_lock:
+        cached = _loaded_snapshots.get(key)
+    if cached and cached["version"] == row[0]:
+        return cached
+
+    row = conn.execute("SELECT version, body, published_at FROM report_snapshots WHERE account = ?", (account_id,)).fetchone()
+    snapshot = {"version": row[0], "data": loads(row[1]), "published_at": row[2]}
+    with _snapshot_lock:
+        _loaded_snapshots[key] = snapshot
+    return snapshot
+
+def delete_snapshot(account_id, path=None):
+    """Remove an account's published snapshot"""
+    conn = _snapshot_connection(path)
+    with conn:
+        conn.execute("DELETE FROM report_snapshots WHERE account = ?", (account_id,))
+    with _snapshot_lock:
+        _loaded_snapshots.pop((path or SNAPSHOT_DB_PATH, account_id), None)
+
+def snapshot_published_at(account_id, path=None):
+    """When an account's snapshot was last published (datetime), or None if never"""
+    row = _snapshot_connection(path).execute(
+        "SELECT published_at FROM report_snapshots WHERE account = ?", (account_id,)
+    ).fetchone()
+    return datetime.datetime.fromisoformat(row[0]) if row else None
+
+def acquire_lease(name, owner, ttl_seconds, path=None):
+    """Take or renew the named lease for ``owner``; False while another owner's lease is live.
+
+    Workers sharing the store use this to elect one of them for singleton work (e.g.
+    the refresh scheduler); a lease that isn't renewed within ``ttl_seconds`` lapses.
+    """
+    now = time.time()
+    conn = _snapshot_connection(path)
+    with conn:
+        conn.execute(
+            """INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at < ?""",
+            (name, owner, now + ttl_seconds, now)
+        )
+        row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+    return row[0] == owner
@@ -0,0 +1,189 @@
+import datetime
+import random
+import re
+import threading
+import time
+
+import pytest
+
+import google_ads_api
+import job_runner
+import snapshot_store
+
+PERFORMANCE_HEADERS = [
+    'Date', 'Campaign name', 'Ad group name', 'Impressions', 'Clicks', 'CTR', 'Conversions',
+    'Search impression share', 'Cost per conversion', 'Cost micros', 'Phone calls'
+]
+
+def make_performance_rows(rows, campaigns=8, days=60, seed=7):
+    """Performance tab (title row, header, then rows of strings) shaped like the Sheets export"""
+    rng = random.Random(seed)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    data = [['Daily Ad Group Performance Report'], list(PERFORMANCE_HEADERS)]
+    for i in range(rows):
+        impressions = rng.randint(0, 25000)
+        clicks = rng.randint(0, max(1, impressions // 20))
+        conversions = rng.choice([0, 0, 1, 2])
+        cost = rng.uniform(0, 900)
+        data.append([
+            str(start + datetime.timedelta(days=i * days // rows)),
+            f"Campaign {rng.randrange(campaigns):03d}",
+            f"Ad group {rng.randrange(4)}",
+            f"{impressions:,}",
+            str(clicks),
+            f"{clicks / impressions * 100:.2f}%" if impressions else '--',
+            f"{conversions:.2f}",
+            f"{rng.uniform(10, 100):.2f}%",
+            f"€{cost / conversions:,.2f}" if conversions else '—',
+            f"{cost:,.2f}",
+            str(rng.choice([0, 0, 1]))
+        ])
+    return data
+
+def make_conversion_rows(rows, campaigns=8, days=30, seed=11):
+    """Luma-layout conversion action tab"""
+    rng = random.Random(seed)
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    data = [['Daily Ad Group Conversion Action Report'], ['Date', 'Campaign Name', 'Conversions', 'Conversion Action Name']]
+    for i in range(rows):
+        data.append([
+            str(start + datetime.timedelta(days=i * days // max(rows, 1))),
+            f"Campaign {rng.randrange(campaigns):03d}",
+            f"{rng.choice([1, 2]):.2f}",
+            rng.choice(['Contact form', 'Phone call'])
+        ])
+    return data
+
+@pytest.fixture
+def performance_rows():
+    return make_performance_rows
+
+@pytest.fixture
+def conversion_rows():
+    return make_conversion_rows
+
+@pytest.fixture(autouse=True)
+def isolated_data_dirs(tmp_path, monkeypatch):
+    """Keep sync state and tab snapshots written by a test inside its tmp dir"""
+    monkeypatch.setattr(google_ads_api, "SYNC_DIR", str(tmp_path / "sync"))
+    monkeypatch.setattr(google_ads_api, "SNAPSHOT_DIR", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(snapshot_store, "SNAPSHOT_DB_PATH", str(tmp_path / "reports.sqlite3"))
+
+_A1_CELLS = re.compile(r"^([A-Z]+)(\d*)(?::([A-Z]+)(\d*))?$")
+
+class FakeValuesApi:
+    """values:batchGet over the tabs of a memory data source, with A1 range semantics.
+
+    Like the real API it drops trailing empty cells and rows, and leaves ``values`` out of
+    ranges with no data. ``errors`` holds statuses to fail the next calls with, in order.
+    """
+
+    def __init__(self, tabs):
+        self.source = google_ads_api.memory_data_source(tabs)
+        self.tabs = self.source["tabs"]
+        self.calls = []
+        self.errors = []
+
+    def batch_get(self, ranges):
+        self.calls.append(list(ranges))
+        if self.errors:
+            status = self.errors.pop(0)
+            return status, {"error": {"code": status}}
+        value_ranges = []
+        for a1 in ranges:
+            rows = self.values(a1)
+            if rows is None:
+                return 400, {"error": {"code": 400, "message": f"Unable to parse range: {a1}"}}
+            value_ranges.append({"range": a1, "values": rows} if rows else {"range": a1})
+        return 200, {"valueRanges": value_ranges}
+
+    def values(self, a1):
+        tab, _, cells = a1.rpartition("!") if "!" in a1 else (a1, "", "")
+        if tab.startswith("'"):
+            tab = tab[1:-1].replace("''", "'")
+        if tab not in self.tabs:
+            return None
+        rows = self.tabs[tab]
+        first_row, last_row, first_col, last_col = 1, len(rows), 0, None
+        if cells:
+            col_from, row_from, col_to, row_to = _A1_CELLS.match(cells).groups()
+            first_row = int(row_from or 1)
+            last_row = int(row_to) if row_to else (first_row if col_to is None else len(rows))
+            first_col = _column_index(col_from)
+            last_col = _column_index(col_to or col_from) + 1 if col_to != "ZZ" else None
+        selected = [[str(cell) for cell in row[first_col:last_col]] for row in rows[first_row - 1:last_row]]
+        selected = [_trim(row) for row in selected]
+        while selected and not selected[-1]:
+            selected.pop()
+        return selected
+
+    def request_values_batch(self):
+        """Drop-in async ``_request_values_batch`` raising SheetsApiError like the REST path"""
+        async def request(request_ranges, sheet_id):
+            status, body = self.batch_get(request_ranges)
+            if status != 200:
+                raise google_ads_api.SheetsApiError(status, str(body))
+            return body
+        return request
+
+    def worksheet(self, sheet_name, sheet_id=None):
+        return type("FakeWorksheet", (), {"row_count": len(self.tabs[sheet_name]) + 100})()
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+def _trim(row):
+    row = list(row)
+    while row and not row[-1].strip():
+        row.pop()
+    return row
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    """Route every Sheets read through a FakeValuesApi built from ``{tab: rows}``"""
+    def install(tabs):
+        api = FakeValuesApi(tabs)
+        monkeypatch.setattr(google_ads_api, "_request_values_batch", api.request_values_batch())
+        monkeypatch.setattr(google_ads_api, "get_worksheet", api.worksheet)
+        return api
+    return install
+
+@pytest.fixture(autouse=True)
+def unthrottled_sheets(monkeypatch):
+    """A fresh, generous rate limiter and near-instant backoff for every test"""
+    monkeypatch.setattr(google_ads_api, "_rate_bucket", {"tokens": 1000.0, "updated": None, "rate": 1000.0})
+    monkeypatch.setattr(google_ads_api, "SHEETS_READ_QUOTA_PER_MINUTE", 60000)
+    monkeypatch.setattr(google_ads_api, "SHEETS_BACKOFF_BASE_SECONDS", 0.001)
+
+@pytest.fixture
+def report_calls(monkeypatch):
+    """Fake report build and email; builds block until ``release`` is set, then raise ``error`` if set"""
+    calls = {"fetch": [], "email": [], "release": threading.Event(), "error": None}
+
+    def fetch(account_id, timings=None):
+        calls["fetch"].append(account_id)
+        calls["release"].wait(5)
+        if calls["error"]:
+            raise calls["error"]
+        return {"campaigns": {"Campaign 000": {}}, "weeks": ["2026-10-05"], "anomalies": []}
+
+    monkeypatch.setattr(job_runner, "fetch_account_comparison_data", fetch)
+    monkeypatch.setattr(job_runner, "send_account_report", lambda account_id, data: calls["email"].append(account_id))
+    yield calls
+    calls["release"].set()
+
+@pytest.fixture
+def finished_job():
+    """Wait for a job to finish and return its final status"""
+    def wait(job_id, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = job_runner.get_job(job_id)
+            if job["finished_at"]:
+                return job
+            time.sleep(0.01)
+        raise AssertionError(f"job {job_id} did not finish")
+    return wait
@@ -0,0 +1,56 @@
+import pytest
+
+import app as app_module
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("TRIGGER_KEY", "secret")
+    return app_module.app.test_client()
+
+def test_trigger_needs_the_key(client, report_calls):
+    assert client.get("/trigger?key=wrong").status_code == 403
+    assert report_calls["fetch"] == []
+
+def test_trigger_returns_202_and_the_job_can_be_polled(client, report_calls, finished_job):
+    response = client.get("/trigger?key=secret&format=json")
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job["created"] and job["status"] in ("queued", "running")
+    assert job["account"] == app_module.DASHBOARD_ACCOUNT
+
+    report_calls["release"].set()
+    finished_job(job["id"])
+    polled = client.get(f"/jobs/{job['id']}")
+    assert polled.status_code == 200
+    status = polled.get_json()
+    assert status["status"] == "succeeded"
+    assert {name: stage["status"] for name, stage in status["stages"].items()} == {"fetch": "done", "email": "done"}
+    assert status["summary"]["campaigns"] == 1
+    assert report_calls["email"] == [app_module.DASHBOARD_ACCOUNT]
+
+def test_concurrent_triggers_share_one_job(client, report_calls, finished_job):
+    first = client.get("/trigger?key=secret&format=json").get_json()
+    second = client.get("/trigger?key=secret&format=json")
+    assert second.status_code == 202
+    assert second.get_json()["id"] == first["id"] and not second.get_json()["created"]
+    html = client.get("/trigger?key=secret")
+    assert html.status_code == 202 and first["id"] in html.get_data(as_text=True)
+
+    report_calls["release"].set()
+    finished_job(first["id"])
+    assert report_calls["fetch"] == [app_module.DASHBOARD_ACCOUNT]
+
+def test_failed_job_reports_its_error(client, report_calls, finished_job):
+    report_calls["error"] = RuntimeError("Sheets unavailable")
+    report_calls["release"].set()
+    job = client.get("/trigger?key=secret&format=json").get_json()
+    finished_job(job["id"])
+
+    status = client.get(f"/jobs/{job['id']}").get_json()
+    assert status["status"] == "failed"
+    assert status["error"] == "Sheets unavailable"
+    assert status["stages"]["fetch"]["status"] == "failed"
+    assert report_calls["email"] == []
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/nope").status_code == 404
@@ -0,0 +1,33 @@
+import pytest
+from flask import Flask
+
+import data_api
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.add_url_rule("/api/daily-data", "daily_data", data_api.data_api_response)
+    data_api.publish_data_snapshot({
+        "campaigns": {f"Campaign {i:03d}": {"2026-10-05": {"impressions": i}} for i in range(5)},
+        "weeks": ["2026-10-05"]
+    })
+    return app.test_client()
+
+def test_cursor_pages_through_every_campaign(client):
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/daily-data", query_string=dict(limit=2, **({"cursor": cursor} if cursor else {})))
+        assert response.status_code == 200
+        page = response.get_json()
+        seen += list(page["campaigns"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"Campaign {i:03d}" for i in range(5)]
+
+@pytest.mark.parametrize("cursor", ["!!!", "", "bm90IGpzb24", "MTI", "IiI"])
+def test_malformed_cursor_is_rejected_like_a_bad_limit(client, cursor):
+    bad_limit = client.get("/api/daily-data?limit=0")
+    response = client.get("/api/daily-data", query_string={"cursor": cursor})
+    assert response.status_code == bad_limit.status_code == 400
+    assert set(response.get_json()) == set(bad_limit.get_json()) == {"error"}
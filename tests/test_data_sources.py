@@ -0,0 +1,12 @@
+from google_ads_api import SHEET_NAME, _pad_rows, local_data_source, save_local_tabs
+
+def test_local_csv_replays_saved_tabs(tmp_path, performance_rows):
+    rows = performance_rows(50)
+    save_local_tabs({SHEET_NAME: rows}, str(tmp_path))
+    source = local_data_source(str(tmp_path))
+    assert source["fetch_tabs"]([SHEET_NAME, "Missing"]) == {SHEET_NAME: _pad_rows(rows), "Missing": None}
+
+def test_local_csv_strips_a_byte_order_mark(tmp_path):
+    (tmp_path / "Tab.csv").write_bytes("\ufeffDate,Campaign\n2026-10-12,Search\n".encode("utf-8"))
+    rows = local_data_source(str(tmp_path))["fetch_tabs"](["Tab"])["Tab"]
+    assert rows == [["Date", "Campaign"], ["2026-10-12", "Search"]]
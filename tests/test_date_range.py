@@ -0,0 +1,19 @@
+import datetime
+
+import pandas as pd
+
+from google_ads_api import build_campaign_history, get_date_range_data, parse_campaign_rows
+
+def test_date_range_with_and_without_an_index(performance_rows):
+    df = parse_campaign_rows(performance_rows(600, days=60))
+    target = pd.Timestamp(datetime.date.today() - datetime.timedelta(days=10))
+
+    masked = get_date_range_data(df, target, days_back=7)
+    assert masked['Date'].between(target - pd.Timedelta(days=7), target).all()
+    assert len(masked) == int(pd.to_datetime(df['Date']).between(target - pd.Timedelta(days=7), target).sum())
+
+    indexed = get_date_range_data(df, target, days_back=7, history=build_campaign_history(df))
+    pd.testing.assert_frame_equal(
+        masked.sort_values('Date', kind='stable').reset_index(drop=True),
+        indexed.reset_index(drop=True)
+    )
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from google_ads_api import SHEET_ID, SHEET_NAME, _pad_rows, _sync_state_path, a1_range, sync_tab_rows
+
+@pytest.fixture
+def sheet(fake_sheets, performance_rows):
+    return fake_sheets({SHEET_NAME: performance_rows(200)})
+
+def test_appended_rows_are_fetched_as_a_delta(sheet, performance_rows):
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(sheet.tabs[SHEET_NAME])
+    assert sheet.calls == [[a1_range(SHEET_NAME)]]
+
+    sheet.calls.clear()
+    sheet.tabs[SHEET_NAME] += performance_rows(30, seed=8)[2:]
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(sheet.tabs[SHEET_NAME])
+    assert len(sheet.calls) == 1
+    assert a1_range(SHEET_NAME, "A203:ZZ") in sheet.calls[0]
+    assert a1_range(SHEET_NAME) not in sheet.calls[0]
+
+def test_unchanged_tab_downloads_no_rows(sheet):
+    sync_tab_rows(SHEET_NAME)
+    sheet.calls.clear()
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(sheet.tabs[SHEET_NAME])
+    assert sheet.values(sheet.calls[0][-1]) == []
+
+@pytest.mark.parametrize("edit", ["insert", "delete", "rewrite_last"])
+def test_rows_moved_before_the_watermark_force_a_full_fetch(sheet, edit, performance_rows):
+    sync_tab_rows(SHEET_NAME)
+    rows = sheet.tabs[SHEET_NAME]
+    if edit == "insert":
+        rows.insert(50, performance_rows(1, seed=9)[2])
+    elif edit == "delete":
+        del rows[50]
+    else:
+        rows[-1] = rows[-1][:3] + ["999,999"] + rows[-1][4:]
+    rows += performance_rows(5, seed=10)[2:]
+
+    sheet.calls.clear()
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(rows)
+    assert sheet.calls[-1] == [a1_range(SHEET_NAME)]
+
+    # The full fetch becomes the new baseline, so the next run is a delta again
+    sheet.calls.clear()
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(rows)
+    assert a1_range(SHEET_NAME) not in sheet.calls[0]
+
+@pytest.mark.parametrize("damage", ["corrupt", "missing"])
+def test_unusable_sync_state_falls_back_to_a_full_fetch(sheet, damage):
+    sync_tab_rows(SHEET_NAME)
+    path = _sync_state_path(SHEET_ID, SHEET_NAME)
+    if damage == "corrupt":
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"rows": [["trunc')
+    else:
+        os.remove(path)
+
+    sheet.calls.clear()
+    assert sync_tab_rows(SHEET_NAME) == _pad_rows(sheet.tabs[SHEET_NAME])
+    assert sheet.calls == [[a1_range(SHEET_NAME)]]
+    # The state was rewritten, so the next run is incremental again
+    sheet.calls.clear()
+    sync_tab_rows(SHEET_NAME)
+    assert a1_range(SHEET_NAME) not in sheet.calls[0]
@@ -0,0 +1,33 @@
+import job_runner
+
+def test_trigger_during_refresh_still_emails(report_calls, finished_job):
+    refresh, created = job_runner.submit_report_job("luma", send_email=False)
+    assert created
+    trigger, created = job_runner.submit_report_job("luma")
+    assert created and trigger["id"] != refresh["id"]
+
+    report_calls["release"].set()
+    finished_job(refresh["id"])
+    assert finished_job(trigger["id"])["status"] == "succeeded"
+    assert report_calls["email"] == ["luma"]
+
+def test_refresh_during_trigger_reuses_the_emailing_job(report_calls, finished_job):
+    trigger, _ = job_runner.submit_report_job("luma")
+    refresh, created = job_runner.submit_report_job("luma", send_email=False)
+    assert not created and refresh["id"] == trigger["id"]
+
+    report_calls["release"].set()
+    finished_job(trigger["id"])
+    assert report_calls["fetch"] == ["luma"]
+
+def test_publish_failure_does_not_abort_the_job(report_calls, finished_job):
+    def publish(account_id, data):
+        raise RuntimeError("store is read-only")
+
+    report_calls["release"].set()
+    job, _ = job_runner.submit_report_job("luma", on_result=publish)
+    job = finished_job(job["id"])
+    assert job["status"] == "succeeded"
+    assert job["stages"]["email"]["status"] == "done"
+    assert job["summary"]["publish_error"] == "store is read-only"
+    assert report_calls["email"] == ["luma"]
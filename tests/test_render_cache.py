@@ -0,0 +1,66 @@
+import gzip
+
+import brotli
+import pytest
+from flask import Flask
+
+import app as app_module
+import render_cache
+from snapshot_store import publish_snapshot
+
+def _render(data):
+    return f"<h1>{data['title']}</h1>" * 50
+
+@pytest.fixture
+def client():
+    render_cache.invalidate_render()
+    app = Flask(__name__)
+    app.add_url_rule("/page", "page", lambda: render_cache.cached_response(render_cache.get_render("page")))
+    yield app.test_client()
+    render_cache.invalidate_render()
+
+@pytest.mark.parametrize("accept, encoding", [
+    ("br, gzip", "br"), ("gzip", "gzip"), ("br;q=0, gzip", "gzip"), ("", None)
+])
+def test_encoding_follows_accept_encoding(client, accept, encoding):
+    render_cache.publish_render("page", {"title": "Report"}, _render)
+    response = client.get("/page", headers={"Accept-Encoding": accept})
+    assert response.headers.get("Content-Encoding") == encoding
+    assert response.headers["Vary"] == "Accept-Encoding"
+    decode = {"br": brotli.decompress, "gzip": gzip.decompress}.get(encoding, lambda body: body)
+    assert decode(response.data).decode() == _render({"title": "Report"})
+
+def test_matching_etag_gets_304(client):
+    render_cache.publish_render("page", {"title": "Report"}, _render)
+    first = client.get("/page", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    again = client.get("/page", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert client.get("/page", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_new_data_changes_the_etag_and_same_data_keeps_it(client):
+    first = render_cache.publish_render("page", {"title": "Report"}, _render)
+    assert render_cache.publish_render("page", {"title": "Report"}, _render) is first
+    etag = client.get("/page").headers["ETag"]
+
+    render_cache.publish_render("page", {"title": "Updated"}, _render)
+    response = client.get("/page", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert b"Updated" in response.data
+
+def test_invalidate_drops_the_render():
+    render_cache.publish_render("page", {"title": "Report"}, _render)
+    render_cache.invalidate_render("page")
+    assert render_cache.get_render("page") is None
+
+def test_dashboard_revalidates_until_a_new_snapshot_lands(monkeypatch):
+    monkeypatch.setattr(app_module, "served_version", None)
+    client = app_module.app.test_client()
+    data = {"campaigns": {"Campaign 000": {"2026-10-05": {"impressions": 10}}}, "weeks": ["2026-10-05"]}
+    publish_snapshot(app_module.DASHBOARD_ACCOUNT, data)
+    etag = client.get("/").headers["ETag"]
+    assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+    publish_snapshot(app_module.DASHBOARD_ACCOUNT, dict(data, weeks=["2026-10-05", "2026-10-12"]))
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
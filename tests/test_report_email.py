@@ -0,0 +1,29 @@
+import pytest
+
+import send_report_email
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+    for name in ("EMAIL_USER", "EMAIL_PASSWORD", "EMAIL_TO"):
+        monkeypatch.setenv(name, "reports@example.com")
+    monkeypatch.setattr(send_report_email, "_send_email", lambda msg, user, password: messages.append(msg))
+    return messages
+
+def _data(conversions_key):
+    conversions = [{"Date": "2026-10-12", "Campaign Name": "Campaign 000", "Conversions": 2, "Conversion Action Name": "Contact form"}]
+    return {"campaigns": {"Campaign 000": {"2026-10-05": {"impressions": 10}}}, "weeks": ["2026-10-05"], conversions_key: conversions}
+
+def _html(message):
+    return next(part.get_payload(decode=True).decode() for part in message.get_payload() if part.get_content_type() == "text/html")
+
+def test_luma_and_keynote_senders_share_the_generic_email(sent):
+    send_report_email.send_daily_comparison_email(_data("conversion_actions"))
+    send_report_email.send_keynote_comparison_email(_data("conversions"))
+    send_report_email.send_account_comparison_email(_data("conversions"), "Keynote", "conversions")
+
+    luma, keynote, generic = sent
+    assert luma["Subject"].startswith("gads luma campaign - ")
+    assert keynote["Subject"] == generic["Subject"]
+    assert _html(keynote) == _html(generic)
+    assert "Contact form" in _html(luma) and "Contact form" in _html(keynote)
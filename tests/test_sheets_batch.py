@@ -0,0 +1,111 @@
+import time
+import weakref
+
+import pytest
+
+import google_ads_api
+from google_ads_api import (
+    CONVERSION_SHEET_NAME, REPORT_TABS, SHEET_NAME, SheetsApiError, a1_range,
+    batch_get_tab_values, fetch_report_tabs
+)
+
+# The real REST request path, captured before any fixture replaces it
+ORIGINAL_REQUEST = google_ads_api._request_values_batch
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status, self.body = status, body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.body
+
+    async def text(self):
+        return str(self.body)
+
+@pytest.fixture
+def sheets_http(monkeypatch, fake_sheets, performance_rows, conversion_rows):
+    """FakeValuesApi served through a fake aiohttp session on the real REST request path"""
+    api = fake_sheets({tab: performance_rows(20) if "Performance" in tab else conversion_rows(10) for tab in REPORT_TABS})
+    requests = []
+
+    class FakeSession:
+        def __init__(self, timeout=None):
+            pass
+
+        def get(self, url, params=None, headers=None):
+            requests.append({"url": url, "ranges": [value for key, value in params if key == "ranges"], "headers": headers})
+            return FakeResponse(*api.batch_get([value for key, value in params if key == "ranges"]))
+
+        async def close(self):
+            pass
+
+    # fake_sheets replaced the request function; put the real REST path back in front of the fake
+    monkeypatch.setattr(google_ads_api, "_request_values_batch", ORIGINAL_REQUEST)
+    monkeypatch.setattr(google_ads_api.aiohttp, "ClientSession", FakeSession)
+    monkeypatch.setattr(google_ads_api, "_async_loop_state", weakref.WeakKeyDictionary())
+    monkeypatch.setattr(google_ads_api, "_sheets_access_token", lambda: "token")
+    api.requests = requests
+    return api
+
+def test_all_tabs_of_a_sheet_share_one_batch_get(sheets_http):
+    tabs = fetch_report_tabs(REPORT_TABS, sync_mode="full")
+    assert {tab: len(rows) for tab, rows in tabs.items()} == {tab: len(sheets_http.tabs[tab]) for tab in REPORT_TABS}
+    (request,) = sheets_http.requests
+    assert request["url"].endswith(f"/{google_ads_api.SHEET_ID}/values:batchGet")
+    assert request["ranges"] == [a1_range(tab) for tab in REPORT_TABS]
+    assert request["headers"] == {"Authorization": "Bearer token"}
+
+def test_missing_tab_falls_back_to_per_range_requests(sheets_http):
+    tabs = batch_get_tab_values([SHEET_NAME, "No such tab"])
+    assert tabs["No such tab"] is None
+    assert len(tabs[SHEET_NAME]) == len(sheets_http.tabs[SHEET_NAME])
+    assert [request["ranges"] for request in sheets_http.requests[1:]] in (
+        [[a1_range(SHEET_NAME)], [a1_range("No such tab")]], [[a1_range("No such tab")], [a1_range(SHEET_NAME)]]
+    )
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_errors_are_retried(sheets_http, status):
+    stats = dict(google_ads_api.SHEETS_RATE_STATS)
+    sheets_http.errors = [status, status]
+    rows = batch_get_tab_values([CONVERSION_SHEET_NAME])[CONVERSION_SHEET_NAME]
+    assert len(rows) == len(sheets_http.tabs[CONVERSION_SHEET_NAME])
+    assert len(sheets_http.requests) == 3
+    assert google_ads_api.SHEETS_RATE_STATS["retries"] == stats["retries"] + 2
+    key = "rate_limited" if status == 429 else "server_errors"
+    assert google_ads_api.SHEETS_RATE_STATS[key] == stats[key] + 2
+
+def test_rate_limit_halves_the_request_rate(sheets_http):
+    rate = google_ads_api._rate_bucket["rate"]
+    google_ads_api._retry_delay(SheetsApiError(429, "quota"), 0)
+    assert google_ads_api._rate_bucket["rate"] == rate / 2
+
+def test_retries_give_up_after_the_limit(sheets_http, monkeypatch):
+    monkeypatch.setattr(google_ads_api, "SHEETS_MAX_RETRIES", 2)
+    sheets_http.errors = [503] * 10
+    with pytest.raises(SheetsApiError, match="giving up after 2 retries"):
+        batch_get_tab_values([CONVERSION_SHEET_NAME])
+    assert len(sheets_http.requests) == 3
+
+def test_backoff_grows_with_jitter_and_skips_client_errors(monkeypatch):
+    monkeypatch.setattr(google_ads_api, "SHEETS_BACKOFF_BASE_SECONDS", 1.0)
+    monkeypatch.setattr(google_ads_api, "SHEETS_MAX_RETRIES", 10)
+    for attempt in range(4):
+        delay = google_ads_api._retry_delay(SheetsApiError(503, "unavailable"), attempt)
+        assert 0.5 * 2 ** attempt <= delay <= 2 ** attempt
+    assert google_ads_api._retry_delay(SheetsApiError(503, "unavailable"), 9) <= google_ads_api.SHEETS_BACKOFF_MAX_SECONDS
+    with pytest.raises(SheetsApiError):
+        google_ads_api._retry_delay(SheetsApiError(404, "not found"), 0)
+
+def test_token_bucket_queues_requests_past_the_burst(monkeypatch):
+    monkeypatch.setattr(google_ads_api, "SHEETS_RATE_BURST", 2)
+    monkeypatch.setattr(google_ads_api, "_rate_bucket", {"tokens": 2.0, "updated": time.monotonic(), "rate": 1.0})
+    waits = [google_ads_api._reserve_sheets_request() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(1.0, abs=0.05)
+    assert waits[3] == pytest.approx(2.0, abs=0.05)
@@ -0,0 +1,38 @@
+import threading
+
+import google_ads_api
+
+class FakeClient:
+    def __init__(self):
+        self.opening = threading.Event()
+        self.release = threading.Event()
+
+    def open_by_key(self, sheet_id):
+        self.opening.set()
+        self.release.wait(5)
+        return f"spreadsheet {sheet_id}"
+
+def test_slow_open_does_not_block_cached_handles(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(google_ads_api, "_sheets_client", client)
+    monkeypatch.setattr(google_ads_api, "_spreadsheet_cache", {"cached": "spreadsheet cached"})
+    monkeypatch.setattr(google_ads_api, "_worksheet_cache", {})
+
+    opened = {}
+    thread = threading.Thread(target=lambda: opened.update(slow=google_ads_api.get_spreadsheet("slow")))
+    thread.start()
+    try:
+        assert client.opening.wait(5)
+        # The slow open is still in flight (e.g. backing off), yet cached lookups return at once
+        lookups = {}
+        lookup = threading.Thread(target=lambda: lookups.update(
+            cached=google_ads_api.get_spreadsheet("cached"), client=google_ads_api.get_sheets_client()
+        ))
+        lookup.start()
+        lookup.join(1)
+        assert lookups == {"cached": "spreadsheet cached", "client": client}
+    finally:
+        client.release.set()
+        thread.join(5)
+    assert opened == {"slow": "spreadsheet slow"}
+    assert google_ads_api.get_spreadsheet("slow") == "spreadsheet slow"
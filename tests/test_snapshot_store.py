@@ -0,0 +1,22 @@
+import os
+import subprocess
+import sys
+
+from snapshot_store import publish_snapshot, read_snapshot
+
+def test_snapshot_keeps_campaign_order(tmp_path):
+    path = str(tmp_path / "reports.sqlite3")
+    data = {"campaigns": {"Zeta": {"2026-10-05": {"impressions": 1}}, "Alpha": {}}, "weeks": ["2026-10-05"]}
+    publish_snapshot("luma", data, path=path)
+    assert list(read_snapshot("luma", path=path)["data"]["campaigns"]) == ["Zeta", "Alpha"]
+
+def test_version_depends_on_content_only(tmp_path):
+    path = str(tmp_path / "reports.sqlite3")
+    first = publish_snapshot("luma", {"campaigns": {"Zeta": {}, "Alpha": {}}}, path=path)
+    assert publish_snapshot("luma", {"campaigns": {"Alpha": {}, "Zeta": {}}}, path=path) == first
+    assert publish_snapshot("luma", {"campaigns": {"Alpha": {}}}, path=path) != first
+
+def test_report_cron_path_does_not_import_flask():
+    code = "import sys, daily_report; sys.exit('flask' in sys.modules)"
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert subprocess.run([sys.executable, "-c", code], cwd=repo).returncode == 0
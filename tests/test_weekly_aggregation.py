@@ -0,0 +1,51 @@
+import datetime
+
+import pandas as pd
+
+from google_ads_api import get_account, build_account_comparison, parse_campaign_rows
+
+def _build(rows):
+    account = get_account("luma")
+    frames = {account["performance_tab"]: parse_campaign_rows(rows), account["conversion_tab"]: None}
+    return build_account_comparison(account, frames)
+
+def _impressions(rows, impressions_index):
+    return int(rows[impressions_index].replace(',', ''))
+
+def test_restated_row_changes_its_week(performance_rows):
+    rows = performance_rows(3000)
+    before = _build(rows)
+
+    restated = [list(row) for row in rows]
+    impressions = restated[1].index('Impressions')
+    target = restated[2452]
+    target[impressions] = str(_impressions(target, impressions) + 1_000_000)
+    after = _build(restated)
+
+    day = pd.Timestamp(target[0])
+    week = (day - pd.Timedelta(days=day.weekday())).strftime('%Y-%m-%d')
+    campaign = target[1]
+    assert after["campaigns"][campaign][week]["impressions"] == before["campaigns"][campaign][week]["impressions"] + 1_000_000
+    changed = [
+        (c, w) for c, weeks in after["campaigns"].items() for w, metrics in weeks.items()
+        if metrics["impressions"] != before["campaigns"][c][w]["impressions"]
+    ]
+    assert changed == [(campaign, week)]
+
+def test_first_week_only_counts_rows_inside_the_window(performance_rows):
+    rows = performance_rows(2000, days=60)
+    result = _build(rows)
+
+    account = get_account("luma")
+    start = datetime.datetime.now() - datetime.timedelta(days=account["window_days"])
+    impressions = rows[1].index('Impressions')
+    first_week = result["weeks"][0]
+    week_start = pd.Timestamp(first_week)
+    expected = {}
+    for row in rows[2:]:
+        day = pd.Timestamp(row[0])
+        if day >= start and week_start <= day < week_start + pd.Timedelta(days=7):
+            expected[row[1]] = expected.get(row[1], 0) + _impressions(row, impressions)
+
+    actual = {c: weeks[first_week]["impressions"] for c, weeks in result["campaigns"].items() if first_week in weeks}
+    assert actual == expected
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+import google_ads_api
+from google_ads_api import (
+    CONVERSION_SHEET_NAME, a1_range, batch_get_tab_values, fetch_tab_window,
+    parse_conversion_action_rows, recent_conversion_records
+)
+
+@pytest.fixture(autouse=True)
+def short_probe_span(monkeypatch):
+    # Small tabs still need a few probe rounds to narrow down the window start
+    monkeypatch.setattr(google_ads_api, "WINDOW_PROBE_SPAN", 20)
+
+def _recent(rows, days=7):
+    return recent_conversion_records(parse_conversion_action_rows(rows), days=days)
+
+WHOLE_TAB = a1_range(CONVERSION_SHEET_NAME)
+
+def test_window_matches_a_full_fetch(fake_sheets, conversion_rows):
+    sheet = fake_sheets({CONVERSION_SHEET_NAME: conversion_rows(2000, days=120)})
+    full = batch_get_tab_values([CONVERSION_SHEET_NAME])[CONVERSION_SHEET_NAME]
+
+    sheet.calls.clear()
+    window = fetch_tab_window(CONVERSION_SHEET_NAME, 7)
+    assert _recent(window) == _recent(full)
+    assert len(window) < len(full) // 5
+    assert all(WHOLE_TAB not in call for call in sheet.calls)
+
+    # The second fetch reuses the stored index: one request, no probes
+    sheet.calls.clear()
+    assert _recent(fetch_tab_window(CONVERSION_SHEET_NAME, 7)) == _recent(full)
+    assert len(sheet.calls) == 1
+
+def test_window_follows_appended_rows(fake_sheets, conversion_rows):
+    sheet = fake_sheets({CONVERSION_SHEET_NAME: conversion_rows(1000, days=60)})
+    fetch_tab_window(CONVERSION_SHEET_NAME, 7)
+    sheet.tabs[CONVERSION_SHEET_NAME] += conversion_rows(50, days=1, seed=12)[2:]
+    full = batch_get_tab_values([CONVERSION_SHEET_NAME])[CONVERSION_SHEET_NAME]
+    assert _recent(fetch_tab_window(CONVERSION_SHEET_NAME, 7)) == _recent(full)
+
+def test_unsorted_tab_falls_back_to_a_full_fetch(fake_sheets, conversion_rows):
+    rows = conversion_rows(1000, days=60)
+    body = rows[2:]
+    random.Random(3).shuffle(body)
+    sheet = fake_sheets({CONVERSION_SHEET_NAME: rows[:2] + body})
+
+    window = fetch_tab_window(CONVERSION_SHEET_NAME, 7)
+    assert window == google_ads_api._pad_rows(sheet.tabs[CONVERSION_SHEET_NAME])
+    assert sheet.calls[-1] == [WHOLE_TAB]
+
+    # The tab is now known to be unsorted, so later fetches skip the probes entirely
+    sheet.calls.clear()
+    fetch_tab_window(CONVERSION_SHEET_NAME, 7)
+    assert sheet.calls == [[WHOLE_TAB]]
+
+def test_tab_without_dates_falls_back_to_a_full_fetch(fake_sheets, conversion_rows):
+    rows = [[''] + row[1:] if i >= 2 else row for i, row in enumerate(conversion_rows(300, days=30))]
+    sheet = fake_sheets({CONVERSION_SHEET_NAME: rows})
+
+    assert fetch_tab_window(CONVERSION_SHEET_NAME, 7) == google_ads_api._pad_rows(rows)
+    assert sheet.calls[-1] == [WHOLE_TAB]